@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+"""
+Dados sintéticos e servidor de IA simulado usados pelo benchmark.
+
+Ficam fora de secre_tina.py para não pesar no módulo de produção; os
+subcomandos bench e stub-llm importam daqui somente quando executados.
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+import hashlib
+import threading
+import subprocess
+import statistics
+
+import numpy as np
+
+import secre_tina
+
+# Vocabulário das transcrições e respostas sintéticas
+SYNTHETIC_WORDS = (
+    "projeto reunião prazo equipe cliente entrega revisão orçamento tarefa decisão "
+    "próximo passo semana relatório teste versão problema solução proposta acordo "
+    "responsável data documento sistema usuário dados análise resultado meta plano"
+).split()
+
+def synthetic_audio(seconds, silence_ratio=0.3, seed=0, fs=secre_tina.SAMPLE_RATE):
+    """
+    Gera áudio sintético determinístico com trechos de "fala" e pausas.
+    
+    A fala é imitada por um tom harmônico com modulação de amplitude na
+    taxa das sílabas (~4 Hz); as pausas têm só ruído de fundo. A duração
+    das pausas é proporcional à dos trechos de fala, de modo que a fração
+    de silêncio do arquivo fica próxima de silence_ratio.
+    
+    Args:
+        seconds: Duração do áudio
+        silence_ratio: Fração do áudio em silêncio (0 a 1)
+        seed: Semente do gerador aleatório
+        fs: Taxa de amostragem
+    
+    Returns:
+        Array float32 com as amostras
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * fs)
+    audio = (rng.standard_normal(total) * 0.001).astype(np.float32)
+    position = 0
+    while position < total:
+        speech = min(int(rng.uniform(0.5, 3.0) * fs), total - position)
+        t = np.arange(speech, dtype=np.float32) / fs
+        f0 = rng.uniform(100, 250)
+        voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(3, 5) * t)
+        audio[position:position + speech] += (0.1 * voiced * envelope).astype(np.float32)
+        position += speech
+        if silence_ratio > 0:
+            position += int(speech * silence_ratio / max(1e-6, 1 - silence_ratio))
+    return audio
+
+def synthetic_transcript(words, seed=0):
+    """
+    Gera uma transcrição sintética determinística com o número de palavras informado.
+    
+    Args:
+        words: Número de palavras
+        seed: Semente do gerador aleatório
+    
+    Returns:
+        Texto com frases de 8 a 20 palavras
+    """
+    rng = random.Random(seed)
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(8, 20))
+        sentence = " ".join(rng.choice(SYNTHETIC_WORDS) for _ in range(length))
+        sentences.append(sentence.capitalize() + ".")
+        words -= length
+    return " ".join(sentences)
+
+class StubLLMServer:
+    """
+    Servidor HTTP local que imita as APIs da OpenAI e do Ollama.
+    
+    Cada resposta começa após uma latência fixa e é enviada em streaming a
+    uma taxa de tokens configurável, com texto determinístico. Serve para
+    medir o pipeline sem rede e sem um modelo de verdade.
+    """
+    
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, token_rate=100.0,
+                 response_tokens=120, embedding_dim=64):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.token_rate = token_rate
+        self.response_tokens = response_tokens
+        self.embedding_dim = embedding_dim
+        self.requests = 0
+        self.loads = 0
+        self._loop = None
+        self._thread = None
+        self._runner = None
+    
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+    
+    def start(self):
+        """Inicia o servidor em uma thread própria e aguarda a porta ser aberta"""
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        
+        async def serve():
+            from aiohttp import web
+            app = web.Application()
+            app.router.add_post("/v1/chat/completions", self._openai_chat)
+            app.router.add_post("/v1/embeddings", self._openai_embeddings)
+            app.router.add_post("/api/generate", self._ollama_generate)
+            app.router.add_post("/api/embed", self._ollama_embed)
+            app.router.add_get("/api/ps", self._ollama_ps)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.host, self.port).start()
+            self.port = self._runner.addresses[0][1]
+            ready.set()
+        
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(serve(), self._loop).result()
+        ready.wait()
+        return self
+    
+    def stop(self):
+        """Encerra o servidor"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+    
+    async def _tokens(self, json_mode=False):
+        """Gera os tokens da resposta respeitando latência e taxa"""
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        words = synthetic_transcript(self.response_tokens, seed=self.requests).split()
+        if json_mode:
+            # Resposta estruturada: uma frase em cada campo dos resumos
+            fields = [field for mode in secre_tina.SUMMARY_FIELDS.values() for field in mode]
+            size = max(1, len(words) // len(fields))
+            data = {field: [" ".join(words[i * size:(i + 1) * size])] for i, field in enumerate(fields)}
+            data.update(date="", actions=[{'task': data['actions'][0], 'owner': "", 'due': ""}])
+            words = json.dumps(data, ensure_ascii=False).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == 0 else " " + word
+            await asyncio.sleep(1 / self.token_rate)
+    
+    def _vector(self, text):
+        """Vetor determinístico derivado do hash do texto"""
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        return [(digest[i % len(digest)] + i) % 256 / 255 - 0.5 for i in range(self.embedding_dim)]
+    
+    async def _openai_chat(self, request):
+        from aiohttp import web
+        payload = await request.json()
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        async for token in self._tokens(json_mode="response_format" in payload):
+            chunk = {"choices": [{"index": 0, "delta": {"content": token}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+        await response.write(b"data: [DONE]\n\n")
+        return response
+    
+    async def _openai_embeddings(self, request):
+        from aiohttp import web
+        texts = (await request.json())["input"]
+        return web.json_response({"data": [{"index": i, "embedding": self._vector(text)}
+                                           for i, text in enumerate(texts)]})
+    
+    async def _ollama_generate(self, request):
+        from aiohttp import web
+        payload = await request.json()
+        if not payload.get("prompt"):
+            # Requisição sem prompt apenas carrega o modelo
+            self.loads += 1
+            return web.json_response({"model": payload.get("model"), "response": "", "done": True,
+                                      "done_reason": "load"})
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        count = 0
+        async for token in self._tokens(json_mode=payload.get("format") == "json"):
+            count += 1
+            await response.write((json.dumps({"response": token, "done": False}) + "\n").encode('utf-8'))
+        await response.write((json.dumps({"response": "", "done": True, "eval_count": count}) + "\n").encode('utf-8'))
+        return response
+    
+    async def _ollama_embed(self, request):
+        from aiohttp import web
+        texts = (await request.json())["input"]
+        return web.json_response({"embeddings": [self._vector(text) for text in texts]})
+    
+    async def _ollama_ps(self, request):
+        from aiohttp import web
+        name = f"{secre_tina.MODEL}:latest"
+        models = [{"name": name, "model": name, "size": 0}] if self.loads else []
+        return web.json_response({"models": models})
+
+def measure_import_time(runs=5):
+    """
+    Mede o tempo de importação do secre_tina em processos novos.
+    
+    Returns:
+        Dicionário com o melhor tempo, a mediana (ms) e os módulos pesados
+        carregados durante a importação
+    """
+    code = (
+        "import sys, time, json; t = time.perf_counter(); import secre_tina; "
+        "elapsed = time.perf_counter() - t; "
+        "heavy = [m for m in ('whisper', 'torch', 'numpy', 'sounddevice', 'aiohttp', 'faster_whisper') if m in sys.modules]; "
+        "print(json.dumps({'ms': elapsed * 1000, 'heavy': heavy}))"
+    )
+    directory = os.path.dirname(os.path.abspath(secre_tina.__file__))
+    samples = []
+    heavy = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=directory, capture_output=True, text=True, check=True)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        samples.append(result['ms'])
+        heavy = result['heavy']
+    return {'best_ms': round(min(samples), 1), 'median_ms': round(statistics.median(samples), 1), 'heavy_modules': heavy}
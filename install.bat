@@ -27,7 +27,7 @@ call venv\Scripts\activate
 :: Instalar dependências
 echo Instalando dependências...
 pip install --upgrade pip
-pip install numpy sounddevice soundfile openai requests python-dotenv git+https://github.com/openai/whisper.git pytest
+pip install numpy sounddevice soundfile aiohttp python-dotenv git+https://github.com/openai/whisper.git pytest
 
 :: Criar arquivo .env exemplo se não existir
 if not exist .env (
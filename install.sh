@@ -34,7 +34,7 @@ source venv/bin/activate
 # Instalar dependências
 echo -e "${YELLOW}Instalando dependências...${NC}"
 pip install --upgrade pip
-pip install numpy sounddevice soundfile openai requests python-dotenv git+https://github.com/openai/whisper.git pytest
+pip install numpy sounddevice soundfile aiohttp python-dotenv git+https://github.com/openai/whisper.git pytest
 
 # Criar arquivo .env exemplo se não existir
 if [ ! -f .env ]; then
@@ -16,25 +16,41 @@ import sys
 import time
 import json
 import argparse
+import threading
+import itertools
+import contextvars
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-import sounddevice as sd
-import numpy as np
-import whisper
+from importlib import import_module
+from importlib.util import find_spec
 from dotenv import load_dotenv
 
-# Tentar importar bibliotecas para OpenAI ou Ollama
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+class LazyModule:
+    """
+    Adia a importação de um módulo até o primeiro acesso a um atributo.
+    
+    Bibliotecas pesadas (whisper/torch, sounddevice, numpy, clientes de IA)
+    só são carregadas quando realmente usadas, mantendo rápida a
+    inicialização do menu e das configurações.
+    """
+    
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = import_module(self._name)
+        return getattr(self._module, attr)
+
+sd = LazyModule('sounddevice')
+np = LazyModule('numpy')
+whisper = LazyModule('whisper')
 
-try:
-    import requests
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
+# Cliente HTTP assíncrono usado pelos backends OpenAI e Ollama
+AIOHTTP_AVAILABLE = find_spec('aiohttp') is not None
+aiohttp = LazyModule('aiohttp')
 
 # Carregar variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -46,22 +62,150 @@ OUTPUT_DIR = os.getenv('OUTPUT_DIR', 'output')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
 MODEL = os.getenv('MODEL', 'gpt-3.5-turbo')
 OLLAMA_URL = os.getenv('OLLAMA_URL', 'http://localhost:11434')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')
+
+# Chamadas aos backends de IA: tempo limite (s), novas tentativas e exibição em tempo real
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '300'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+LLM_STREAM = os.getenv('LLM_STREAM', 'true').lower() in ('1', 'true', 'yes')
+
+# Ollama: tempo que o modelo fica carregado após cada uso, carga antecipada ao gravar,
+# contexto máximo e threads de CPU (0 = padrão do servidor)
+OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+OLLAMA_WARMUP = os.getenv('OLLAMA_WARMUP', 'true').lower() in ('1', 'true', 'yes')
+OLLAMA_NUM_CTX_MAX = int(os.getenv('OLLAMA_NUM_CTX_MAX', '32768'))
+OLLAMA_NUM_THREAD = int(os.getenv('OLLAMA_NUM_THREAD', '0'))
+
+# Limite de tokens por requisição e requisições simultâneas na sumarização
+SUMMARY_CHUNK_TOKENS = {
+    'openai': int(os.getenv('OPENAI_CHUNK_TOKENS', '3000')),
+    'ollama': int(os.getenv('OLLAMA_CHUNK_TOKENS', '1500')),
+}
+SUMMARY_CONCURRENCY = {
+    'openai': int(os.getenv('OPENAI_CONCURRENCY', '4')),
+    'ollama': int(os.getenv('OLLAMA_CONCURRENCY', '1')),
+}
+
+# Resumo estruturado (opcional): o modelo responde em JSON (salvo ao lado do .md) e as
+# notas de cada trecho são guardadas para reaproveitamento quando a transcrição muda
+SUMMARY_STRUCTURED = os.getenv('SUMMARY_STRUCTURED', 'false').lower() in ('1', 'true', 'yes')
 
 # Carregar modelo de linguagem para whisper
 WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'base')
 
+# Motor de transcrição (whisper, faster-whisper)
+TRANSCRIPTION_ENGINE = os.getenv('TRANSCRIPTION_ENGINE', 'whisper')
+
+# Threads de CPU (0 = padrão da biblioteca), tamanho do beam e quantização (faster-whisper)
+WHISPER_THREADS = int(os.getenv('WHISPER_THREADS', '0'))
+WHISPER_BEAM_SIZE = int(os.getenv('WHISPER_BEAM_SIZE', '1'))
+WHISPER_COMPUTE_TYPE = os.getenv('WHISPER_COMPUTE_TYPE', 'int8')
+
+# Clipes curtos decodificados juntos por passada do Whisper (0 = conforme a memória livre)
+WHISPER_BATCH_SIZE = int(os.getenv('WHISPER_BATCH_SIZE', '0'))
+
+# Detecção de fala antes da transcrição (off, energy, silero)
+VAD_MODE = os.getenv('VAD_MODE', 'off').lower()
+VAD_THRESHOLD_DB = float(os.getenv('VAD_THRESHOLD_DB', '12'))
+VAD_MIN_SILENCE = float(os.getenv('VAD_MIN_SILENCE', '0.6'))
+VAD_MIN_SPEECH = float(os.getenv('VAD_MIN_SPEECH', '0.25'))
+VAD_PADDING = float(os.getenv('VAD_PADDING', '0.2'))
+VAD_GAP = float(os.getenv('VAD_GAP', '0.3'))
+
+# Transcrição paralela de arquivos longos (processos; 0 ou 1 desativa)
+PARALLEL_WORKERS = int(os.getenv('PARALLEL_WORKERS', '0'))
+PARALLEL_CHUNK_SECONDS = float(os.getenv('PARALLEL_CHUNK_SECONDS', '120'))
+PARALLEL_OVERLAP_SECONDS = float(os.getenv('PARALLEL_OVERLAP_SECONDS', '2.0'))
+
+# Diarização: identificar os falantes (limiar de similaridade; 0 falantes = automático)
+DIARIZATION = os.getenv('DIARIZATION', 'false').lower() == 'true'
+DIARIZATION_THRESHOLD = float(os.getenv('DIARIZATION_THRESHOLD', '0.5'))
+DIARIZATION_MAX_SPEAKERS = int(os.getenv('DIARIZATION_MAX_SPEAKERS', '0'))
+
+# Dispositivo para o Whisper (cpu, cuda); vazio detecta automaticamente
+WHISPER_DEVICE = os.getenv('WHISPER_DEVICE', '')
+
+# Limite de memória (MB) para modelos Whisper mantidos em cache
+WHISPER_CACHE_MB = int(os.getenv('WHISPER_CACHE_MB', '4096'))
+
+# Formato de gravação (wav, flac, opus) e nível de compressão opcional (0 a 1)
+RECORDING_FORMAT = os.getenv('RECORDING_FORMAT', 'wav').lower()
+RECORDING_COMPRESSION = os.getenv('RECORDING_COMPRESSION', '')
+
+# Pré-processamento dos arquivos: nivelar o volume em AUDIO_TARGET_DBFS
+AUDIO_NORMALIZE = os.getenv('AUDIO_NORMALIZE', 'true').lower() in ('1', 'true', 'yes')
+AUDIO_TARGET_DBFS = float(os.getenv('AUDIO_TARGET_DBFS', '-20'))
+
+# Decodificar arquivos em blocos, transcrevendo à medida que são lidos
+STREAMING_DECODE = os.getenv('STREAMING_DECODE', 'false').lower() in ('1', 'true', 'yes')
+
+# Segundos de áudio no buffer entre captura e escrita em disco (blocos de 100 ms)
+RECORDER_BUFFER_SECONDS = float(os.getenv('RECORDER_BUFFER_SECONDS', '20'))
+
+# Transcrição ao vivo durante a gravação
+LIVE_TRANSCRIPTION = os.getenv('LIVE_TRANSCRIPTION', 'false').lower() in ('1', 'true', 'yes')
+LIVE_CHUNK_SECONDS = float(os.getenv('LIVE_CHUNK_SECONDS', '30'))
+LIVE_OVERLAP_SECONDS = float(os.getenv('LIVE_OVERLAP_SECONDS', '1.0'))
+# Trechos aguardando transcrição; além disso a gravação descarta trechos da transcrição ao vivo
+LIVE_MAX_PENDING = int(os.getenv('LIVE_MAX_PENDING', '4'))
+
+# Cache de transcrições e resumos já gerados
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(OUTPUT_DIR, '.cache'))
+CACHE_MAX_MB = int(os.getenv('CACHE_MAX_MB', '256'))
+
+# Métricas por etapa: log JSONL e arquivo opcional no formato do Prometheus (vazio = desativado)
+METRICS_LOG = os.getenv('METRICS_LOG', '')
+METRICS_PROMETHEUS = os.getenv('METRICS_PROMETHEUS', '')
+
+# Catálogo SQLite de gravações (padrão: OUTPUT_DIR/catalog.db)
+CATALOG_PATH = os.getenv('CATALOG_PATH', '')
+
+# Fila de processamento em segundo plano (padrão: OUTPUT_DIR/jobs.db)
+BACKGROUND_JOBS = os.getenv('BACKGROUND_JOBS', 'false').lower() in ('1', 'true', 'yes')
+JOB_EMBEDDED_WORKER = os.getenv('JOB_EMBEDDED_WORKER', 'true').lower() in ('1', 'true', 'yes')
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', '')
+JOB_TRANSCRIBE_WORKERS = int(os.getenv('JOB_TRANSCRIBE_WORKERS', '1'))
+JOB_SUMMARY_WORKERS = int(os.getenv('JOB_SUMMARY_WORKERS', '2'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '2'))
+
+# Servidor HTTP (subcomando serve): endereço, tamanho máximo do upload, limite de jobs
+# pendentes e agrupamento de clipes curtos em lotes para o motor de transcrição
+SERVER_HOST = os.getenv('SERVER_HOST', '127.0.0.1')
+SERVER_PORT = int(os.getenv('SERVER_PORT', '8765'))
+SERVER_MAX_UPLOAD_MB = float(os.getenv('SERVER_MAX_UPLOAD_MB', '500'))
+SERVER_QUEUE_DEPTH = int(os.getenv('SERVER_QUEUE_DEPTH', '32'))
+SERVER_CLIP_SECONDS = float(os.getenv('SERVER_CLIP_SECONDS', '30'))
+SERVER_BATCH_SIZE = int(os.getenv('SERVER_BATCH_SIZE', '8'))
+SERVER_BATCH_WAIT_MS = float(os.getenv('SERVER_BATCH_WAIT_MS', '50'))
+
+# Índice de busca (padrão: OUTPUT_DIR/search.db) e modelo de embedding para busca semântica
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', '')
+SEARCH_INDEXING = os.getenv('SEARCH_INDEXING', 'true').lower() in ('1', 'true', 'yes')
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', '')
+
+# Extensões de áudio reconhecidas na pasta de saída
+AUDIO_EXTENSIONS = (".wav", ".flac", ".opus", ".ogg")
+
+# Taxa de amostragem esperada pelo Whisper
+SAMPLE_RATE = 16000
+
+# Extensão dos arquivos gravados em cada formato
+RECORDING_EXTENSIONS = {'wav': "wav", 'flac': "flac", 'opus': "opus"}
+
 # Língua da interface
 LANGUAGE = os.getenv('LANGUAGE', 'pt')
 
-# Configurar diretório de saída
-Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
-
 # Strings de interface em diferentes idiomas
 UI_STRINGS = {
     'pt': {
         'welcome': "🎙️ Bem-vindo à Secre-Tina! 🤖\n",
-        'action_select': "Escolha a ação:\n0. Sair\n1. Nova Gravação\n2. Revisar Áudio Existente\n3. Configurações\n> ",
+        'action_select': "Escolha a ação:\n0. Sair\n1. Nova Gravação\n2. Revisar Áudio Existente\n3. Configurações\n4. Fila de Processamento\n5. Continuar Gravação Anterior\n> ",
         'new_recording': "🎙️ Nova gravação selecionada",
+        'continue_recording': "⏯️ Continuar gravação anterior selecionada",
+        'continue_from': "⏩ O áudio novo será acrescentado após {0}",
+        'transcribing_tail': "🔄 Transcrevendo apenas os {0:.0f}s novos...",
         'review_audio': "🔊 Revisão de áudio selecionada",
         'config_selected': "🔧 Configurações selecionadas",
         'exiting': "👋 Saindo da Secre-Tina. Até breve!",
@@ -69,19 +213,37 @@ UI_STRINGS = {
         'audio_not_found': "Nenhum arquivo de áudio encontrado na pasta {0}",
         'invalid_selection': "Seleção inválida. Por favor, tente novamente.",
         'selected_file': "Arquivo selecionado: {0}",
+        'search_indexed': "🔎 {0} arquivos indexados",
+        'search_no_results': "Nenhum resultado encontrado.",
+        'search_time': "{0} resultados em {1:.1f} ms",
+        'search_index_failed': "⚠️ Não foi possível indexar {0} para busca: {1}",
+        'catalog_page': "Página {0}/{1} ({2} arquivos) — ✅ resumido, 📝 transcrito, ⏳ pendente",
+        'catalog_help': "Número para selecionar, n/p para mudar de página, f [data] [meeting|diary] [pending|transcribed|done] para filtrar, Enter para voltar\n> ",
         'mode_select': "Escolha o modo:\n1. Reunião\n2. Diário\n> ",
         'meeting_mode': "📋 Modo Reunião selecionado",
         'diary_mode': "📔 Modo Diário selecionado",
-        'recording_start': "🔴 Gravação iniciada. Pressione Enter quando terminar...",
+        'recording_start': "🔴 Gravação iniciada. Pressione Enter quando terminar (p + Enter para pausar)...",
+        'recording_paused': "⏸️ Gravação pausada. Pressione Enter para retomar...",
+        'recording_resumed': "🔴 Gravação retomada.",
         'recording_stop': "⏹️ Gravação finalizada!",
+        'recording_dropped': "⚠️ {0:.1f}s de áudio descartados em {1} blocos (disco lento demais)",
+        'catalog_dropped': " ⚠️ {0:.1f}s perdidos",
+        'live_dropped': "⚠️ Transcrição ao vivo atrasada: {0:.1f}s ficam para o final da gravação",
+        'live_incomplete': "🔄 A transcrição ao vivo ficou incompleta; transcrevendo a gravação inteira...",
         'transcribing': "🔄 Transcrevendo o áudio...",
+        'vad_skipped': "🔇 {0:.0f}% de silêncio ignorado",
+        'diarization_failed': "⚠️ Falha na identificação de falantes ({0}); transcrição salva sem falantes",
         'transcript_saved': "📝 Transcrição salva em: ",
         'summarizing': "💭 Gerando resumo com IA...",
+        'summarizing_chunks': "📚 Transcrição longa: resumindo {0} trechos...",
+        'summary_chunks_reused': "♻️ {0} de {1} trechos reaproveitados do resumo anterior",
+        'summary_chunk_done': "   Trecho {0}/{1} resumido",
+        'summary_progress': "✍️ Recebendo o resumo... {0} tokens",
         'complete': "✅ Processo completo! Resumo salvo em: ",
         'error': "❌ Erro: ",
         'no_ai': "Nem OpenAI nem Ollama estão disponíveis. Verifique suas configurações.",
-        'config_menu': "\n⚙️ CONFIGURAÇÕES:\n1. Configurar OpenAI\n2. Configurar Ollama\n3. Configurar Modelo Whisper\n4. Configurar Idioma\n0. Voltar ao Menu Principal\n> ",
-        'current_config': "\n📊 Configurações Atuais:\n- Modelo IA: {0}\n- Modelo Whisper: {1}\n- Idioma: {2}\n- API OpenAI: {3}\n- URL Ollama: {4}\n",
+        'config_menu': "\n⚙️ CONFIGURAÇÕES:\n1. Configurar OpenAI\n2. Configurar Ollama\n3. Configurar Modelo Whisper\n4. Configurar Idioma\n5. Configurar Motor de Transcrição\n0. Voltar ao Menu Principal\n> ",
+        'current_config': "\n📊 Configurações Atuais:\n- Modelo IA: {0}\n- Modelo Whisper: {1}\n- Idioma: {2}\n- API OpenAI: {3}\n- URL Ollama: {4}\n- Motor de Transcrição: {5}\n",
         'config_saved': "💾 Configurações salvas com sucesso!",
         'enter_api_key': "Digite sua chave de API OpenAI (deixe em branco para manter a atual): ",
         'enter_ollama_url': "Digite a URL do servidor Ollama (deixe em branco para manter a atual): ",
@@ -90,31 +252,67 @@ UI_STRINGS = {
         'enter_language': "Escolha o idioma (pt, en, es) (deixe em branco para manter o atual): ",
         'invalid_language': "Idioma inválido. Use pt, en ou es.",
         'invalid_whisper_model': "Modelo Whisper inválido. Use tiny, base, small, medium ou large.",
+        'enter_engine': "Escolha o motor de transcrição (whisper, faster-whisper) (deixe em branco para manter o atual): ",
+        'invalid_engine': "Motor de transcrição inválido. Use whisper ou faster-whisper.",
+        'batch_start': "📦 Processando {0} arquivos de áudio...",
+        'batch_report': "\n📊 Resultado do processamento:",
+        'batch_throughput': "✅ {0}/{1} arquivos em {2:.1f}s ({3:.1f} arquivos/min, {4:.1f}x tempo real)",
+        'job_queued': "📥 Gravação adicionada à fila de processamento (job #{0})",
+        'job_done': "✅ [job #{0}] Resumo salvo em: {1}",
+        'job_failed': "❌ [job #{0}] {1}{2}",
+        'job_retry': " (nova tentativa em seguida)",
+        'job_status_header': "\n📋 Fila de processamento:",
+        'job_status_empty': "Nenhum job na fila.",
+        'jobs_pending': "⏳ {0} jobs pendentes continuarão na próxima execução.",
+        'worker_started': "⚙️ Worker iniciado ({0} transcrição, {1} resumo). Ctrl+C para parar.",
+        'server_started': "🌐 Servidor em {0} (Ctrl+C para parar)",
+        'speaker_label': "Falante",
     },
     'en': {
         'welcome': "🎙️ Welcome to Secre-Tina! 🤖\n",
-        'action_select': "Choose action:\n0. Exit\n1. New Recording\n2. Review Existing Audio\n3. Settings\n> ",
+        'action_select': "Choose action:\n0. Exit\n1. New Recording\n2. Review Existing Audio\n3. Settings\n4. Processing Queue\n5. Continue Previous Recording\n> ",
         'new_recording': "🎙️ New recording selected",
         'review_audio': "🔊 Audio review selected",
+        'continue_recording': "⏯️ Continue previous recording selected",
+        'continue_from': "⏩ New audio will be appended after {0}",
+        'transcribing_tail': "🔄 Transcribing only the new {0:.0f}s...",
         'config_selected': "🔧 Settings selected",
         'exiting': "👋 Exiting Secre-Tina. See you soon!",
         'select_audio': "Select an audio file for review in the {0} folder:\n",
         'audio_not_found': "No audio files found in the {0} folder",
         'invalid_selection': "Invalid selection. Please try again.",
         'selected_file': "Selected file: {0}",
+        'search_indexed': "🔎 {0} files indexed",
+        'search_no_results': "No results found.",
+        'search_time': "{0} results in {1:.1f} ms",
+        'search_index_failed': "⚠️ Could not index {0} for search: {1}",
+        'catalog_page': "Page {0}/{1} ({2} files) — ✅ summarized, 📝 transcribed, ⏳ pending",
+        'catalog_help': "Number to select, n/p to change page, f [date] [meeting|diary] [pending|transcribed|done] to filter, Enter to go back\n> ",
         'mode_select': "Choose mode:\n1. Meeting\n2. Diary\n> ",
         'meeting_mode': "📋 Meeting Mode selected",
         'diary_mode': "📔 Diary Mode selected",
-        'recording_start': "🔴 Recording started. Press Enter when finished...",
+        'recording_start': "🔴 Recording started. Press Enter when finished (p + Enter to pause)...",
+        'recording_paused': "⏸️ Recording paused. Press Enter to resume...",
+        'recording_resumed': "🔴 Recording resumed.",
         'recording_stop': "⏹️ Recording stopped!",
+        'recording_dropped': "⚠️ {0:.1f}s of audio dropped in {1} blocks (disk too slow)",
+        'catalog_dropped': " ⚠️ {0:.1f}s lost",
+        'live_dropped': "⚠️ Live transcription is behind: {0:.1f}s left for the end of the recording",
+        'live_incomplete': "🔄 Live transcription is incomplete; transcribing the whole recording...",
         'transcribing': "🔄 Transcribing audio...",
+        'vad_skipped': "🔇 {0:.0f}% silence skipped",
+        'diarization_failed': "⚠️ Speaker identification failed ({0}); transcript saved without speakers",
         'transcript_saved': "📝 Transcript saved at: ",
         'summarizing': "💭 Generating AI summary...",
+        'summarizing_chunks': "📚 Long transcript: summarizing {0} chunks...",
+        'summary_chunks_reused': "♻️ {0} of {1} chunks reused from the previous summary",
+        'summary_chunk_done': "   Chunk {0}/{1} summarized",
+        'summary_progress': "✍️ Receiving the summary... {0} tokens",
         'complete': "✅ Process complete! Summary saved at: ",
         'error': "❌ Error: ",
         'no_ai': "Neither OpenAI nor Ollama are available. Check your settings.",
-        'config_menu': "\n⚙️ SETTINGS:\n1. Configure OpenAI\n2. Configure Ollama\n3. Configure Whisper Model\n4. Configure Language\n0. Back to Main Menu\n> ",
-        'current_config': "\n📊 Current Settings:\n- AI Model: {0}\n- Whisper Model: {1}\n- Language: {2}\n- OpenAI API: {3}\n- Ollama URL: {4}\n",
+        'config_menu': "\n⚙️ SETTINGS:\n1. Configure OpenAI\n2. Configure Ollama\n3. Configure Whisper Model\n4. Configure Language\n5. Configure Transcription Engine\n0. Back to Main Menu\n> ",
+        'current_config': "\n📊 Current Settings:\n- AI Model: {0}\n- Whisper Model: {1}\n- Language: {2}\n- OpenAI API: {3}\n- Ollama URL: {4}\n- Transcription Engine: {5}\n",
         'config_saved': "💾 Settings saved successfully!",
         'enter_api_key': "Enter your OpenAI API key (leave blank to keep current): ",
         'enter_ollama_url': "Enter Ollama server URL (leave blank to keep current): ",
@@ -123,31 +321,67 @@ UI_STRINGS = {
         'enter_language': "Choose language (pt, en, es) (leave blank to keep current): ",
         'invalid_language': "Invalid language. Use pt, en, or es.",
         'invalid_whisper_model': "Invalid Whisper model. Use tiny, base, small, medium, or large.",
+        'enter_engine': "Choose transcription engine (whisper, faster-whisper) (leave blank to keep current): ",
+        'invalid_engine': "Invalid transcription engine. Use whisper or faster-whisper.",
+        'batch_start': "📦 Processing {0} audio files...",
+        'batch_report': "\n📊 Processing results:",
+        'batch_throughput': "✅ {0}/{1} files in {2:.1f}s ({3:.1f} files/min, {4:.1f}x real time)",
+        'job_queued': "📥 Recording added to the processing queue (job #{0})",
+        'job_done': "✅ [job #{0}] Summary saved at: {1}",
+        'job_failed': "❌ [job #{0}] {1}{2}",
+        'job_retry': " (will retry)",
+        'job_status_header': "\n📋 Processing queue:",
+        'job_status_empty': "No jobs in the queue.",
+        'jobs_pending': "⏳ {0} pending jobs will resume on the next run.",
+        'worker_started': "⚙️ Worker started ({0} transcription, {1} summary). Ctrl+C to stop.",
+        'server_started': "🌐 Server at {0} (Ctrl+C to stop)",
+        'speaker_label': "Speaker",
     },
     'es': {
         'welcome': "🎙️ ¡Bienvenido a Secre-Tina! 🤖\n",
-        'action_select': "Elija la acción:\n0. Salir\n1. Nueva Grabación\n2. Revisar Audio Existente\n3. Configuración\n> ",
+        'action_select': "Elija la acción:\n0. Salir\n1. Nueva Grabación\n2. Revisar Audio Existente\n3. Configuración\n4. Cola de Procesamiento\n5. Continuar Grabación Anterior\n> ",
         'new_recording': "🎙️ Nueva grabación seleccionada",
         'review_audio': "🔊 Revisión de audio seleccionada",
+        'continue_recording': "⏯️ Continuar grabación anterior seleccionada",
+        'continue_from': "⏩ El audio nuevo se añadirá después de {0}",
+        'transcribing_tail': "🔄 Transcribiendo solo los {0:.0f}s nuevos...",
         'config_selected': "🔧 Configuración seleccionada",
         'exiting': "👋 Saliendo de Secre-Tina. ¡Hasta pronto!",
         'select_audio': "Seleccione un archivo de audio para revisar en la carpeta {0}:\n",
         'audio_not_found': "No se encontraron archivos de audio en la carpeta {0}",
         'invalid_selection': "Selección inválida. Por favor, inténtelo de nuevo.",
         'selected_file': "Archivo seleccionado: {0}",
+        'search_indexed': "🔎 {0} archivos indexados",
+        'search_no_results': "No se encontraron resultados.",
+        'search_time': "{0} resultados en {1:.1f} ms",
+        'search_index_failed': "⚠️ No se pudo indexar {0} para búsqueda: {1}",
+        'catalog_page': "Página {0}/{1} ({2} archivos) — ✅ resumido, 📝 transcrito, ⏳ pendiente",
+        'catalog_help': "Número para seleccionar, n/p para cambiar de página, f [fecha] [meeting|diary] [pending|transcribed|done] para filtrar, Enter para volver\n> ",
         'mode_select': "Elija el modo:\n1. Reunión\n2. Diario\n> ",
         'meeting_mode': "📋 Modo Reunión seleccionado",
         'diary_mode': "📔 Modo Diario seleccionado",
-        'recording_start': "🔴 Grabación iniciada. Presione Enter cuando termine...",
+        'recording_start': "🔴 Grabación iniciada. Presione Enter cuando termine (p + Enter para pausar)...",
+        'recording_paused': "⏸️ Grabación en pausa. Presione Enter para continuar...",
+        'recording_resumed': "🔴 Grabación reanudada.",
         'recording_stop': "⏹️ ¡Grabación finalizada!",
+        'recording_dropped': "⚠️ {0:.1f}s de audio descartados en {1} bloques (disco demasiado lento)",
+        'catalog_dropped': " ⚠️ {0:.1f}s perdidos",
+        'live_dropped': "⚠️ Transcripción en vivo atrasada: {0:.1f}s quedan para el final de la grabación",
+        'live_incomplete': "🔄 La transcripción en vivo quedó incompleta; transcribiendo la grabación entera...",
         'transcribing': "🔄 Transcribiendo el audio...",
+        'vad_skipped': "🔇 {0:.0f}% de silencio omitido",
+        'diarization_failed': "⚠️ Falló la identificación de hablantes ({0}); transcripción guardada sin hablantes",
         'transcript_saved': "📝 Transcripción guardada en: ",
         'summarizing': "💭 Generando resumen con IA...",
+        'summarizing_chunks': "📚 Transcripción larga: resumiendo {0} fragmentos...",
+        'summary_chunks_reused': "♻️ {0} de {1} fragmentos reutilizados del resumen anterior",
+        'summary_chunk_done': "   Fragmento {0}/{1} resumido",
+        'summary_progress': "✍️ Recibiendo el resumen... {0} tokens",
         'complete': "✅ ¡Proceso completo! Resumen guardado en: ",
         'error': "❌ Error: ",
         'no_ai': "Ni OpenAI ni Ollama están disponibles. Verifique su configuración.",
-        'config_menu': "\n⚙️ CONFIGURACIÓN:\n1. Configurar OpenAI\n2. Configurar Ollama\n3. Configurar Modelo Whisper\n4. Configurar Idioma\n0. Volver al Menú Principal\n> ",
-        'current_config': "\n📊 Configuración Actual:\n- Modelo IA: {0}\n- Modelo Whisper: {1}\n- Idioma: {2}\n- API OpenAI: {3}\n- URL Ollama: {4}\n",
+        'config_menu': "\n⚙️ CONFIGURACIÓN:\n1. Configurar OpenAI\n2. Configurar Ollama\n3. Configurar Modelo Whisper\n4. Configurar Idioma\n5. Configurar Motor de Transcripción\n0. Volver al Menú Principal\n> ",
+        'current_config': "\n📊 Configuración Actual:\n- Modelo IA: {0}\n- Modelo Whisper: {1}\n- Idioma: {2}\n- API OpenAI: {3}\n- URL Ollama: {4}\n- Motor de Transcripción: {5}\n",
         'config_saved': "💾 ¡Configuración guardada con éxito!",
         'enter_api_key': "Introduzca su clave API de OpenAI (deje en blanco para mantener la actual): ",
         'enter_ollama_url': "Introduzca la URL del servidor Ollama (deje en blanco para mantener la actual): ",
@@ -156,6 +390,21 @@ UI_STRINGS = {
         'enter_language': "Elija el idioma (pt, en, es) (deje en blanco para mantener el actual): ",
         'invalid_language': "Idioma no válido. Utilice pt, en o es.",
         'invalid_whisper_model': "Modelo Whisper no válido. Utilice tiny, base, small, medium o large.",
+        'enter_engine': "Elija el motor de transcripción (whisper, faster-whisper) (deje en blanco para mantener el actual): ",
+        'invalid_engine': "Motor de transcripción no válido. Utilice whisper o faster-whisper.",
+        'batch_start': "📦 Procesando {0} archivos de audio...",
+        'batch_report': "\n📊 Resultado del procesamiento:",
+        'batch_throughput': "✅ {0}/{1} archivos en {2:.1f}s ({3:.1f} archivos/min, {4:.1f}x tiempo real)",
+        'job_queued': "📥 Grabación añadida a la cola de procesamiento (job #{0})",
+        'job_done': "✅ [job #{0}] Resumen guardado en: {1}",
+        'job_failed': "❌ [job #{0}] {1}{2}",
+        'job_retry': " (se reintentará)",
+        'job_status_header': "\n📋 Cola de procesamiento:",
+        'job_status_empty': "No hay jobs en la cola.",
+        'jobs_pending': "⏳ {0} jobs pendientes continuarán en la próxima ejecución.",
+        'worker_started': "⚙️ Worker iniciado ({0} transcripción, {1} resumen). Ctrl+C para detener.",
+        'server_started': "🌐 Servidor en {0} (Ctrl+C para detener)",
+        'speaker_label': "Hablante",
     }
 }
 
@@ -164,207 +413,2991 @@ if LANGUAGE not in UI_STRINGS:
     LANGUAGE = 'pt'
 ui = UI_STRINGS[LANGUAGE]
 
-def record_audio(timestamp, fs=16000):
+class StreamingWavWriter:
     """
-    Grava áudio do microfone até que o usuário pressione Enter.
-    
-    Args:
-        timestamp: Timestamp para nomear o arquivo
-        fs: Taxa de amostragem (padrão: 16000 Hz)
+    Escreve um arquivo WAV (float32) de forma incremental.
     
-    Returns:
-        Caminho para o arquivo de áudio temporário
+    O cabeçalho é atualizado periodicamente com o tamanho dos dados já
+    gravados, de modo que uma interrupção inesperada deixa um arquivo
+    legível (ou recuperável com repair_wav_header). Com append=True, um
+    arquivo gravado anteriormente por esta classe é continuado no lugar.
     """
-    print(ui['recording_start'])
     
-    # Iniciar gravação
-    frames = []
+    HEADER_SIZE = 58
     
-    def callback(indata, frame_count, time_info, status):
-        frames.append(indata.copy())
-        return None  # Retornar None em vez de sd.paContinue para continuar a gravação
+    def __init__(self, path, samplerate, channels=1, header_interval=1.0, append=False):
+        self.path = path
+        self.samplerate = samplerate
+        self.channels = channels
+        self.block_align = 4 * channels
+        self.frames_written = 0
+        self._frames_since_patch = 0
+        self._patch_every = max(1, int(samplerate * header_interval))
+        if append and os.path.exists(path):
+            self._file = self._open_existing()
+        else:
+            self._file = open(path, 'wb')
+        self._write_header()
     
-    stream = sd.InputStream(samplerate=fs, channels=1, callback=callback)
-    stream.start()
+    def _open_existing(self):
+        """Abre um WAV existente para continuar a gravação a partir do fim dos dados"""
+        import struct
+        repair_wav_header(self.path)
+        f = open(self.path, 'r+b')
+        header = f.read(self.HEADER_SIZE)
+        if (len(header) < self.HEADER_SIZE or header[:4] != b'RIFF' or header[12:16] != b'fmt '
+                or header[50:54] != b'data'
+                or struct.unpack('<HHI', header[20:28]) != (3, self.channels, self.samplerate)):
+            f.close()
+            raise Exception(f"Formato de {self.path} incompatível com a gravação atual")
+        self.frames_written = (os.path.getsize(self.path) - self.HEADER_SIZE) // self.block_align
+        # Descartar um quadro incompleto deixado por uma interrupção
+        f.truncate(self.HEADER_SIZE + self.frames_written * self.block_align)
+        return f
     
-    # Esperar o usuário finalizar
-    input()
+    def _write_header(self):
+        """Escreve (ou reescreve) o cabeçalho RIFF no início do arquivo"""
+        import struct
+        data_size = self.frames_written * self.block_align
+        header = b''.join([
+            b'RIFF', struct.pack('<I', self.HEADER_SIZE - 8 + data_size), b'WAVE',
+            b'fmt ', struct.pack('<IHHIIHHH', 18, 3, self.channels, self.samplerate,
+                                 self.samplerate * self.block_align, self.block_align, 32, 0),
+            b'fact', struct.pack('<II', 4, self.frames_written),
+            b'data', struct.pack('<I', data_size),
+        ])
+        self._file.seek(0)
+        self._file.write(header)
+        self._file.seek(0, os.SEEK_END)
     
-    # Parar gravação
-    stream.stop()
-    stream.close()
-    print(ui['recording_stop'])
+    def write(self, data):
+        """Acrescenta um bloco de amostras (frames x canais) ao arquivo"""
+        data = np.asarray(data, dtype='<f4')
+        self._file.write(data.tobytes())
+        frames = len(data)
+        self.frames_written += frames
+        self._frames_since_patch += frames
+        if self._frames_since_patch >= self._patch_every:
+            self._write_header()
+            self._file.flush()
+            self._frames_since_patch = 0
+    
+    def close(self):
+        """Finaliza o cabeçalho e fecha o arquivo"""
+        if self._file.closed:
+            return
+        self._write_header()
+        self._file.close()
+
+def repair_wav_header(path):
+    """
+    Corrige o cabeçalho de um WAV cuja gravação foi interrompida.
     
-    # Salvar em arquivo temporário
-    audio_data = np.concatenate(frames, axis=0)
-    audio_file = os.path.join(OUTPUT_DIR, f"recording_{timestamp}.wav")
+    Os tamanhos dos blocos RIFF, fact e data são recalculados a partir do
+    tamanho real do arquivo.
     
-    # Usar scipy para salvar o arquivo de áudio (mais confiável em ambientes variados)
-    try:
-        from scipy.io import wavfile
-        wavfile.write(audio_file, fs, audio_data)
-    except ImportError:
-        # Tentar soundfile como fallback se scipy não estiver disponível
-        try:
-            import soundfile as sf
-            sf.write(audio_file, audio_data, fs)
-        except ImportError as e:
-            print(f"\n\nERRO: Não foi possível importar nem scipy nem soundfile para salvar o áudio.")
-            print(f"Por favor, instale scipy: pip install scipy")
-            raise
+    Args:
+        path: Caminho para o arquivo WAV
     
-    return audio_file
+    Returns:
+        True se o cabeçalho foi alterado
+    """
+    import struct
+    file_size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:] != b'WAVE':
+            return False
+        riff_size = struct.unpack('<I', header[4:8])[0]
+        block_align = None
+        fact_pos = None
+        changed = False
+        while True:
+            chunk_pos = f.tell()
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return False
+            chunk_id, chunk_size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                block_align = struct.unpack('<H', fmt[12:14])[0]
+                continue
+            if chunk_id == b'fact':
+                fact_pos = chunk_pos + 8
+            if chunk_id == b'data':
+                data_size = file_size - (chunk_pos + 8)
+                if block_align:
+                    data_size -= data_size % block_align
+                if data_size != chunk_size:
+                    f.seek(chunk_pos + 4)
+                    f.write(struct.pack('<I', data_size))
+                    changed = True
+                if fact_pos is not None and block_align:
+                    f.seek(fact_pos)
+                    f.write(struct.pack('<I', data_size // block_align))
+                break
+            f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+        if riff_size != file_size - 8:
+            f.seek(4)
+            f.write(struct.pack('<I', file_size - 8))
+            changed = True
+    return changed
 
-def transcribe_audio(audio_file):
+def open_audio_writer(path, fs, channels=1, append=False):
     """
-    Transcreve o áudio usando o modelo Whisper.
+    Abre um escritor incremental para o formato configurado.
     
     Args:
-        audio_file: Caminho para o arquivo de áudio
+        path: Caminho do arquivo (a extensão define o formato)
+        fs: Taxa de amostragem
+        channels: Número de canais
+        append: Continuar um arquivo existente em vez de sobrescrevê-lo
     
     Returns:
-        Texto transcrito
+        Objeto com métodos write() e close()
+    """
+    if append and os.path.exists(path) and path.endswith((".flac", ".opus")):
+        return AppendingAudioWriter(path, fs, channels)
+    if path.endswith((".flac", ".opus")):
+        # Quadros FLAC e páginas Ogg são independentes; um arquivo truncado continua legível
+        import soundfile as sf
+        options = {}
+        if RECORDING_COMPRESSION:
+            options['compression_level'] = float(RECORDING_COMPRESSION)
+        if path.endswith(".flac"):
+            return sf.SoundFile(path, mode='w', samplerate=fs, channels=channels,
+                                format='FLAC', subtype='PCM_16', **options)
+        return sf.SoundFile(path, mode='w', samplerate=fs, channels=channels,
+                            format='OGG', subtype='OPUS', **options)
+    return StreamingWavWriter(path, fs, channels, append=append)
+
+class AppendingAudioWriter:
     """
-    print(ui['transcribing'])
+    Continua um arquivo FLAC ou Opus, que o libsndfile não abre para escrita.
     
-    # Carregar modelo Whisper
-    model = whisper.load_model(WHISPER_MODEL)
+    O áudio novo é gravado incrementalmente em um arquivo .part ao lado do
+    original; ao fechar, original e continuação são copiados bloco a bloco
+    para um novo arquivo, que substitui o original. Se a gravação for
+    interrompida, o original fica intacto e o .part pode ser recuperado.
+    """
+    
+    def __init__(self, path, fs, channels=1):
+        import soundfile as sf
+        if sf.info(path).samplerate != fs:
+            raise Exception(f"Formato de {path} incompatível com a gravação atual")
+        self.path = path
+        self.fs = fs
+        self.channels = channels
+        base, extension = os.path.splitext(path)
+        self.part_path = f"{base}.part{extension}"
+        self._writer = open_audio_writer(self.part_path, fs, channels)
     
-    # Transcrever
-    result = model.transcribe(audio_file, language=LANGUAGE)
+    def write(self, data):
+        self._writer.write(data)
     
-    return result["text"]
+    def close(self):
+        """Fecha a continuação e a junta ao arquivo original"""
+        import soundfile as sf
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+        base, extension = os.path.splitext(self.path)
+        merged_path = f"{base}.merge{extension}"
+        writer = open_audio_writer(merged_path, self.fs, self.channels)
+        try:
+            for source in (self.path, self.part_path):
+                with sf.SoundFile(source) as f:
+                    for block in f.blocks(blocksize=self.fs * 30, dtype='float32', always_2d=True):
+                        writer.write(block)
+        finally:
+            writer.close()
+        os.replace(merged_path, self.path)
+        os.remove(self.part_path)
 
-def generate_summary(text, mode):
+def wav_memmap(path):
     """
-    Gera um resumo do texto transcrito usando IA.
+    Mapeia na memória as amostras de um WAV PCM de 16/32 bits ou float32.
     
     Args:
-        text: Texto transcrito
-        mode: Modo (reunião ou diário)
+        path: Caminho do arquivo WAV
     
     Returns:
-        Resumo gerado
+        Tupla (array somente leitura com forma (quadros, canais), taxa de
+        amostragem), ou None se o formato não puder ser mapeado
+    """
+    import struct
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != b'RIFF' or header[8:] != b'WAVE':
+                return None
+            fmt = None
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    return None
+                chunk_id, chunk_size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+                if chunk_id == b'fmt ':
+                    fmt = f.read(chunk_size)
+                    if chunk_size & 1:
+                        f.seek(1, os.SEEK_CUR)
+                    continue
+                if chunk_id == b'data':
+                    offset, data_size = f.tell(), chunk_size
+                    break
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+    except OSError:
+        return None
+    if fmt is None or len(fmt) < 16:
+        return None
+    tag, channels, fs = struct.unpack('<HHI', fmt[:8])
+    bits = struct.unpack('<H', fmt[14:16])[0]
+    if tag == 0xFFFE and len(fmt) >= 26:
+        # WAVE_FORMAT_EXTENSIBLE: o formato real está no subformato
+        tag = struct.unpack('<H', fmt[24:26])[0]
+    dtype = {(1, 16): '<i2', (1, 32): '<i4', (3, 32): '<f4'}.get((tag, bits))
+    if dtype is None or channels == 0:
+        return None
+    frame_bytes = channels * bits // 8
+    # Gravações interrompidas podem ter o tamanho do bloco data desatualizado
+    available = os.path.getsize(path) - offset
+    frames = (data_size if 0 < data_size <= available else available) // frame_bytes
+    if frames <= 0:
+        return np.zeros((0, channels), dtype=np.float32), fs
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(frames, channels)), fs
+
+def audio_info(path):
     """
-    print(ui['summarizing'])
+    Taxa de amostragem e número de quadros de um arquivo de áudio.
     
-    # Determinar o tipo de prompt baseado no modo
-    if mode == "meeting":
-        prompt = get_meeting_prompt(text)
-    else:
-        prompt = get_diary_prompt(text)
+    Returns:
+        Tupla (taxa, quadros), ou None se o arquivo não puder ser lido sem o ffmpeg
+    """
+    mapped = wav_memmap(path)
+    if mapped is not None:
+        return mapped[1], len(mapped[0])
+    try:
+        import soundfile as sf
+        info = sf.info(path)
+    except Exception:
+        return None
+    return info.samplerate, info.frames
+
+def iter_audio_blocks(path, block_seconds=30, start_seconds=0.0):
+    """
+    Lê um arquivo de áudio em blocos mono float32, sem carregá-lo inteiro.
     
-    # Tentar usar OpenAI
-    if OPENAI_AVAILABLE and OPENAI_API_KEY:
-        openai.api_key = OPENAI_API_KEY
-        response = openai.ChatCompletion.create(
-            model=MODEL,
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": text}
-            ],
-            temperature=0.7,
-        )
-        return response.choices[0].message.content
+    WAVs PCM são mapeados na memória; os demais formatos são decodificados
+    bloco a bloco pelo libsndfile.
     
-    # Tentar usar Ollama como alternativa
-    elif OLLAMA_AVAILABLE:
-        response = requests.post(
-            f"{OLLAMA_URL}/api/generate",
-            json={
-                "model": MODEL,
-                "prompt": f"{prompt}\n\n{text}",
-                "stream": False
-            }
-        )
-        if response.status_code == 200:
-            return response.json().get("response", "")
-        else:
-            raise Exception(f"Erro ao chamar Ollama: {response.status_code}")
+    Args:
+        path: Caminho do arquivo (WAV, FLAC, Ogg/Opus ou outro formato do libsndfile)
+        block_seconds: Duração de cada bloco
+        start_seconds: Posição inicial da leitura
     
-    else:
-        raise Exception(ui['no_ai'])
+    Yields:
+        Blocos de amostras na taxa original do arquivo
+    """
+    mapped = wav_memmap(path)
+    if mapped is not None:
+        data, fs = mapped
+        scale = {np.dtype('<i2'): 1 / 32768, np.dtype('<i4'): 1 / 2147483648}.get(data.dtype)
+        size = int(block_seconds * fs)
+        for start in range(int(start_seconds * fs), len(data), size):
+            block = data[start:start + size]
+            block = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0].astype(np.float32)
+            if scale is not None:
+                block *= scale
+            yield block
+        return
+    
+    import soundfile as sf
+    with sf.SoundFile(path) as f:
+        if start_seconds > 0:
+            f.seek(min(int(start_seconds * f.samplerate), f.frames))
+        for block in f.blocks(blocksize=int(block_seconds * f.samplerate), dtype='float32', always_2d=True):
+            yield block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
 
-def get_meeting_prompt(text):
-    """Retorna o prompt para modo reunião no idioma correto"""
-    if LANGUAGE == 'pt':
-        return """
-        Você é um assistente especializado em resumir reuniões. 
-        Com base na transcrição fornecida, crie um resumo estruturado em formato Markdown com as seguintes seções:
-        
-        # Resumo de Reunião
-        
-        ## Participantes
-        (Liste os nomes mencionados)
-        
-        ## Pauta
-        (Identifique os principais tópicos discutidos)
+class PolyphaseResampler:
+    """
+    Reamostragem racional em blocos (filtro polifásico com janela de Kaiser).
+    
+    A taxa de saída é fs_out = fs_in * up / down. Cada amostra de saída é o
+    produto de uma fase do filtro pelas amostras de entrada vizinhas; as
+    saídas de um bloco inteiro são calculadas com um produto matriz-vetor
+    por fase, e o final de cada bloco fica guardado para o seguinte, de
+    modo que o resultado não depende do tamanho dos blocos.
+    """
+    
+    def __init__(self, fs_in, fs_out, zero_crossings=16, beta=8.0):
+        import math
+        g = math.gcd(int(fs_in), int(fs_out))
+        self.up, self.down = int(fs_out) // g, int(fs_in) // g
+        factor = max(self.up, self.down)
         
-        ## Pontos Principais
-        (Resuma os pontos-chave de cada tópico)
+        # Filtro passa-baixas na taxa intermediária (fs_in * up), com corte na menor Nyquist
+        half = zero_crossings * factor
+        n = np.arange(-half, half + 1)
+        h = np.sinc(n / factor) * np.kaiser(2 * half + 1, beta) * (self.up / factor)
+        self.taps = -(-len(h) // self.up)
+        h = np.concatenate([h, np.zeros(self.taps * self.up - len(h))])
+        # phases[p, k] = h[p + k * up]
+        self.phases = h.reshape(self.taps, self.up).T.astype(np.float32)
+        self._reversed = np.ascontiguousarray(self.phases[:, ::-1])
+        self.center = half
         
-        ## Decisões
-        (Liste as decisões tomadas)
+        self._buffer = np.zeros(self.taps, dtype=np.float32)
+        self._buffer_start = -self.taps
+        self._next = 0
+        self._received = 0
+    
+    def _produce(self, end):
+        """Calcula as saídas cujas amostras de entrada já estão no buffer"""
+        from numpy.lib.stride_tricks import as_strided
+        available = self._buffer_start + len(self._buffer)
+        last = (available * self.up - self.center + self.down - 1) // self.down
+        if end is not None:
+            last = min(last, end)
+        if last <= self._next:
+            return np.zeros(0, dtype=np.float32)
+        out = np.empty(last - self._next, dtype=np.float32)
+        buffer = np.ascontiguousarray(self._buffer)
         
-        ## Ações
-        (Liste as tarefas atribuídas e prazos)
+        # As saídas n, n + up, n + 2*up, ... usam a mesma fase do filtro e janelas de
+        # entrada que avançam de down em down amostras: cada grupo vira um produto
+        # matriz-vetor sobre uma visão do buffer, sem copiar as janelas
+        for r in range(min(self.up, len(out))):
+            n = self._next + r
+            position = n * self.down + self.center
+            first = position // self.up - self._buffer_start - (self.taps - 1)
+            rows = len(range(r, len(out), self.up))
+            windows = as_strided(buffer[first:], shape=(rows, self.taps),
+                                 strides=(self.down * buffer.itemsize, buffer.itemsize), writeable=False)
+            out[r::self.up] = windows @ self._reversed[position % self.up]
+        self._next = last
         
-        ## Próximos Passos
-        (Indique encaminhamentos e planejamento futuro)
+        # Descartar as amostras que nenhuma saída futura usa
+        keep_from = (self._next * self.down + self.center) // self.up - self.taps + 1 - self._buffer_start
+        if keep_from > 0:
+            self._buffer = self._buffer[keep_from:]
+            self._buffer_start += keep_from
+        return out
+    
+    def process(self, block):
         """
-    elif LANGUAGE == 'en':
-        return """
-        You are an assistant specialized in summarizing meetings.
-        Based on the provided transcript, create a structured summary in Markdown format with the following sections:
-        
-        # Meeting Summary
-        
-        ## Participants
-        (List the names mentioned)
-        
-        ## Agenda
-        (Identify the main topics discussed)
+        Reamostra um bloco.
         
-        ## Key Points
-        (Summarize the key points of each topic)
-        
-        ## Decisions
-        (List the decisions made)
-        
-        ## Actions
-        (List the assigned tasks and deadlines)
+        Args:
+            block: Amostras mono float32 na taxa de entrada
         
-        ## Next Steps
-        (Indicate follow-ups and future planning)
+        Returns:
+            Amostras disponíveis na taxa de saída (o atraso do filtro fica no buffer)
         """
-    else:  # 'es'
-        return """
-        Eres un asistente especializado en resumir reuniones.
-        Basado en la transcripción proporcionada, crea un resumen estructurado en formato Markdown con las siguientes secciones:
-        
-        # Resumen de Reunión
+        self._received += len(block)
+        self._buffer = np.concatenate([self._buffer, np.asarray(block, dtype=np.float32)])
+        return self._produce(None)
+    
+    def flush(self):
+        """Completa a saída com as últimas amostras guardadas no buffer"""
+        total = -(-self._received * self.up // self.down)
+        self._buffer = np.concatenate([self._buffer, np.zeros(self.taps + self.center // self.up + 1, dtype=np.float32)])
+        return self._produce(total)
+
+class LoudnessMeter:
+    """
+    Mede o nível de um sinal bloco a bloco, com janelas de 400 ms.
+    
+    Segue o esquema de gating da ITU-R BS.1770 (portão absoluto de -70 dB e
+    relativo de -10 dB), sem o filtro de ponderação K, o que basta para
+    igualar o volume de gravações de fala.
+    """
+    
+    def __init__(self, fs):
+        self.window = int(0.4 * fs)
+        self.peak = 0.0
+        self._energies = []
+        self._rest = np.zeros(0, dtype=np.float32)
+    
+    def add(self, block):
+        if len(block):
+            self.peak = max(self.peak, float(np.max(np.abs(block))))
+        block = np.concatenate([self._rest, block])
+        count = len(block) // self.window
+        if count:
+            frames = block[:count * self.window].reshape(count, self.window)
+            self._energies.append(np.einsum('ij,ij->i', frames, frames) / self.window)
+        self._rest = block[count * self.window:]
+    
+    def loudness_db(self):
+        """
+        Returns:
+            Nível em dBFS dos trechos acima dos portões, ou None se o sinal for silêncio
+        """
+        if not self._energies:
+            return None
+        energies = np.concatenate(self._energies)
+        energies = energies[energies > 10 ** (-70 / 10)]
+        if not len(energies):
+            return None
+        relative = 10 * np.log10(np.mean(energies)) - 10
+        gated = energies[energies > 10 ** (relative / 10)]
+        return float(10 * np.log10(np.mean(gated)))
+
+def iter_preprocessed_blocks(path, meter=None, block_seconds=30, start_seconds=0.0):
+    """
+    Converte um arquivo qualquer para mono float32 a 16 kHz, bloco a bloco.
+    
+    Cada bloco é reduzido a mono, tem o nível DC removido (média do bloco,
+    interpolada linearmente a partir da do bloco anterior) e é reamostrado
+    pelo filtro polifásico.
+    
+    Args:
+        path: Caminho do arquivo de áudio
+        meter: LoudnessMeter opcional alimentado com a saída
+        block_seconds: Duração dos blocos lidos do arquivo
+        start_seconds: Posição inicial da leitura
+    
+    Yields:
+        Blocos de amostras a 16 kHz
+    """
+    fs, _ = audio_info(path)
+    resampler = PolyphaseResampler(fs, SAMPLE_RATE) if fs != SAMPLE_RATE else None
+    dc = None
+    for block in iter_audio_blocks(path, block_seconds, start_seconds):
+        if not len(block):
+            continue
+        mean = float(block.mean())
+        block = block - np.linspace(mean if dc is None else dc, mean, len(block), dtype=np.float32)
+        dc = mean
+        if resampler is not None:
+            block = resampler.process(block)
+        if meter is not None:
+            meter.add(block)
+        yield block
+    if resampler is not None:
+        block = resampler.flush()
+        if meter is not None:
+            meter.add(block)
+        yield block
+
+def normalize_loudness(audio, meter, target_db=None):
+    """
+    Ajusta o volume no lugar para o nível desejado, sem ultrapassar o pico de 0 dBFS.
+    
+    Args:
+        audio: Amostras float32 (alteradas no lugar)
+        meter: LoudnessMeter que mediu as amostras
+        target_db: Nível desejado em dBFS (padrão: AUDIO_TARGET_DBFS)
+    
+    Returns:
+        Ganho aplicado, em dB
+    """
+    loudness = meter.loudness_db()
+    if loudness is None:
+        return 0.0
+    gain_db = min((AUDIO_TARGET_DBFS if target_db is None else target_db) - loudness, 30.0)
+    if meter.peak > 0:
+        gain_db = min(gain_db, 20 * np.log10(0.99 / meter.peak))
+    audio *= np.float32(10 ** (gain_db / 20))
+    return float(gain_db)
+
+def is_streamable(audio_file):
+    """
+    Verifica se o arquivo pode ser decodificado em blocos, sem o ffmpeg.
+    
+    Args:
+        audio_file: Caminho do arquivo ou amostras já decodificadas
+    
+    Returns:
+        True se o arquivo é um WAV PCM ou um formato lido pelo libsndfile
+    """
+    if not isinstance(audio_file, (str, os.PathLike)):
+        return False
+    return audio_info(audio_file) is not None
+
+def load_audio(path, start_seconds=0.0):
+    """
+    Decodifica um arquivo de áudio para amostras mono float32 a 16 kHz.
+    
+    Arquivos WAV e formatos do libsndfile passam pelo pré-processamento em
+    blocos (mono, remoção de DC, reamostragem) direto para um array
+    pré-alocado, sem subprocesso; os demais usam o ffmpeg do Whisper. Com
+    AUDIO_NORMALIZE, o volume é ajustado para AUDIO_TARGET_DBFS.
+    
+    Args:
+        path: Caminho do arquivo de áudio
+        start_seconds: Decodificar apenas a partir desta posição
+    
+    Returns:
+        Array float32 com as amostras
+    """
+    with metrics.span("decode", file=os.path.basename(path)) as span:
+        info = audio_info(path)
+        meter = LoudnessMeter(SAMPLE_RATE)
+        if info is None:
+            audio = whisper.load_audio(path)[int(start_seconds * SAMPLE_RATE):]
+            meter.add(audio)
+        else:
+            fs, frames = info
+            frames = max(0, frames - int(start_seconds * fs))
+            audio = np.empty(-(-frames * SAMPLE_RATE // fs) + 1, dtype=np.float32)
+            position = 0
+            for block in iter_preprocessed_blocks(path, meter, start_seconds=start_seconds):
+                audio[position:position + len(block)] = block
+                position += len(block)
+            audio = audio[:position]
+        if AUDIO_NORMALIZE:
+            span.set(gain_db=normalize_loudness(audio, meter))
+        span.set(audio_seconds=len(audio) / SAMPLE_RATE, source_rate=info[0] if info else None)
+    return audio
+
+def ensure_output_dir():
+    """Cria o diretório de saída, se necessário"""
+    Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+
+def record_audio(timestamp, fs=16000, on_audio=None, append_to=None):
+    """
+    Grava áudio do microfone até que o usuário pressione Enter.
+    
+    Os blocos capturados passam por um buffer circular limitado até uma
+    thread que os grava diretamente no disco, mantendo o uso de memória
+    constante independentemente da duração da gravação. O buffer guarda
+    RECORDER_BUFFER_SECONDS de áudio; se o disco atrasar mais do que isso,
+    os blocos excedentes são descartados, contados e informados ao final
+    (e no catálogo, em dropped_seconds). Digitando "p" e Enter, a captura é
+    pausada (o microfone é liberado) até um novo Enter.
+    
+    Args:
+        timestamp: Timestamp para nomear o arquivo
+        fs: Taxa de amostragem (padrão: 16000 Hz)
+        on_audio: Função opcional chamada com cada bloco gravado
+        append_to: Gravação existente a ser continuada (o áudio novo vai para o final)
+    
+    Returns:
+        Caminho para o arquivo de áudio gravado
+    """
+    import queue
+    
+    if append_to is not None:
+        audio_file = append_to
+    else:
+        extension = RECORDING_EXTENSIONS.get(RECORDING_FORMAT, "wav")
+        ensure_output_dir()
+        audio_file = os.path.join(OUTPUT_DIR, f"recording_{timestamp}.{extension}")
+    writer = open_audio_writer(audio_file, fs, append=append_to is not None)
+    
+    # Buffer circular entre o callback de áudio e a thread de escrita, dimensionado em segundos
+    blocksize = max(1, fs // 10)
+    blocks = queue.Queue(maxsize=max(1, int(RECORDER_BUFFER_SECONDS * fs / blocksize)))
+    dropped = [0]
+    dropped_blocks = [0]
+    written = [0]
+    failed = []
+    
+    def callback(indata, frame_count, time_info, status):
+        try:
+            blocks.put_nowait(indata.copy())
+        except queue.Full:
+            # Nunca bloquear o callback de áudio; contabilizar o descarte
+            dropped[0] += frame_count
+            dropped_blocks[0] += 1
+        return None  # Retornar None em vez de sd.paContinue para continuar a gravação
+    
+    def write_blocks():
+        try:
+            while True:
+                block = blocks.get()
+                if block is None:
+                    break
+                writer.write(block)
+                written[0] += len(block)
+                if on_audio is not None:
+                    on_audio(block)
+        except Exception as e:
+            # Disco cheio, erro do codificador...: repassado ao final da gravação
+            failed.append(e)
+    
+    writer_thread = threading.Thread(target=write_blocks, daemon=True)
+    writer_thread.start()
+    
+    print(ui['recording_start'])
+    
+    with metrics.span("record", format=RECORDING_FORMAT, append=append_to is not None) as span:
+        # Iniciar gravação
+        stream = sd.InputStream(samplerate=fs, channels=1, blocksize=blocksize, callback=callback)
+        stream.start()
+        paused = 0.0
         
-        ## Participantes
-        (Enumera los nombres mencionados)
+        try:
+            # Esperar o usuário finalizar, pausando e retomando a pedido
+            while input().strip().lower() == "p":
+                stream.stop()
+                paused_at = time.perf_counter()
+                input(ui['recording_paused'])
+                stream.start()
+                paused += time.perf_counter() - paused_at
+                print(ui['recording_resumed'])
+        finally:
+            # Parar gravação e esvaziar o buffer no disco
+            stream.stop()
+            stream.close()
+            # Se a thread de escrita morreu, a fila cheia não esvazia mais: não esperar por ela
+            while writer_thread.is_alive():
+                try:
+                    blocks.put(None, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            writer_thread.join()
+            if failed:
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+                raise failed[0]
+            writer.close()
+        span.set(audio_seconds=written[0] / fs, dropped_seconds=dropped[0] / fs, dropped_blocks=dropped_blocks[0],
+                 paused_seconds=round(paused, 3))
+    
+    print(ui['recording_stop'])
+    if dropped[0]:
+        print(ui['recording_dropped'].format(dropped[0] / fs, dropped_blocks[0]))
+        # A gravação tem lacunas: registrado no catálogo (somando as sessões de uma gravação continuada)
+        previous = (catalog.get(audio_file) or {}).get('dropped_seconds') or 0.0
+        catalog.update(audio_file, dropped_seconds=previous + dropped[0] / fs)
+    
+    return audio_file
+
+class WhisperModelRegistry:
+    """
+    Cache de modelos Whisper carregados, compartilhado por todo o processo.
+    
+    Os modelos são indexados por (nome, dispositivo, dtype) e descartados em
+    ordem LRU quando a memória estimada ultrapassa o limite configurado.
+    """
+    
+    def __init__(self, max_memory_mb=WHISPER_CACHE_MB):
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def resolve_key(name, device=None, dtype=None):
+        """Completa dispositivo e dtype com os valores padrão do ambiente"""
+        if not device:
+            device = WHISPER_DEVICE
+        if not device:
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        if not dtype:
+            dtype = "float16" if device.startswith("cuda") else "float32"
+        return (name, device, dtype)
+    
+    @staticmethod
+    def _model_size(model):
+        """Estima a memória ocupada pelos pesos do modelo"""
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    
+    @staticmethod
+    def _load(key):
+        """Carrega o modelo correspondente à chave (nome, dispositivo, dtype)"""
+        name, device, dtype = key
+        if device == "cpu" and WHISPER_THREADS > 0:
+            import torch
+            torch.set_num_threads(WHISPER_THREADS)
+        model = whisper.load_model(name, device=device)
+        if dtype == "float16":
+            model = model.half()
+        return model
+    
+    def get(self, name, device=None, dtype=None):
+        """
+        Retorna o modelo do cache, carregando-o se necessário.
         
-        ## Agenda
-        (Identifica los principales temas discutidos)
+        Args:
+            name: Nome do modelo Whisper (tiny, base, ...)
+            device: Dispositivo (cpu, cuda)
+            dtype: Tipo dos pesos (float32, float16)
         
-        ## Puntos Clave
-        (Resume los puntos clave de cada tema)
+        Returns:
+            Modelo Whisper carregado
+        """
+        key = self.resolve_key(name, device, dtype)
         
-        ## Decisiones
-        (Enumera las decisiones tomadas)
+        while True:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+                event = self._loading.get(key)
+                if event is None:
+                    # Esta thread fica responsável pelo carregamento
+                    event = threading.Event()
+                    self._loading[key] = event
+                    break
+            # Outra thread já está carregando o mesmo modelo
+            event.wait()
         
-        ## Acciones
-        (Enumera las tareas asignadas y plazos)
+        try:
+            with metrics.span("model_load", model=key[0], device=key[1], dtype=key[2]):
+                model = self._load(key)
+            size = self._model_size(model)
+            with self._lock:
+                self._models[key] = model
+                self._sizes[key] = size
+                self._evict(keep=key)
+            return model
+        finally:
+            with self._lock:
+                del self._loading[key]
+            event.set()
+    
+    def preload(self, name, device=None, dtype=None):
+        """
+        Carrega um modelo em segundo plano.
         
-        ## Próximos Pasos
-        (Indica seguimientos y planificación futura)
+        Returns:
+            Thread responsável pelo carregamento
         """
+        def load():
+            try:
+                self.get(name, device, dtype)
+            except Exception as e:
+                print(f"{ui['error']}{str(e)}")
+        
+        thread = threading.Thread(target=load, daemon=True)
+        thread.start()
+        return thread
+    
+    def _evict(self, keep):
+        """Remove modelos menos usados até respeitar o limite de memória"""
+        total = sum(self._sizes.values())
+        for key in list(self._models):
+            if total <= self.max_memory_bytes:
+                break
+            if key == keep:
+                continue
+            del self._models[key]
+            total -= self._sizes.pop(key)
+    
+    def clear(self):
+        """Descarta todos os modelos do cache"""
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
 
-def get_diary_prompt(text):
-    """Retorna o prompt para modo diário no idioma correto"""
+class FasterWhisperModelRegistry(WhisperModelRegistry):
+    """
+    Cache de modelos CTranslate2 (faster-whisper).
+    
+    O dtype corresponde ao compute_type do CTranslate2 (int8, int8_float16,
+    float16, float32).
+    """
+    
+    # Tamanho aproximado dos pesos em int8, em MB
+    APPROXIMATE_SIZES_MB = {'tiny': 40, 'base': 75, 'small': 250, 'medium': 770, 'large': 1550}
+    
+    @staticmethod
+    def resolve_key(name, device=None, dtype=None):
+        """Completa dispositivo e compute_type com os valores configurados"""
+        return (name, device or WHISPER_DEVICE or "cpu", dtype or WHISPER_COMPUTE_TYPE)
+    
+    def _model_size(self, model):
+        size_mb = self.APPROXIMATE_SIZES_MB.get(model.secre_tina_name.split('.')[0], 1550)
+        if not model.secre_tina_dtype.startswith("int8"):
+            size_mb *= 2 if model.secre_tina_dtype == "float16" else 4
+        return size_mb * 1024 * 1024
+    
+    @staticmethod
+    def _load(key):
+        from faster_whisper import WhisperModel
+        name, device, dtype = key
+        model = WhisperModel(name, device=device, compute_type=dtype, cpu_threads=WHISPER_THREADS)
+        model.secre_tina_name, model.secre_tina_dtype = name, dtype
+        return model
+
+# Cache de modelos Whisper do processo
+whisper_models = WhisperModelRegistry()
+faster_whisper_models = FasterWhisperModelRegistry()
+
+def available_memory(device):
+    """
+    Memória livre no dispositivo, em bytes.
+    
+    Args:
+        device: Dispositivo do modelo (cpu, cuda, cuda:1)
+    
+    Returns:
+        Bytes livres na GPU ou na RAM (None se não for possível medir)
+    """
+    if device.startswith("cuda"):
+        import torch
+        free, _ = torch.cuda.mem_get_info(torch.device(device))
+        return free
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+class TranscriptionEngine:
+    """
+    Interface dos motores de transcrição.
+    
+    transcribe() retorna um dicionário com o texto completo ("text") e os
+    segmentos com início, fim e texto ("segments").
+    """
+    
+    name = None
+    registry = None
+    
+    def preload(self):
+        """Carrega o modelo configurado em segundo plano"""
+        return self.registry.preload(WHISPER_MODEL)
+    
+    def transcribe(self, audio, initial_prompt=None):
+        raise NotImplementedError
+    
+    def decode_options(self):
+        """Configurações do motor que alteram o resultado (entram na chave do cache)"""
+        return ()
+    
+    def transcribe_batch(self, audios):
+        """
+        Transcreve vários clipes curtos (até 30 s) de uma vez.
+        
+        A implementação padrão transcreve um clipe por vez; motores que
+        decodificam lotes de uma só vez sobrescrevem este método.
+        
+        Args:
+            audios: Lista de arrays float32 (16 kHz)
+        
+        Returns:
+            Lista de resultados no formato de transcribe(), na mesma ordem
+        """
+        return [self.transcribe(audio) for audio in audios]
+
+class WhisperEngine(TranscriptionEngine):
+    """Motor padrão: pacote whisper da OpenAI (PyTorch)"""
+    
+    name = "whisper"
+    registry = whisper_models
+    
+    def decode_options(self):
+        # O dtype vem do dispositivo (float16 na GPU); o dispositivo automático não importa o torch aqui
+        return (WHISPER_DEVICE, max(1, WHISPER_BEAM_SIZE))
+    
+    def transcribe(self, audio, initial_prompt=None):
+        name, device, dtype = self.registry.resolve_key(WHISPER_MODEL)
+        model = self.registry.get(name, device, dtype)
+        options = {}
+        if WHISPER_BEAM_SIZE > 1:
+            options['beam_size'] = WHISPER_BEAM_SIZE
+        result = model.transcribe(audio, language=LANGUAGE, fp16=(dtype == "float16"),
+                                  initial_prompt=initial_prompt, **options)
+        return {
+            "text": result["text"],
+            "segments": [
+                {"start": seg["start"], "end": seg["end"], "text": seg["text"],
+                 "avg_logprob": seg.get("avg_logprob", 0.0)}
+                for seg in result.get("segments", [])
+            ],
+        }
+    
+    # Limites do whisper.transcribe() para aceitar a decodificação gulosa
+    COMPRESSION_RATIO_THRESHOLD = 2.4
+    LOGPROB_THRESHOLD = -1.0
+    NO_SPEECH_THRESHOLD = 0.6
+    
+    @staticmethod
+    def batch_size(model, device, dtype):
+        """
+        Quantos clipes de 30 s cabem em uma passada do modelo.
+        
+        Estima a memória por clipe (espectrograma, ativações do encoder e
+        caches de chave/valor do decoder, multiplicados pelo beam) e usa
+        metade da memória livre do dispositivo. WHISPER_BATCH_SIZE fixa o
+        valor manualmente.
+        
+        Returns:
+            Tamanho do lote (entre 1 e 32)
+        """
+        if WHISPER_BATCH_SIZE > 0:
+            return WHISPER_BATCH_SIZE
+        free = available_memory(device)
+        if free is None:
+            return 4
+        dims = model.dims
+        width = 2 if dtype == "float16" else 4
+        beams = max(1, WHISPER_BEAM_SIZE)
+        encoder = (dims.n_mels * 3000 + 6 * dims.n_audio_ctx * dims.n_audio_state
+                   + dims.n_audio_head * dims.n_audio_ctx ** 2)
+        decoder = 2 * dims.n_text_layer * (dims.n_audio_ctx + dims.n_text_ctx) * dims.n_text_state + dims.n_vocab
+        per_clip = (encoder + beams * decoder) * width
+        return max(1, min(32, int(free * 0.5 // per_clip)))
+    
+    @staticmethod
+    def _timestamp_segments(tokens, tokenizer, duration):
+        """
+        Separa os tokens de um clipe em segmentos pelos tokens de tempo.
+        
+        O decoder emite pares <|início|> texto <|fim|>; o texto após o
+        último token de tempo vai até o fim do clipe.
+        """
+        segments, text, start = [], [], 0.0
+        for token in tokens:
+            if token < tokenizer.timestamp_begin:
+                if token < tokenizer.eot:
+                    text.append(token)
+                continue
+            seconds = min((token - tokenizer.timestamp_begin) * 0.02, duration)
+            if text:
+                segments.append({"start": start, "end": seconds, "text": tokenizer.decode(text)})
+                text = []
+            start = seconds
+        if text:
+            segments.append({"start": start, "end": duration, "text": tokenizer.decode(text)})
+        return segments
+    
+    def transcribe_batch(self, audios):
+        """
+        Decodifica vários clipes curtos em uma passada do modelo.
+        
+        Os espectrogramas log-mel de cada clipe, completados com silêncio
+        até 30 s, são empilhados em um tensor (lote, mels, quadros) e
+        decodificados juntos, em lotes do tamanho que cabe na memória. Cada
+        resultado corresponde a um clipe, com tempos relativos ao início
+        dele. Clipes em que a decodificação gulosa falha pelos critérios do
+        whisper.transcribe() (texto repetitivo ou baixa confiança) são
+        refeitos individualmente, com as temperaturas de reserva.
+        """
+        import torch
+        from whisper.tokenizer import get_tokenizer
+        name, device, dtype = self.registry.resolve_key(WHISPER_MODEL)
+        model = self.registry.get(name, device, dtype)
+        tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                  language=LANGUAGE, task="transcribe")
+        options = whisper.DecodingOptions(task="transcribe", language=LANGUAGE, fp16=(dtype == "float16"),
+                                          beam_size=WHISPER_BEAM_SIZE if WHISPER_BEAM_SIZE > 1 else None)
+        size = self.batch_size(model, device, dtype)
+        
+        # Clipes acima da janela de 30 s seguem pelo transcribe() normal
+        clips = [np.asarray(audio, dtype=np.float32) for audio in audios]
+        results = [None] * len(clips)
+        short = []
+        for i, clip in enumerate(clips):
+            if len(clip) > whisper.audio.N_SAMPLES:
+                results[i] = self.transcribe(clip)
+            else:
+                short.append(i)
+        
+        for first in range(0, len(short), size):
+            indices = short[first:first + size]
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(clips[i]), model.dims.n_mels, device=model.device)
+                for i in indices
+            ])
+            with metrics.span("inference", engine=self.name, model=WHISPER_MODEL, clips=len(indices), batch_size=size,
+                              audio_seconds=sum(len(clips[i]) for i in indices) / SAMPLE_RATE):
+                decoded = whisper.decode(model, mel, options)
+            
+            for i, result in zip(indices, decoded):
+                if result.no_speech_prob > self.NO_SPEECH_THRESHOLD and result.avg_logprob < self.LOGPROB_THRESHOLD:
+                    results[i] = {"text": "", "segments": []}
+                elif (result.compression_ratio > self.COMPRESSION_RATIO_THRESHOLD
+                        or result.avg_logprob < self.LOGPROB_THRESHOLD):
+                    results[i] = self.transcribe(clips[i])
+                else:
+                    segments = self._timestamp_segments(result.tokens, tokenizer, len(clips[i]) / SAMPLE_RATE)
+                    for seg in segments:
+                        seg["avg_logprob"] = result.avg_logprob
+                    results[i] = {"text": "".join(seg["text"] for seg in segments), "segments": segments}
+        return results
+
+class FasterWhisperEngine(TranscriptionEngine):
+    """Motor CTranslate2 (faster-whisper), com quantização int8 para CPU"""
+    
+    name = "faster-whisper"
+    registry = faster_whisper_models
+    
+    def decode_options(self):
+        return (WHISPER_DEVICE or "cpu", WHISPER_COMPUTE_TYPE, max(1, WHISPER_BEAM_SIZE))
+    
+    def transcribe(self, audio, initial_prompt=None):
+        name, device, dtype = self.registry.resolve_key(WHISPER_MODEL)
+        model = self.registry.get(name, device, dtype)
+        if not isinstance(audio, (str, os.PathLike)):
+            audio = np.asarray(audio, dtype=np.float32)
+        segments, _ = model.transcribe(audio, language=LANGUAGE, beam_size=max(1, WHISPER_BEAM_SIZE),
+                                       initial_prompt=initial_prompt)
+        segments = [
+            {"start": seg.start, "end": seg.end, "text": seg.text, "avg_logprob": seg.avg_logprob}
+            for seg in segments
+        ]
+        return {"text": "".join(seg["text"] for seg in segments), "segments": segments}
+
+# Motores de transcrição disponíveis, por nome
+TRANSCRIPTION_ENGINES = {
+    'whisper': WhisperEngine(),
+    'faster-whisper': FasterWhisperEngine(),
+}
+
+def get_transcription_engine(name=None):
+    """
+    Retorna o motor de transcrição configurado.
+    
+    Args:
+        name: Nome do motor (padrão: TRANSCRIPTION_ENGINE)
+    """
+    name = name or TRANSCRIPTION_ENGINE
+    if name not in TRANSCRIPTION_ENGINES:
+        raise Exception(ui['invalid_engine'])
+    return TRANSCRIPTION_ENGINES[name]
+
+class ResultCache:
+    """
+    Cache em disco de resultados indexados pelo conteúdo.
+    
+    Cada entrada é um arquivo JSON cujo nome é o hash da chave. Ao exceder
+    o tamanho máximo, as entradas acessadas há mais tempo são removidas.
+    """
+    
+    def __init__(self, directory=CACHE_DIR, max_mb=CACHE_MAX_MB):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.refresh = False
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(*parts):
+        """Gera a chave do cache a partir das partes que determinam o resultado"""
+        import hashlib
+        return hashlib.sha256("\x00".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def get(self, key):
+        """
+        Busca um resultado no cache.
+        
+        Returns:
+            Valor armazenado, ou None se ausente (ou se refresh estiver ativo)
+        """
+        if self.refresh:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)['value']
+            # Atualizar a data de acesso para a política LRU
+            os.utime(path)
+            return value
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def put(self, key, value):
+        """Armazena um resultado e aplica o limite de tamanho"""
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'value': value, 'created': time.time()}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+    
+    def _evict(self):
+        """Remove as entradas menos usadas até respeitar o tamanho máximo"""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+# Cache de resultados do processo
+result_cache = ResultCache()
+
+def peak_rss_mb(reset=False):
+    """
+    Pico de memória residente do processo, em MB.
+    
+    No Linux o pico pode ser zerado (reset=True) para medir cada etapa
+    separadamente; nos demais sistemas o valor é o pico desde o início.
+    
+    Returns:
+        Pico em MB, ou None se não for possível medir
+    """
+    try:
+        with open("/proc/self/status", 'r') as f:
+            peak = next(int(line.split()[1]) / 1024 for line in f if line.startswith("VmHWM:"))
+        if reset:
+            with open("/proc/self/clear_refs", 'w') as f:
+                f.write("5")
+        return peak
+    except (OSError, StopIteration, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em bytes no macOS e em KB nos demais sistemas
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class Span:
+    """
+    Etapa medida pelo registro de métricas.
+    
+    Mede tempo de relógio e de CPU do processo entre a entrada e a saída do
+    bloco with; atributos extras (audio_seconds, tokens, ...) podem ser
+    acrescentados com set() durante a etapa.
+    """
+    
+    __slots__ = ('metrics', 'name', 'attrs', 'id', 'parent', 'started_at', '_wall', '_cpu', '_token')
+    
+    def __init__(self, metrics, name, attrs):
+        self.metrics = metrics
+        self.name = name
+        self.attrs = attrs
+    
+    def set(self, **attrs):
+        """Acrescenta atributos à etapa"""
+        self.attrs.update(attrs)
+    
+    def __enter__(self):
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self)
+        self.metrics._enter(self)
+        self.started_at = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        _current_span.reset(self._token)
+        self.metrics._exit(self, wall, cpu, exc_type)
+        return False
+
+class _NullSpan:
+    """Etapa sem efeito, usada quando as métricas estão desativadas"""
+    
+    def set(self, **attrs):
+        pass
+    
+    def __bool__(self):
+        return False
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+# Etapa em andamento na thread ou tarefa assíncrona atual
+_current_span = contextvars.ContextVar('secre_tina_span', default=None)
+
+class Metrics:
+    """
+    Registro de etapas (spans) e métricas do processamento.
+    
+    Cada etapa concluída vira uma linha JSON em METRICS_LOG, com tempo de
+    relógio e de CPU, pico de memória, duração do áudio, fator de tempo real
+    e contagens de tokens. Se METRICS_PROMETHEUS estiver definido, os totais
+    por etapa também são gravados nesse arquivo no formato texto do
+    Prometheus (para o coletor textfile do node_exporter). Sem nenhum dos
+    dois, span() devolve uma etapa vazia e o custo é uma chamada de função.
+    """
+    
+    def __init__(self, log_path=None, prometheus_path=None):
+        import uuid
+        self.log_path = log_path
+        self.prometheus_path = prometheus_path
+        self.run_id = uuid.uuid4().hex[:12]
+        self._ids = itertools.count(1)
+        self._active = 0
+        self._totals = {}
+        self._peak_rss = 0.0
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self):
+        return bool(self.log_path or METRICS_LOG or self.prometheus_path or METRICS_PROMETHEUS)
+    
+    def span(self, name, **attrs):
+        """
+        Cria uma etapa para ser usada em um bloco with.
+        
+        Args:
+            name: Nome da etapa (record, decode, transcribe, llm, ...)
+            attrs: Atributos iniciais
+        
+        Returns:
+            Span, ou uma etapa vazia se as métricas estiverem desativadas
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attrs)
+    
+    def _enter(self, span):
+        span.id = next(self._ids)
+        with self._lock:
+            # Zerar o pico de memória quando nenhuma outra etapa está em andamento
+            if self._active == 0:
+                peak_rss_mb(reset=True)
+            self._active += 1
+    
+    def _exit(self, span, wall, cpu, exc_type):
+        peak = peak_rss_mb()
+        record = {
+            'run': self.run_id,
+            'span': span.id,
+            'parent': span.parent.id if span.parent is not None else None,
+            'name': span.name,
+            'start': datetime.fromtimestamp(span.started_at).isoformat(timespec='milliseconds'),
+            'wall_s': round(wall, 4),
+            'cpu_s': round(cpu, 4),
+            'peak_rss_mb': round(peak, 1) if peak is not None else None,
+        }
+        record.update(span.attrs)
+        if span.attrs.get('audio_seconds'):
+            record['rtf'] = round(wall / span.attrs['audio_seconds'], 4)
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        
+        with self._lock:
+            self._active -= 1
+            log_path = self.log_path or METRICS_LOG
+            if log_path:
+                Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+                with open(log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            prometheus_path = self.prometheus_path or METRICS_PROMETHEUS
+            if prometheus_path:
+                self._accumulate(record)
+                self._write_prometheus(prometheus_path)
+    
+    def _accumulate(self, record):
+        """Soma a etapa aos totais exportados para o Prometheus"""
+        totals = self._totals.setdefault(record['name'], {
+            'runs': 0, 'errors': 0, 'wall': 0.0, 'cpu': 0.0, 'audio': 0.0,
+            'prompt_tokens': 0, 'completion_tokens': 0, 'rtf': None,
+        })
+        totals['runs'] += 1
+        totals['errors'] += 'error' in record
+        totals['wall'] += record['wall_s']
+        totals['cpu'] += record['cpu_s']
+        totals['audio'] += record.get('audio_seconds') or 0.0
+        totals['prompt_tokens'] += record.get('prompt_tokens') or 0
+        totals['completion_tokens'] += record.get('completion_tokens') or 0
+        if 'rtf' in record:
+            totals['rtf'] = record['rtf']
+        if record['peak_rss_mb'] is not None:
+            self._peak_rss = max(self._peak_rss, record['peak_rss_mb'])
+    
+    def _write_prometheus(self, path):
+        """Grava os totais no formato texto do Prometheus (substituição atômica)"""
+        lines = []
+        
+        def metric(name, kind, help_text, values):
+            lines.append(f"# HELP secretina_{name} {help_text}")
+            lines.append(f"# TYPE secretina_{name} {kind}")
+            for labels, value in values:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"secretina_{name}{{{label_text}}} {value}")
+        
+        stages = sorted(self._totals.items())
+        metric("stage_runs_total", "counter", "Etapas concluídas",
+               [({'stage': s}, t['runs']) for s, t in stages])
+        metric("stage_errors_total", "counter", "Etapas que terminaram com erro",
+               [({'stage': s}, t['errors']) for s, t in stages])
+        metric("stage_wall_seconds_total", "counter", "Tempo de relógio gasto em cada etapa",
+               [({'stage': s}, round(t['wall'], 4)) for s, t in stages])
+        metric("stage_cpu_seconds_total", "counter", "Tempo de CPU do processo durante cada etapa",
+               [({'stage': s}, round(t['cpu'], 4)) for s, t in stages])
+        metric("stage_audio_seconds_total", "counter", "Segundos de áudio processados em cada etapa",
+               [({'stage': s}, round(t['audio'], 3)) for s, t in stages if t['audio']])
+        metric("stage_last_rtf", "gauge", "Fator de tempo real da última execução da etapa",
+               [({'stage': s}, t['rtf']) for s, t in stages if t['rtf'] is not None])
+        metric("llm_tokens_total", "counter", "Tokens enviados e recebidos (estimados)",
+               [({'stage': s, 'kind': kind}, t[f'{kind}_tokens']) for s, t in stages
+                for kind in ('prompt', 'completion') if t[f'{kind}_tokens']])
+        metric("peak_rss_bytes", "gauge", "Maior pico de memória residente observado",
+               [({'run': self.run_id}, int(self._peak_rss * 1024 * 1024))])
+        
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+# Registro de métricas do processo
+metrics = Metrics()
+
+def hash_audio(audio):
+    """
+    Calcula o hash do conteúdo de um áudio.
+    
+    Args:
+        audio: Caminho para o arquivo ou amostras já decodificadas
+    
+    Returns:
+        Hash SHA-256 em hexadecimal
+    """
+    import hashlib
+    digest = hashlib.sha256()
+    if isinstance(audio, (str, os.PathLike)):
+        with open(audio, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+    else:
+        digest.update(np.ascontiguousarray(audio).tobytes())
+    return digest.hexdigest()
+
+def detect_speech_energy(audio, fs=16000, frame_ms=30, merge=True):
+    """
+    Detecta trechos de fala pela energia do sinal.
+    
+    O limiar se adapta ao ruído de fundo: quadros VAD_THRESHOLD_DB acima do
+    percentil 10 da energia (e acima de -60 dBFS) são considerados fala. Em
+    gravações sem silêncio real o percentil 10 já é fala, então o limiar
+    nunca passa de VAD_THRESHOLD_DB abaixo do percentil 90: fala baixa
+    próxima do nível da fala alta não é descartada.
+    
+    Args:
+        audio: Amostras mono em float32
+        fs: Taxa de amostragem
+        frame_ms: Duração de cada quadro de análise
+        merge: Aplicar margens e unir trechos próximos (merge_speech_segments)
+    
+    Returns:
+        Lista de tuplas (início, fim) em segundos
+    """
+    frame = int(fs * frame_ms / 1000)
+    count = len(audio) // frame
+    if count == 0:
+        return []
+    frames = np.asarray(audio[:count * frame], dtype=np.float32).reshape(count, frame)
+    db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    floor, loud = np.percentile(db, [10, 90])
+    threshold = max(min(float(floor), float(loud) - 2 * VAD_THRESHOLD_DB) + VAD_THRESHOLD_DB, -60.0)
+    speech = db > threshold
+    
+    # Converter quadros de fala em intervalos [início, fim)
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame / fs
+    ends = np.flatnonzero(edges == -1) * frame / fs
+    segments = list(zip(starts.tolist(), ends.tolist()))
+    return merge_speech_segments(segments, len(audio) / fs) if merge else segments
+
+def detect_speech_silero(audio, fs=16000):
+    """
+    Detecta trechos de fala com o modelo Silero VAD (via torch.hub).
+    
+    Returns:
+        Lista de tuplas (início, fim) em segundos
+    """
+    import torch
+    global _silero_vad
+    if _silero_vad is None:
+        _silero_vad = torch.hub.load('snakers4/silero-vad', 'silero_vad', trust_repo=True)
+    model, utils = _silero_vad
+    get_speech_timestamps = utils[0]
+    timestamps = get_speech_timestamps(torch.from_numpy(np.asarray(audio, dtype=np.float32)),
+                                       model, sampling_rate=fs)
+    segments = [(t['start'] / fs, t['end'] / fs) for t in timestamps]
+    return merge_speech_segments(segments, len(audio) / fs)
+
+# Modelo Silero VAD carregado sob demanda
+_silero_vad = None
+
+def merge_speech_segments(segments, duration):
+    """
+    Aplica margens, une trechos próximos e descarta ruídos muito curtos.
+    
+    Args:
+        segments: Lista de tuplas (início, fim) em segundos
+        duration: Duração total do áudio em segundos
+    
+    Returns:
+        Lista de tuplas (início, fim) em segundos
+    """
+    merged = []
+    for start, end in segments:
+        start = max(0.0, start - VAD_PADDING)
+        end = min(duration, end + VAD_PADDING)
+        if merged and start - merged[-1][1] < VAD_MIN_SILENCE:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return [(start, end) for start, end in merged if end - start >= VAD_MIN_SPEECH]
+
+def detect_speech(audio, fs=16000):
+    """
+    Detecta trechos de fala com o método configurado em VAD_MODE.
+    
+    Returns:
+        Lista de tuplas (início, fim) em segundos
+    """
+    if VAD_MODE == "silero":
+        return detect_speech_silero(audio, fs)
+    return detect_speech_energy(audio, fs)
+
+def transcribe_speech(engine, audio, fs=16000, initial_prompt=None):
+    """
+    Transcreve apenas os trechos de fala do áudio.
+    
+    Os trechos detectados são concatenados (separados por uma pausa curta) e
+    transcritos de uma só vez; os tempos dos segmentos são então convertidos
+    de volta para a linha do tempo do áudio original.
+    
+    Args:
+        engine: Motor de transcrição
+        audio: Amostras mono em float32 (16 kHz)
+        fs: Taxa de amostragem
+        initial_prompt: Texto anterior usado como contexto pelo motor
+    
+    Returns:
+        Resultado do motor, com "speech_ratio" indicando a fração de fala
+    """
+    duration = len(audio) / fs
+    with metrics.span("vad", mode=VAD_MODE, audio_seconds=duration) as span:
+        speech = detect_speech(audio, fs)
+        span.set(speech_seconds=sum(end - start for start, end in speech))
+    if not speech:
+        return {"text": "", "segments": [], "speech_ratio": 0.0}
+    
+    gap = np.zeros(int(VAD_GAP * fs), dtype=np.float32)
+    pieces = []
+    packed_starts = []
+    position = 0.0
+    for start, end in speech:
+        packed_starts.append(position)
+        piece = np.asarray(audio[int(start * fs):int(end * fs)], dtype=np.float32)
+        pieces.extend([piece, gap])
+        position += (len(piece) + len(gap)) / fs
+    packed = np.concatenate(pieces)
+    
+    with metrics.span("inference", engine=engine.name, model=WHISPER_MODEL, audio_seconds=len(packed) / fs):
+        result = engine.transcribe(packed, initial_prompt=initial_prompt)
+    
+    # Converter tempos da linha do tempo compactada para a original
+    packed_starts = np.asarray(packed_starts)
+    original_starts = np.asarray([start for start, _ in speech])
+    def to_original(t):
+        i = max(0, int(np.searchsorted(packed_starts, t, side='right')) - 1)
+        return min(duration, float(original_starts[i] + (t - packed_starts[i])))
+    for segment in result["segments"]:
+        segment["start"] = to_original(segment["start"])
+        segment["end"] = to_original(segment["end"])
+    
+    result["speech_ratio"] = sum(end - start for start, end in speech) / duration if duration else 0.0
+    return result
+
+def plan_chunks(audio, fs=16000, chunk_seconds=None, overlap_seconds=None):
+    """
+    Divide um áudio longo em trechos para transcrição paralela.
+    
+    Cada corte é feito no meio da pausa mais próxima do tamanho desejado
+    (dentro de ±25%). Quando não há pausa, o corte é feito no tamanho exato
+    e os trechos vizinhos recebem overlap_seconds de áudio extra.
+    
+    Args:
+        audio: Amostras mono em float32
+        fs: Taxa de amostragem
+        chunk_seconds: Duração aproximada de cada trecho
+        overlap_seconds: Sobreposição usada nos cortes sem pausa
+    
+    Returns:
+        Lista de tuplas (início, fim, mantido_de, mantido_até) em segundos; os
+        segmentos transcritos são mantidos se o seu centro cair em
+        [mantido_de, mantido_até)
+    """
+    chunk_seconds = chunk_seconds or PARALLEL_CHUNK_SECONDS
+    overlap_seconds = PARALLEL_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds
+    duration = len(audio) / fs
+    
+    # Centros das pausas (de pelo menos 0,3 s) entre trechos de fala
+    speech = detect_speech_energy(audio, fs, merge=False)
+    pauses = np.asarray([(speech[i][1] + speech[i + 1][0]) / 2 for i in range(len(speech) - 1)
+                         if speech[i + 1][0] - speech[i][1] >= 0.3])
+    
+    cuts = [(0.0, True)]
+    while duration - cuts[-1][0] > chunk_seconds * 1.25:
+        target = cuts[-1][0] + chunk_seconds
+        window = chunk_seconds * 0.25
+        candidates = pauses[np.abs(pauses - target) <= window] if len(pauses) else pauses
+        if len(candidates):
+            cuts.append((float(candidates[np.argmin(np.abs(candidates - target))]), True))
+        else:
+            cuts.append((target, False))
+    cuts.append((duration, True))
+    
+    chunks = []
+    for (keep_from, silent_start), (keep_to, silent_end) in zip(cuts, cuts[1:]):
+        start = keep_from if silent_start else max(0.0, keep_from - overlap_seconds)
+        end = keep_to if silent_end else min(duration, keep_to + overlap_seconds)
+        chunks.append((start, end, keep_from, keep_to))
+    return chunks
+
+def _init_parallel_worker(engine_name, whisper_model, language, vad_mode, threads):
+    """Configura um processo de transcrição paralela"""
+    global TRANSCRIPTION_ENGINE, WHISPER_MODEL, LANGUAGE, VAD_MODE, WHISPER_THREADS, WHISPER_DEVICE
+    TRANSCRIPTION_ENGINE, WHISPER_MODEL, LANGUAGE, VAD_MODE = engine_name, whisper_model, language, vad_mode
+    WHISPER_THREADS = threads
+    WHISPER_DEVICE = "cpu"
+
+def _transcribe_parallel_chunk(index, audio):
+    """Transcreve um trecho dentro de um processo do pool"""
+    return index, run_engine(get_transcription_engine(), audio)
+
+def transcribe_parallel(audio, fs=16000, workers=None):
+    """
+    Transcreve um áudio longo em paralelo, um trecho por processo.
+    
+    Cada processo carrega seu próprio modelo e usa uma parte das threads de
+    CPU. Os segmentos são reposicionados na linha do tempo original e, nos
+    trechos sobrepostos, cada segmento é mantido apenas pelo trecho que
+    contém o seu centro.
+    
+    Args:
+        audio: Amostras mono em float32 (16 kHz)
+        fs: Taxa de amostragem
+        workers: Número de processos (padrão: PARALLEL_WORKERS)
+    
+    Returns:
+        Resultado no mesmo formato de TranscriptionEngine.transcribe()
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    workers = workers or PARALLEL_WORKERS
+    chunks = plan_chunks(audio, fs)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_parallel_worker,
+        initargs=(TRANSCRIPTION_ENGINE, WHISPER_MODEL, LANGUAGE, VAD_MODE, threads),
+    ) as executor:
+        futures = [
+            executor.submit(_transcribe_parallel_chunk, i, audio[int(start * fs):int(end * fs)])
+            for i, (start, end, _, _) in enumerate(chunks)
+        ]
+        results = dict(future.result() for future in futures)
+    
+    segments = []
+    speech = 0.0
+    for i, (start, end, keep_from, keep_to) in enumerate(chunks):
+        result = results[i]
+        speech += result.get("speech_ratio", 1.0) * (end - start)
+        for segment in result["segments"]:
+            segment["start"] += start
+            segment["end"] += start
+            if keep_from <= (segment["start"] + segment["end"]) / 2 < keep_to:
+                segments.append(segment)
+    
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "speech_ratio": speech / sum(end - start for start, end, _, _ in chunks),
+    }
+
+def run_engine(engine, audio, initial_prompt=None):
+    """
+    Transcreve amostras com o motor, aplicando a detecção de fala configurada.
+    
+    Args:
+        engine: Motor de transcrição
+        audio: Caminho do arquivo (apenas sem VAD) ou amostras em float32 (16 kHz)
+        initial_prompt: Texto anterior usado como contexto pelo motor
+    
+    Returns:
+        Resultado no mesmo formato de TranscriptionEngine.transcribe()
+    """
+    if VAD_MODE == "off":
+        with metrics.span("inference", engine=engine.name, model=WHISPER_MODEL) as span:
+            if span and not isinstance(audio, (str, os.PathLike)):
+                span.set(audio_seconds=len(audio) / SAMPLE_RATE)
+            return engine.transcribe(audio, initial_prompt=initial_prompt)
+    return transcribe_speech(engine, audio, initial_prompt=initial_prompt)
+
+class Segments:
+    """
+    Segmentos de uma transcrição, armazenados em arrays.
+    
+    Início, fim e confiança ficam em arrays float32 e os textos em uma única
+    string com um array de deslocamentos, em vez de uma lista de dicionários.
+    O falante de cada segmento (diarização) fica em um array int16, com -1
+    quando desconhecido.
+    """
+    
+    __slots__ = ('starts', 'ends', 'confidence', 'speakers', '_text', '_offsets')
+    
+    def __init__(self, starts=(), ends=(), confidence=(), texts=(), speakers=None):
+        self.starts = np.asarray(starts, dtype=np.float32)
+        self.ends = np.asarray(ends, dtype=np.float32)
+        self.confidence = np.asarray(confidence, dtype=np.float32)
+        if speakers is None:
+            self.speakers = np.full(len(self.starts), -1, dtype=np.int16)
+        else:
+            self.speakers = np.asarray(speakers, dtype=np.int16)
+        self._text = "".join(texts)
+        self._offsets = np.cumsum([0] + [len(t) for t in texts], dtype=np.int64)
+    
+    @classmethod
+    def from_result(cls, result):
+        """Cria os segmentos a partir do resultado de um motor de transcrição"""
+        segments = result["segments"]
+        return cls(
+            [seg["start"] for seg in segments],
+            [seg["end"] for seg in segments],
+            [float(np.exp(seg.get("avg_logprob", 0.0))) for seg in segments],
+            [seg["text"] for seg in segments],
+        )
+    
+    @classmethod
+    def concatenate(cls, parts):
+        """Junta vários conjuntos de segmentos, na ordem"""
+        parts = list(parts)
+        texts = [text for part in parts for text in part.texts()]
+        if not parts:
+            return cls()
+        return cls(np.concatenate([p.starts for p in parts]), np.concatenate([p.ends for p in parts]),
+                   np.concatenate([p.confidence for p in parts]), texts,
+                   np.concatenate([p.speakers for p in parts]))
+    
+    def __len__(self):
+        return len(self.starts)
+    
+    def text_at(self, i):
+        """Texto do segmento i"""
+        return self._text[self._offsets[i]:self._offsets[i + 1]]
+    
+    def texts(self):
+        """Textos de todos os segmentos"""
+        return [self.text_at(i) for i in range(len(self))]
+    
+    def __iter__(self):
+        """Percorre os segmentos como tuplas (início, fim, confiança, texto)"""
+        for i in range(len(self)):
+            yield float(self.starts[i]), float(self.ends[i]), float(self.confidence[i]), self.text_at(i)
+    
+    @property
+    def text(self):
+        """Texto completo da transcrição"""
+        return self._text.strip()
+    
+    @property
+    def has_speakers(self):
+        """True se os segmentos foram atribuídos a falantes"""
+        return bool(len(self.speakers)) and bool((self.speakers >= 0).any())
+    
+    def speaker_label(self, i):
+        """Rótulo do falante do segmento i ("Falante 1", ...), ou None"""
+        speaker = int(self.speakers[i])
+        return f"{ui['speaker_label']} {speaker + 1}" if speaker >= 0 else None
+    
+    def dialogue(self):
+        """
+        Texto da transcrição organizado em falas.
+        
+        Segmentos consecutivos do mesmo falante são unidos em uma linha
+        "Falante N: ...". Sem diarização, retorna o texto corrido.
+        """
+        if not self.has_speakers:
+            return self.text
+        lines = []
+        current = None
+        for i in range(len(self)):
+            text = self.text_at(i).strip()
+            if not text:
+                continue
+            label = self.speaker_label(i) or "?"
+            if label == current:
+                lines[-1] += " " + text
+            else:
+                lines.append(f"{label}: {text}")
+                current = label
+        return "\n".join(lines)
+    
+    def select(self, mask):
+        """Retorna apenas os segmentos indicados pela máscara booleana"""
+        indices = np.flatnonzero(mask)
+        return Segments(self.starts[indices], self.ends[indices], self.confidence[indices],
+                        [self.text_at(i) for i in indices], self.speakers[indices])
+    
+    def shifted(self, offset):
+        """Retorna uma cópia com os tempos deslocados em offset segundos"""
+        return Segments(self.starts + offset, self.ends + offset, self.confidence, self.texts(), self.speakers)
+    
+    def to_dict(self):
+        """Representação serializável em JSON"""
+        data = {
+            'starts': self.starts.tolist(),
+            'ends': self.ends.tolist(),
+            'confidence': self.confidence.tolist(),
+            'texts': self.texts(),
+        }
+        if self.has_speakers:
+            data['speakers'] = self.speakers.tolist()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['starts'], data['ends'], data['confidence'], data['texts'], data.get('speakers'))
+    
+    @classmethod
+    def from_jsonl(cls, path):
+        """Lê os segmentos gravados por write_segments_jsonl"""
+        records = list(iter_segments_jsonl(path))
+        return cls([r['start'] for r in records], [r['end'] for r in records],
+                   [r['confidence'] for r in records], [" " + r['text'] for r in records],
+                   [r.get('speaker', -1) for r in records])
+
+def format_timestamp(seconds, separator=","):
+    """Formata segundos como HH:MM:SS,mmm (SRT) ou HH:MM:SS.mmm (VTT)"""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+def write_segments_jsonl(segments, path):
+    """Grava os segmentos em JSONL, um segmento por linha"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, (start, end, confidence, text) in enumerate(segments):
+            record = {'id': i, 'start': round(start, 3), 'end': round(end, 3),
+                      'confidence': round(confidence, 4), 'text': text.strip()}
+            if segments.speakers[i] >= 0:
+                record['speaker'] = int(segments.speakers[i])
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+
+def iter_segments_jsonl(path, offset=0, limit=None):
+    """
+    Lê segmentos de um arquivo JSONL sem carregar o arquivo inteiro.
+    
+    Args:
+        path: Caminho do arquivo .jsonl
+        offset: Número de segmentos a pular
+        limit: Número máximo de segmentos a retornar
+    
+    Yields:
+        Dicionários com id, start, end, confidence e text
+    """
+    from itertools import islice
+    with open(path, 'r', encoding='utf-8') as f:
+        stop = None if limit is None else offset + limit
+        for line in islice(f, offset, stop):
+            yield json.loads(line)
+
+def write_srt(segments, path):
+    """Grava os segmentos como legendas SRT"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, (start, end, _, text) in enumerate(segments):
+            label = segments.speaker_label(i)
+            text = f"[{label}] {text.strip()}" if label else text.strip()
+            f.write(f"{i + 1}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n\n")
+
+def write_vtt(segments, path):
+    """Grava os segmentos como legendas WebVTT"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("WEBVTT\n\n")
+        for i, (start, end, _, text) in enumerate(segments):
+            label = segments.speaker_label(i)
+            # Etiqueta de voz do WebVTT: <v Nome>texto
+            text = f"<v {label}>{text.strip()}" if label else text.strip()
+            f.write(f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n\n")
+
+def mfcc_frames(audio, fs=16000, n_mfcc=20, n_mels=40, block_frames=6000):
+    """
+    Calcula coeficientes MFCC quadro a quadro (25 ms, passo de 10 ms).
+    
+    O áudio é processado em blocos de quadros para que a FFT de uma
+    gravação longa não ocupe gigabytes de memória.
+    
+    Args:
+        audio: Amostras mono float32
+        fs: Taxa de amostragem
+        n_mfcc: Coeficientes mantidos (sem o coeficiente 0, ligado ao volume)
+        n_mels: Filtros da escala mel
+        block_frames: Quadros processados por vez
+    
+    Returns:
+        Array float32 com forma (quadros, n_mfcc)
+    """
+    from numpy.lib.stride_tricks import sliding_window_view
+    win, hop, n_fft = int(0.025 * fs), int(0.010 * fs), 512
+    count = max(0, (len(audio) - win) // hop + 1)
+    
+    # Banco de filtros mel triangulares e matriz da DCT-II
+    mel = lambda f: 2595 * np.log10(1 + f / 700)
+    points = 700 * (10 ** (np.linspace(mel(0), mel(fs / 2), n_mels + 2) / 2595) - 1)
+    bins = np.fft.rfftfreq(n_fft, 1 / fs)
+    lower, center, upper = points[:-2, None], points[1:-1, None], points[2:, None]
+    filters = np.maximum(0, np.minimum((bins - lower) / (center - lower), (upper - bins) / (upper - center)))
+    filters = filters.astype(np.float32).T
+    k = np.arange(n_mels)
+    dct = np.cos(np.pi / n_mels * (k[:, None] + 0.5) * np.arange(1, n_mfcc + 1)[None, :]).astype(np.float32)
+    window = np.hamming(win).astype(np.float32)
+    
+    out = np.empty((count, n_mfcc), dtype=np.float32)
+    for first in range(0, count, block_frames):
+        last = min(count, first + block_frames)
+        segment = np.asarray(audio[first * hop:(last - 1) * hop + win], dtype=np.float32)
+        frames = sliding_window_view(segment, win)[::hop]
+        emphasized = np.concatenate([frames[:, :1], frames[:, 1:] - 0.97 * frames[:, :-1]], axis=1)
+        power = np.abs(np.fft.rfft(emphasized * window, n_fft)) ** 2
+        out[first:last] = np.log(power.astype(np.float32) @ filters + 1e-8) @ dct
+    return out
+
+def speaker_windows(speech, window=1.5, hop=0.75, min_length=0.5):
+    """
+    Divide os trechos de fala em janelas curtas para a diarização.
+    
+    Args:
+        speech: Lista de tuplas (início, fim) em segundos
+        window: Duração de cada janela
+        hop: Passo entre janelas
+        min_length: Trechos mais curtos são ignorados
+    
+    Returns:
+        Arrays (inícios, fins) das janelas
+    """
+    starts, ends = [], []
+    for start, end in speech:
+        if end - start < min_length:
+            continue
+        if end - start <= window:
+            starts.append(start)
+            ends.append(end)
+            continue
+        first = np.arange(start, end - window + 1e-6, hop)
+        starts.extend(first.tolist())
+        ends.extend((first + window).tolist())
+        if ends[-1] < end:
+            starts.append(end - window)
+            ends.append(end)
+    return np.asarray(starts, dtype=np.float64), np.asarray(ends, dtype=np.float64)
+
+def speaker_embeddings(features, starts, ends, frame_rate=100):
+    """
+    Vetores de falante de cada janela: média e desvio dos MFCC normalizados.
+    
+    As somas por janela saem de somas acumuladas, em tempo linear no número
+    de quadros, independentemente da sobreposição das janelas.
+    
+    Args:
+        features: MFCC por quadro (mfcc_frames)
+        starts, ends: Limites das janelas em segundos
+        frame_rate: Quadros por segundo
+    
+    Returns:
+        Array float32 (janelas, 2 * coeficientes) com vetores de norma 1
+    """
+    features = (features - features.mean(axis=0)) / (features.std(axis=0) + 1e-6)
+    first = np.clip((starts * frame_rate).astype(np.int64), 0, len(features))
+    last = np.clip((ends * frame_rate).astype(np.int64), first + 1, len(features))
+    totals = np.concatenate([np.zeros((1, features.shape[1])), np.cumsum(features, axis=0, dtype=np.float64)])
+    squares = np.concatenate([np.zeros((1, features.shape[1])), np.cumsum(features.astype(np.float64) ** 2, axis=0)])
+    counts = (last - first)[:, None]
+    mean = (totals[last] - totals[first]) / counts
+    std = np.sqrt(np.maximum((squares[last] - squares[first]) / counts - mean ** 2, 0))
+    embeddings = np.concatenate([mean, std], axis=1)
+    embeddings -= embeddings.mean(axis=0)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-9
+    return embeddings.astype(np.float32)
+
+def cluster_speakers(embeddings, threshold=None, max_speakers=None, iterations=10):
+    """
+    Agrupa os vetores de falante sem calcular a matriz de distâncias completa.
+    
+    Uma passagem sequencial cria um centróide sempre que a similaridade com
+    os existentes fica abaixo do limiar; em seguida, algumas iterações de
+    k-means refinam os grupos e centróides parecidos demais são unidos. O
+    custo é O(janelas × falantes) em tempo e memória, o que mantém reuniões
+    de várias horas (milhares de janelas) em segundos.
+    
+    Args:
+        embeddings: Vetores de norma 1 (janelas, dimensão)
+        threshold: Similaridade de cosseno mínima para o mesmo falante
+        max_speakers: Número máximo de falantes (0 = automático)
+        iterations: Iterações de refinamento
+    
+    Returns:
+        Array int16 com o falante de cada janela (0, 1, ... na ordem em que aparecem)
+    """
+    threshold = DIARIZATION_THRESHOLD if threshold is None else threshold
+    max_speakers = DIARIZATION_MAX_SPEAKERS if max_speakers is None else max_speakers
+    if not len(embeddings):
+        return np.zeros(0, dtype=np.int16)
+    
+    # Passagem sequencial (algoritmo do líder)
+    centroids = [embeddings[0].copy()]
+    sums = [embeddings[0].astype(np.float64)]
+    for vector in embeddings[1:]:
+        similarity = np.asarray(centroids) @ vector
+        best = int(np.argmax(similarity))
+        if similarity[best] >= threshold:
+            sums[best] += vector
+            centroids[best] = (sums[best] / np.linalg.norm(sums[best])).astype(np.float32)
+        else:
+            centroids.append(vector.copy())
+            sums.append(vector.astype(np.float64))
+    centroids = np.asarray(centroids)
+    
+    for _ in range(iterations):
+        labels = np.argmax(embeddings @ centroids.T, axis=1)
+        counts = np.bincount(labels, minlength=len(centroids))
+        sums = np.zeros_like(centroids, dtype=np.float64)
+        np.add.at(sums, labels, embeddings)
+        
+        # Grupos com menos de 2% das janelas são absorvidos pelos vizinhos
+        keep = counts >= max(2, 0.02 * len(embeddings))
+        if not keep.any():
+            keep = counts == counts.max()
+        sums = sums[keep]
+        
+        # Unir centróides parecidos demais (ou além do limite de falantes)
+        while len(sums) > 1:
+            normalized = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+            similarity = normalized @ normalized.T
+            np.fill_diagonal(similarity, -np.inf)
+            i, j = np.unravel_index(np.argmax(similarity), similarity.shape)
+            if similarity[i, j] < threshold and not (max_speakers and len(sums) > max_speakers):
+                break
+            sums[i] += sums[j]
+            sums = np.delete(sums, j, axis=0)
+        
+        updated = (sums / np.linalg.norm(sums, axis=1, keepdims=True)).astype(np.float32)
+        if updated.shape == centroids.shape and np.allclose(updated, centroids, atol=1e-5):
+            break
+        centroids = updated
+    
+    labels = np.argmax(embeddings @ centroids.T, axis=1)
+    # Numerar os falantes pela ordem da primeira fala
+    _, first_seen = np.unique(labels, return_index=True)
+    order = np.argsort(np.argsort(first_seen))
+    mapping = np.zeros(labels.max() + 1, dtype=np.int16)
+    mapping[np.unique(labels)] = order
+    return mapping[labels]
+
+def diarize(audio, fs=16000):
+    """
+    Identifica quem fala em cada trecho do áudio.
+    
+    Args:
+        audio: Amostras mono float32 (16 kHz)
+        fs: Taxa de amostragem
+    
+    Returns:
+        Tupla (inícios, fins, falantes) das janelas analisadas
+    """
+    with metrics.span("diarize", audio_seconds=len(audio) / fs) as span:
+        speech = detect_speech(audio, fs)
+        starts, ends = speaker_windows(speech)
+        if not len(starts):
+            return starts, ends, np.zeros(0, dtype=np.int16)
+        embeddings = speaker_embeddings(mfcc_frames(audio, fs), starts, ends)
+        speakers = cluster_speakers(embeddings)
+        span.set(windows=len(starts), speakers=int(speakers.max()) + 1)
+    return starts, ends, speakers
+
+def assign_speakers(segments, starts, ends, speakers):
+    """
+    Atribui a cada segmento o falante com mais tempo de sobreposição.
+    
+    As janelas estão ordenadas no tempo, então só as janelas próximas de
+    cada segmento são examinadas.
+    
+    Args:
+        segments: Segments da transcrição (alterado no lugar)
+        starts, ends, speakers: Resultado de diarize()
+    
+    Returns:
+        Os mesmos Segments, com o array speakers preenchido
+    """
+    if not len(speakers):
+        return segments
+    count = int(speakers.max()) + 1
+    # Janelas têm duração limitada: as que tocam o segmento começam depois de início - maior janela
+    longest = float(np.max(ends - starts))
+    for i in range(len(segments)):
+        start, end = float(segments.starts[i]), float(segments.ends[i])
+        first = np.searchsorted(starts, start - longest)
+        last = np.searchsorted(starts, end)
+        overlap = np.clip(np.minimum(ends[first:last], end) - np.maximum(starts[first:last], start), 0, None)
+        if overlap.sum() > 0:
+            segments.speakers[i] = int(np.argmax(np.bincount(speakers[first:last], weights=overlap, minlength=count)))
+    
+    # Renumerar sem lacunas (falantes que não venceram em nenhum segmento somem)
+    known = segments.speakers >= 0
+    if known.any():
+        labels, first_seen = np.unique(segments.speakers[known], return_index=True)
+        mapping = np.full(count, -1, dtype=np.int16)
+        mapping[labels[np.argsort(first_seen)]] = np.arange(len(labels))
+        segments.speakers[known] = mapping[segments.speakers[known]]
+    return segments
+
+def transcribe_audio(audio_file, show_status=True):
+    """
+    Transcreve o áudio usando o motor de transcrição configurado.
+    
+    Args:
+        audio_file: Caminho para o arquivo de áudio ou amostras já decodificadas (16 kHz)
+        show_status: Exibir mensagem de progresso
+    
+    Returns:
+        Texto transcrito
+    """
+    return transcribe_segments(audio_file, show_status).text
+
+def transcribe_segments(audio_file, show_status=True):
+    """
+    Transcreve o áudio mantendo os segmentos com tempos e confiança.
+    
+    Args:
+        audio_file: Caminho para o arquivo de áudio ou amostras já decodificadas (16 kHz)
+        show_status: Exibir mensagem de progresso
+    
+    Returns:
+        Segments com a transcrição
+    """
+    if show_status:
+        print(ui['transcribing'])
+    
+    engine = get_transcription_engine()
+    with metrics.span("transcribe", engine=engine.name, model=WHISPER_MODEL) as span:
+        if span:
+            span.set(audio_seconds=Catalog._duration(audio_file) if isinstance(audio_file, (str, os.PathLike))
+                     else len(audio_file) / SAMPLE_RATE)
+        
+        # A decodificação em blocos não nivela o volume: o áudio entregue ao motor é outro, e a chave também
+        streaming = STREAMING_DECODE and PARALLEL_WORKERS <= 1 and not DIARIZATION and is_streamable(audio_file)
+        
+        # Reaproveitar a transcrição se o mesmo áudio já foi processado; toda configuração
+        # que muda o texto ou os tempos dos segmentos entra na chave
+        cache_key = result_cache.key(
+            'segments', hash_audio(audio_file), engine.name, WHISPER_MODEL, LANGUAGE, engine.decode_options(),
+            VAD_MODE, VAD_MODE != "off" and (VAD_THRESHOLD_DB, VAD_MIN_SILENCE, VAD_MIN_SPEECH, VAD_PADDING, VAD_GAP),
+            ('streaming', LIVE_CHUNK_SECONDS, LIVE_OVERLAP_SECONDS) if streaming else AUDIO_NORMALIZE and AUDIO_TARGET_DBFS,
+            not streaming and PARALLEL_WORKERS > 1 and (PARALLEL_CHUNK_SECONDS, PARALLEL_OVERLAP_SECONDS),
+            DIARIZATION and (DIARIZATION_THRESHOLD, DIARIZATION_MAX_SPEAKERS),
+        )
+        cached = result_cache.get(cache_key)
+        span.set(cached=cached is not None)
+        if cached is not None:
+            return Segments.from_dict(cached)
+        
+        # Decodificação em blocos: cada trecho é transcrito enquanto o restante é lido
+        if streaming:
+            transcriber = LiveTranscriber(echo=False)
+            for block in iter_preprocessed_blocks(audio_file, block_seconds=LIVE_CHUNK_SECONDS):
+                transcriber.feed(block)
+            # finish() repassa a falha de qualquer trecho, e o resultado parcial não vai para o cache
+            segments = transcriber.finish()
+            result_cache.put(cache_key, segments.to_dict())
+            return segments
+        
+        # Decodificar e pré-processar (mono, 16 kHz, volume nivelado) antes do motor
+        if isinstance(audio_file, (str, os.PathLike)):
+            audio_file = load_audio(audio_file)
+        
+        # Diarização em paralelo com a transcrição (numpy libera o GIL nas FFTs e produtos)
+        speakers = {}
+        
+        def run_diarization():
+            try:
+                speakers['result'] = diarize(audio_file)
+            except Exception as e:
+                # Repassado após o join(): uma exceção na thread só iria para o stderr
+                speakers['error'] = e
+        
+        if DIARIZATION:
+            diarization = threading.Thread(target=run_diarization, daemon=True)
+            diarization.start()
+        
+        # Transcrever (o modelo fica em cache após a primeira carga)
+        if PARALLEL_WORKERS > 1 and len(audio_file) > PARALLEL_CHUNK_SECONDS * 1.5 * SAMPLE_RATE:
+            result = transcribe_parallel(audio_file)
+        else:
+            result = run_engine(engine, audio_file)
+        if show_status and VAD_MODE != "off":
+            print(ui['vad_skipped'].format(100 * (1 - result["speech_ratio"])))
+        
+        segments = Segments.from_result(result)
+        if DIARIZATION:
+            diarization.join()
+            if 'error' in speakers:
+                # A transcrição continua útil, mas sem falantes não vai para o cache
+                print(ui['diarization_failed'].format(speakers['error']))
+                span.set(segments=len(segments), diarization_error=str(speakers['error']))
+                return segments
+            assign_speakers(segments, *speakers['result'])
+        span.set(segments=len(segments))
+        result_cache.put(cache_key, segments.to_dict())
+        return segments
+
+def transcribe_clips(audios, show_status=True, engine=None):
+    """
+    Transcreve vários clipes curtos (notas de voz, entradas de diário) de uma vez.
+    
+    Os clipes de até 30 s com fala são decodificados juntos pelo
+    transcribe_batch() do motor, em vez de uma chamada por clipe; clipes sem
+    fala não passam pelo motor e clipes maiores seguem por
+    transcribe_segments().
+    
+    Args:
+        audios: Caminhos de arquivos ou amostras já decodificadas (16 kHz)
+        show_status: Exibir mensagem de progresso
+        engine: Motor de transcrição (padrão: TRANSCRIPTION_ENGINE)
+    
+    Returns:
+        Lista de Segments, um por clipe, na mesma ordem, com tempos relativos ao início de cada clipe
+    """
+    if show_status:
+        print(ui['transcribing'])
+    
+    engine = engine or get_transcription_engine()
+    audios = [load_audio(audio) if isinstance(audio, (str, os.PathLike)) else audio for audio in audios]
+    results = [None] * len(audios)
+    with metrics.span("batch", engine=engine.name, clips=len(audios)) as span:
+        voiced = []
+        for i, audio in enumerate(audios):
+            if len(audio) > 30 * SAMPLE_RATE:
+                results[i] = transcribe_segments(audio, show_status=False)
+            elif VAD_MODE == "off" or detect_speech(audio):
+                voiced.append(i)
+        if voiced:
+            for i, result in zip(voiced, engine.transcribe_batch([audios[i] for i in voiced])):
+                results[i] = Segments.from_result(result)
+        span.set(voiced=len(voiced), audio_seconds=sum(len(audio) for audio in audios) / SAMPLE_RATE)
+    return [segments or Segments.from_result({"text": "", "segments": []}) for segments in results]
+
+def transcribe_appended(audio_file, offset, previous=None, tail=None, show_status=True):
+    """
+    Transcreve só o áudio acrescentado a uma gravação e junta à transcrição anterior.
+    
+    Args:
+        audio_file: Caminho da gravação continuada
+        offset: Duração da gravação antes da continuação, em segundos
+        previous: Segments da transcrição anterior (None transcreve desde offset)
+        tail: Segments do trecho novo, se já transcritos durante a gravação
+        show_status: Exibir mensagens de progresso
+    
+    Returns:
+        Segments da gravação inteira
+    """
+    if tail is None:
+        audio = load_audio(audio_file, start_seconds=offset)
+        if show_status:
+            print(ui['transcribing_tail'].format(len(audio) / SAMPLE_RATE))
+        tail = transcribe_segments(audio, show_status=False)
+    tail = tail.shifted(offset)
+    if previous is None:
+        return tail
+    
+    # A diarização do trecho novo não conhece os falantes anteriores: numerá-los depois deles
+    if previous.has_speakers and tail.has_speakers:
+        known = tail.speakers >= 0
+        tail.speakers[known] += int(previous.speakers.max()) + 1
+    return Segments.concatenate([previous, tail])
+
+class LiveTranscriber:
+    """
+    Transcreve o áudio em trechos enquanto a gravação continua.
+    
+    Os blocos recebidos são acumulados até formar uma janela de
+    LIVE_CHUNK_SECONDS. O corte é feito no ponto de menor energia do final
+    da janela (pausa na fala); se não houver pausa, a janela é cortada no
+    tamanho fixo e mantém LIVE_OVERLAP_SECONDS de sobreposição com o
+    trecho seguinte. Cada trecho é transcrito por uma thread dedicada, e
+    nos trechos sobrepostos cada segmento é mantido apenas pelo trecho que
+    contém o seu centro.
+    
+    A fila de trechos guarda no máximo LIVE_MAX_PENDING itens. Com block=True
+    (leitura de arquivo), feed() espera o motor alcançar a leitura; com
+    block=False (gravação, que não pode parar), o trecho excedente é
+    descartado com um aviso e dropped_seconds registra o que faltou, para
+    que a gravação seja transcrita de novo ao final.
+    """
+    
+    def __init__(self, fs=16000, chunk_seconds=LIVE_CHUNK_SECONDS,
+                 overlap_seconds=LIVE_OVERLAP_SECONDS, echo=True, block=True):
+        import queue
+        self.fs = fs
+        self.chunk_size = int(chunk_seconds * fs)
+        self.overlap_size = int(overlap_seconds * fs)
+        self.echo = echo
+        self.block = block
+        self.segments = []
+        self.dropped_seconds = 0.0
+        self._pending = []
+        self._pending_size = 0
+        self._offset = 0
+        self._keep_from = 0.0
+        self._error = None
+        self._chunks = queue.Queue(maxsize=max(1, LIVE_MAX_PENDING))
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+    
+    def feed(self, block):
+        """Recebe um bloco de áudio gravado (frames x canais)"""
+        block = np.asarray(block, dtype=np.float32).reshape(len(block), -1).mean(axis=1)
+        self._pending.append(block)
+        self._pending_size += len(block)
+        # Blocos maiores que a janela rendem vários trechos de uma vez
+        while self._pending_size >= self.chunk_size:
+            self._cut()
+    
+    def _cut(self):
+        """Separa um trecho do áudio acumulado e envia para transcrição"""
+        audio = np.concatenate(self._pending)
+        cut, silent = self._find_boundary(audio[:self.chunk_size])
+        if silent:
+            rest_start = cut
+            keep_to = (self._offset + cut) / self.fs
+        else:
+            rest_start = max(0, cut - self.overlap_size)
+            keep_to = (self._offset + cut - self.overlap_size / 2) / self.fs
+        self._enqueue((audio[:cut], self._offset / self.fs, self._keep_from, keep_to))
+        self._keep_from = keep_to
+        self._offset += rest_start
+        rest = audio[rest_start:]
+        self._pending = [rest]
+        self._pending_size = len(rest)
+    
+    def _enqueue(self, item):
+        """Envia um trecho para a thread de transcrição, esperando ou descartando se a fila estiver cheia"""
+        import queue
+        if self.block:
+            self._chunks.put(item)
+            return
+        try:
+            self._chunks.put_nowait(item)
+        except queue.Full:
+            seconds = len(item[0]) / self.fs
+            self.dropped_seconds += seconds
+            print(ui['live_dropped'].format(seconds))
+    
+    def _find_boundary(self, audio, frame_ms=30, search_fraction=0.25):
+        """
+        Procura o quadro de menor energia no último quarto da janela.
+        
+        Returns:
+            Tupla (posição do corte, True se o corte caiu numa pausa)
+        """
+        frame = int(self.fs * frame_ms / 1000)
+        start = int(len(audio) * (1 - search_fraction))
+        region = audio[start:start + (len(audio) - start) // frame * frame]
+        if len(region) < frame:
+            return len(audio), False
+        energy = np.sqrt(np.mean(region.reshape(-1, frame) ** 2, axis=1))
+        quietest = int(np.argmin(energy))
+        threshold = max(1e-4, 0.1 * float(np.sqrt(np.mean(audio ** 2))))
+        if energy[quietest] <= threshold:
+            return start + quietest * frame + frame // 2, True
+        return len(audio), False
+    
+    def _run(self):
+        """Thread de transcrição dos trechos"""
+        engine = None
+        previous = ""
+        while True:
+            item = self._chunks.get()
+            if item is None:
+                break
+            if self._error is not None:
+                # Após uma falha, a fila continua sendo esvaziada (feed() não trava); finish() repassa o erro
+                continue
+            chunk, offset, keep_from, keep_to = item
+            try:
+                engine = engine or get_transcription_engine()
+                result = run_engine(engine, chunk, initial_prompt=previous[-200:] or None)
+                segments = Segments.from_result(result).shifted(offset)
+            except Exception as e:
+                self._error = e
+                continue
+            middle = (segments.starts + segments.ends) / 2
+            segments = segments.select((middle >= keep_from) & (middle < keep_to))
+            if len(segments):
+                self.segments.append(segments)
+                previous = f"{previous} {segments.text}"
+                if self.echo:
+                    print(f"📝 {segments.text}")
+    
+    def finish(self):
+        """
+        Transcreve o áudio restante e aguarda a thread de transcrição.
+        
+        Returns:
+            Segments com a transcrição completa (com lacunas se dropped_seconds > 0)
+        
+        Raises:
+            Exception: O erro de transcrição de qualquer trecho
+        """
+        if self._pending_size > 0:
+            # A gravação já terminou: o último trecho espera a vez em vez de ser descartado
+            self._chunks.put((np.concatenate(self._pending), self._offset / self.fs,
+                              self._keep_from, float('inf')))
+            self._pending = []
+            self._pending_size = 0
+        self._chunks.put(None)
+        self._worker.join()
+        if self._error is not None:
+            raise self._error
+        return Segments.concatenate(self.segments)
+
+class LLMBackend:
+    """
+    Interface para backends de IA assíncronos.
+    
+    Cada backend mantém uma sessão HTTP com conexões reutilizáveis (keep-alive),
+    limita o número de requisições simultâneas e repete chamadas que falham
+    por erros transitórios, com espera exponencial entre as tentativas.
+    Subclasses implementam apenas _request().
+    """
+    
+    name = None
+    
+    def __init__(self, concurrency=1, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._session = None
+        self._semaphore = None
+    
+    async def _get_session(self):
+        """Cria a sessão HTTP compartilhada no primeiro uso"""
+        if self._session is None or self._session.closed:
+            import asyncio
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, sock_read=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+    
+    async def generate(self, prompt, text, on_token=None, json_mode=False):
+        """
+        Gera uma resposta para o prompt e o texto informados.
+        
+        Args:
+            prompt: Instruções do sistema
+            text: Conteúdo a ser processado
+            on_token: Função opcional chamada com cada trecho recebido
+            json_mode: Pedir ao servidor uma resposta em JSON válido
+        
+        Returns:
+            Resposta completa
+        
+        Raises:
+            Exception: Se as tentativas se esgotarem ou se a conexão cair depois
+                de algum trecho ter sido entregue a on_token
+        """
+        import asyncio
+        session = await self._get_session()
+        async with self._semaphore:
+            with metrics.span("llm", backend=self.name, model=MODEL,
+                              prompt_tokens=estimate_tokens(prompt) + estimate_tokens(text)) as span:
+                emitted = []
+                if on_token is not None:
+                    # Repetir após trechos já exibidos duplicaria a resposta na tela
+                    receiver = on_token
+                    
+                    def on_token(token):
+                        emitted.append(len(token))
+                        receiver(token)
+                
+                if span:
+                    # Registrar o tempo até o primeiro token sem alterar o callback do chamador
+                    started = time.perf_counter()
+                    callback = on_token
+                    
+                    def on_token(token):
+                        if 'ttft' not in span.attrs:
+                            span.set(ttft=round(time.perf_counter() - started, 4))
+                        if callback is not None:
+                            callback(token)
+                
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        response = await self._request(session, prompt, text, on_token, json_mode)
+                        span.set(completion_tokens=estimate_tokens(response), attempts=attempt + 1)
+                        return response
+                    except (aiohttp.ClientError, asyncio.TimeoutError, LLMRetryableError) as e:
+                        if attempt == self.max_retries or emitted:
+                            raise Exception(f"Erro ao chamar {self.name}: {e}")
+                        await asyncio.sleep(min(2 ** attempt, 30))
+    
+    async def _request(self, session, prompt, text, on_token, json_mode=False):
+        raise NotImplementedError
+    
+    async def embed(self, texts, model):
+        """
+        Gera vetores de embedding para uma lista de textos.
+        
+        Args:
+            texts: Textos a serem convertidos
+            model: Modelo de embedding
+        
+        Returns:
+            Lista de vetores (listas de floats), na ordem dos textos
+        """
+        import asyncio
+        session = await self._get_session()
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return await self._embed(session, texts, model)
+                except (aiohttp.ClientError, asyncio.TimeoutError, LLMRetryableError) as e:
+                    if attempt == self.max_retries:
+                        raise Exception(f"Erro ao chamar {self.name}: {e}")
+                    await asyncio.sleep(min(2 ** attempt, 30))
+    
+    async def _embed(self, session, texts, model):
+        raise NotImplementedError
+    
+    async def warm_up(self):
+        """Prepara o modelo antes do primeiro uso (sem efeito em backends remotos)"""
+        return False
+    
+    @staticmethod
+    async def _check_status(response):
+        """Classifica erros HTTP entre transitórios e definitivos"""
+        if response.status == 200:
+            return
+        body = await response.text()
+        if response.status == 429 or response.status >= 500:
+            raise LLMRetryableError(f"HTTP {response.status}: {body[:200]}")
+        raise Exception(f"HTTP {response.status}: {body[:200]}")
+    
+    async def close(self):
+        """Fecha a sessão HTTP"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+class LLMRetryableError(Exception):
+    """Erro transitório do backend de IA (limite de taxa, falha do servidor)"""
+
+class OpenAIBackend(LLMBackend):
+    """Backend da API de Chat Completions da OpenAI (respostas via SSE)"""
+    
+    name = "openai"
+    
+    async def _request(self, session, prompt, text, on_token, json_mode=False):
+        payload = {
+            "model": MODEL,
+            "messages": [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": text}
+            ],
+            "temperature": 0.7,
+            "stream": True,
+        }
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
+        parts = []
+        async with session.post(f"{OPENAI_BASE_URL}/chat/completions", json=payload, headers=headers) as response:
+            await self._check_status(response)
+            async for line in response.content:
+                line = line.decode('utf-8').strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                token = choices[0].get("delta", {}).get("content")
+                if token:
+                    parts.append(token)
+                    if on_token is not None:
+                        on_token(token)
+        return "".join(parts)
+
+    async def _embed(self, session, texts, model):
+        headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
+        async with session.post(f"{OPENAI_BASE_URL}/embeddings", json={"model": model, "input": texts},
+                                headers=headers) as response:
+            await self._check_status(response)
+            data = await response.json()
+        return [item["embedding"] for item in sorted(data["data"], key=lambda item: item["index"])]
+
+class OllamaBackend(LLMBackend):
+    """
+    Backend do Ollama (/api/generate com respostas NDJSON).
+    
+    Cada requisição envia keep_alive, para o modelo não ser descarregado
+    entre uma gravação e outra, e um num_ctx suficiente para o texto. O
+    Ollama recarrega o modelo quando num_ctx muda, por isso o contexto só
+    cresce durante a sessão e é arredondado para potências de dois.
+    """
+    
+    name = "ollama"
+    
+    # Tokens reservados para a resposta no cálculo do contexto
+    RESPONSE_TOKENS = 1024
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_ctx = None
+    
+    @staticmethod
+    def keep_alive():
+        """Valor de keep_alive: duração ("30m") ou segundos (-1 mantém o modelo carregado)"""
+        try:
+            return int(OLLAMA_KEEP_ALIVE)
+        except ValueError:
+            return OLLAMA_KEEP_ALIVE
+    
+    def options(self, tokens):
+        """
+        Opções do modelo para uma entrada com o número de tokens informado.
+        
+        Args:
+            tokens: Tokens estimados do prompt e do texto
+        
+        Returns:
+            Dicionário com num_ctx (e num_thread, se configurado)
+        """
+        num_ctx = 2048
+        while num_ctx < tokens + self.RESPONSE_TOKENS and num_ctx < OLLAMA_NUM_CTX_MAX:
+            num_ctx *= 2
+        self.num_ctx = min(max(num_ctx, self.num_ctx or 0), OLLAMA_NUM_CTX_MAX)
+        options = {"num_ctx": self.num_ctx}
+        if OLLAMA_NUM_THREAD > 0:
+            options["num_thread"] = OLLAMA_NUM_THREAD
+        return options
+    
+    async def loaded_models(self):
+        """
+        Consulta os modelos carregados no servidor (/api/ps).
+        
+        Returns:
+            Dicionário nome -> informações do modelo
+        """
+        session = await self._get_session()
+        async with session.get(f"{OLLAMA_URL}/api/ps") as response:
+            await self._check_status(response)
+            data = await response.json()
+        return {model.get("model") or model.get("name"): model for model in data.get("models") or []}
+    
+    async def warm_up(self):
+        """
+        Carrega o modelo no servidor sem gerar texto.
+        
+        O contexto é dimensionado para o maior trecho enviado pela
+        sumarização, de modo que as requisições seguintes não provoquem uma
+        recarga. Se o modelo já estiver carregado com contexto suficiente,
+        apenas o keep_alive é renovado.
+        
+        Returns:
+            True se o modelo precisou ser carregado
+        """
+        with metrics.span("llm_warmup", backend=self.name, model=MODEL) as span:
+            name = MODEL if ":" in MODEL else f"{MODEL}:latest"
+            loaded = (await self.loaded_models()).get(name)
+            if loaded is not None and loaded.get("context_length"):
+                self.num_ctx = max(self.num_ctx or 0, loaded["context_length"])
+            payload = {
+                "model": MODEL,
+                "keep_alive": self.keep_alive(),
+                "options": self.options(SUMMARY_CHUNK_TOKENS[self.name] + 512),
+            }
+            session = await self._get_session()
+            async with session.post(f"{OLLAMA_URL}/api/generate", json=payload) as response:
+                await self._check_status(response)
+                await response.read()
+            span.set(cold=loaded is None, num_ctx=self.num_ctx)
+            return loaded is None
+    
+    async def _request(self, session, prompt, text, on_token, json_mode=False):
+        payload = {
+            "model": MODEL,
+            "prompt": f"{prompt}\n\n{text}",
+            "stream": True,
+            "keep_alive": self.keep_alive(),
+            "options": self.options(estimate_tokens(prompt) + estimate_tokens(text)),
+        }
+        if json_mode:
+            payload["format"] = "json"
+        parts = []
+        async with session.post(f"{OLLAMA_URL}/api/generate", json=payload) as response:
+            await self._check_status(response)
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise Exception(chunk["error"])
+                token = chunk.get("response", "")
+                if token:
+                    parts.append(token)
+                    if on_token is not None:
+                        on_token(token)
+                if chunk.get("done"):
+                    break
+        return "".join(parts)
+
+    async def _embed(self, session, texts, model):
+        async with session.post(f"{OLLAMA_URL}/api/embed", json={"model": model, "input": texts}) as response:
+            await self._check_status(response)
+            data = await response.json()
+        return data["embeddings"]
+
+# Backends de IA disponíveis, por nome
+LLM_BACKENDS = {
+    'openai': OpenAIBackend,
+    'ollama': OllamaBackend,
+}
+
+class LLMRuntime:
+    """
+    Laço de eventos em uma thread dedicada para os backends de IA.
+    
+    Permite que o código síncrono (menu, lote, threads de trabalho) use os
+    backends assíncronos compartilhando as mesmas sessões e conexões.
+    """
+    
+    def __init__(self):
+        self._loop = None
+        self._backends = {}
+        self._lock = threading.Lock()
+    
+    def _ensure_loop(self):
+        import asyncio
+        with self._lock:
+            if self._loop is None:
+                import atexit
+                self._loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                thread.start()
+                atexit.register(self.close)
+        return self._loop
+    
+    def backend(self, name):
+        """Retorna a instância compartilhada do backend"""
+        with self._lock:
+            if name not in self._backends:
+                self._backends[name] = LLM_BACKENDS[name](concurrency=SUMMARY_CONCURRENCY[name])
+            return self._backends[name]
+    
+    def run(self, coro):
+        """Executa uma corrotina no laço de eventos e aguarda o resultado"""
+        import asyncio
+        parent = _current_span.get()
+        
+        async def in_context():
+            # As etapas criadas no laço ficam ligadas à etapa da thread que chamou
+            _current_span.set(parent)
+            return await coro
+        
+        return asyncio.run_coroutine_threadsafe(in_context(), self._ensure_loop()).result()
+    
+    def submit(self, coro):
+        """Agenda uma corrotina no laço de eventos sem aguardar o resultado"""
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+    
+    def close(self):
+        """Fecha as sessões HTTP e encerra o laço de eventos"""
+        if self._loop is None:
+            return
+        for backend in list(self._backends.values()):
+            self.run(backend.close())
+        self._backends.clear()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+# Laço de eventos compartilhado pelos backends de IA
+llm_runtime = LLMRuntime()
+
+def get_llm_backend():
+    """
+    Identifica o backend de IA disponível.
+    
+    Returns:
+        "openai" ou "ollama"
+    """
+    if not AIOHTTP_AVAILABLE:
+        raise Exception(ui['no_ai'])
+    if OPENAI_API_KEY:
+        return "openai"
+    return "ollama"
+
+def warm_up_llm():
+    """
+    Carrega o modelo de IA em segundo plano, se o backend precisar.
+    
+    Chamada ao iniciar uma gravação ou transcrição, para que a carga do
+    modelo no Ollama aconteça enquanto o áudio é capturado. Falhas são
+    ignoradas: a chamada de sumarização reportará o erro, se persistir.
+    
+    Returns:
+        Future da carga, ou None se não houver o que carregar
+    """
+    if not OLLAMA_WARMUP or not AIOHTTP_AVAILABLE or get_llm_backend() != "ollama":
+        return None
+    future = llm_runtime.submit(llm_runtime.backend("ollama").warm_up())
+    future.add_done_callback(lambda f: f.exception())
+    return future
+
+def call_llm(prompt, text, on_token=None):
+    """
+    Envia um prompt e um texto para o backend de IA configurado.
+    
+    Args:
+        prompt: Instruções do sistema
+        text: Conteúdo a ser processado
+        on_token: Função opcional chamada com cada trecho da resposta
+    
+    Returns:
+        Resposta gerada
+    """
+    backend = llm_runtime.backend(get_llm_backend())
+    return llm_runtime.run(backend.generate(prompt, text, on_token))
+
+def estimate_tokens(text):
+    """Estimativa aproximada do número de tokens (cerca de 4 caracteres por token)"""
+    return len(text) // 4 + 1
+
+def split_text(text, max_tokens):
+    """
+    Divide o texto em trechos que respeitam o limite de tokens.
+    
+    Os cortes são feitos preferencialmente entre frases; frases maiores que
+    o limite são divididas por palavras. Depois de 3/4 do limite, o trecho
+    também é fechado nas frases cujo hash cai em 1 de 8 valores: como esses
+    pontos dependem só do conteúdo, uma correção ou um acréscimo na
+    transcrição altera apenas os trechos vizinhos, e os demais continuam
+    iguais (e reaproveitáveis).
+    
+    Args:
+        text: Texto a ser dividido
+        max_tokens: Número máximo de tokens por trecho
+    
+    Returns:
+        Lista de trechos
+    """
+    import re
+    import zlib
+    sentences = re.split(r'(?<=[.!?])\s+|\n+', text)
+    chunks = []
+    current = []
+    current_tokens = 0
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if estimate_tokens(sentence) > max_tokens:
+            # Frase longa demais: dividir por palavras
+            pieces = sentence.split()
+        else:
+            pieces = [sentence]
+        for piece in pieces:
+            tokens = estimate_tokens(piece)
+            if current and (current_tokens + tokens > max_tokens or
+                            (current_tokens >= max_tokens * 3 // 4 and
+                             zlib.crc32(current[-1].encode('utf-8')) % 8 == 0)):
+                chunks.append(" ".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def summarize_chunks(chunks, mode, backend):
+    """
+    Resume vários trechos da transcrição em paralelo (etapa map).
+    
+    Args:
+        chunks: Trechos da transcrição
+        mode: Modo (reunião ou diário)
+        backend: Backend de IA em uso
+    
+    Returns:
+        Lista de resumos parciais, na ordem dos trechos
+    """
+    import asyncio
+    prompt = get_chunk_prompt(mode)
+    llm = llm_runtime.backend(backend)
+    
+    # O limite de requisições simultâneas é aplicado pelo próprio backend
+    async def gather():
+        return await asyncio.gather(*(llm.generate(prompt, chunk) for chunk in chunks))
+    
+    return llm_runtime.run(gather())
+
+def generate_summary(text, mode, show_status=True, on_token=None):
+    """
+    Gera um resumo do texto transcrito usando IA.
+    
+    Transcrições maiores que o limite de tokens do backend são divididas em
+    trechos resumidos em paralelo; as notas parciais são então combinadas
+    (recursivamente, se necessário) no formato final do modo escolhido.
+    Com SUMMARY_STRUCTURED, o resumo é gerado em JSON e convertido para
+    Markdown (ver generate_summary_document).
+    
+    Args:
+        text: Texto transcrito
+        mode: Modo (reunião ou diário)
+        show_status: Exibir mensagens de progresso
+        on_token: Função opcional chamada com cada trecho do resumo final
+    
+    Returns:
+        Resumo gerado
+    """
+    if SUMMARY_STRUCTURED:
+        return generate_summary_document(text, mode, show_status, on_token)[0]
+    
+    if show_status:
+        print(ui['summarizing'])
+    
+    # Determinar o tipo de prompt baseado no modo
+    if mode == "meeting":
+        prompt = get_meeting_prompt(text)
+    else:
+        prompt = get_diary_prompt(text)
+    
+    backend = get_llm_backend()
+    with metrics.span("summarize", mode=mode, backend=backend, model=MODEL,
+                      input_tokens=estimate_tokens(text)) as span:
+        max_tokens = SUMMARY_CHUNK_TOKENS[backend]
+        
+        # Reaproveitar o resumo se a mesma transcrição já foi resumida
+        cache_key = result_cache.key('summary', result_cache.key(text), prompt, MODEL, backend)
+        cached = result_cache.get(cache_key)
+        span.set(cached=cached is not None)
+        if cached is not None:
+            return cached
+        
+        # Reduzir o texto até caber em uma única requisição
+        rounds = 0
+        while estimate_tokens(text) > max_tokens:
+            chunks = split_text(text, max_tokens)
+            if show_status:
+                print(ui['summarizing_chunks'].format(len(chunks)))
+            notes = "\n\n".join(summarize_chunks(chunks, mode, backend))
+            rounds += 1
+            if estimate_tokens(notes) >= estimate_tokens(text):
+                # As notas não encolheram; evitar um laço sem fim
+                text = notes
+                break
+            text = notes
+        
+        if on_token is not None:
+            summary = call_llm(prompt, text, on_token=on_token)
+        elif show_status and LLM_STREAM:
+            # Exibir o resumo à medida que é gerado
+            summary = call_llm(prompt, text, on_token=lambda token: print(token, end='', flush=True))
+            print()
+        else:
+            summary = call_llm(prompt, text)
+        span.set(output_tokens=estimate_tokens(summary), map_rounds=rounds)
+        result_cache.put(cache_key, summary)
+        return summary
+
+def get_meeting_prompt(text):
+    """Retorna o prompt para modo reunião no idioma correto"""
+    if LANGUAGE == 'pt':
+        return """
+        Você é um assistente especializado em resumir reuniões. 
+        Com base na transcrição fornecida, crie um resumo estruturado em formato Markdown com as seguintes seções:
+        
+        # Resumo de Reunião
+        
+        ## Participantes
+        (Liste os nomes mencionados; se a transcrição indicar falantes como "Falante 1", associe cada um ao nome citado quando possível)
+        
+        ## Pauta
+        (Identifique os principais tópicos discutidos)
+        
+        ## Pontos Principais
+        (Resuma os pontos-chave de cada tópico)
+        
+        ## Decisões
+        (Liste as decisões tomadas)
+        
+        ## Ações
+        (Liste as tarefas atribuídas e prazos)
+        
+        ## Próximos Passos
+        (Indique encaminhamentos e planejamento futuro)
+        """
+    elif LANGUAGE == 'en':
+        return """
+        You are an assistant specialized in summarizing meetings.
+        Based on the provided transcript, create a structured summary in Markdown format with the following sections:
+        
+        # Meeting Summary
+        
+        ## Participants
+        (List the names mentioned; if the transcript labels speakers as "Speaker 1", match each one to a mentioned name when possible)
+        
+        ## Agenda
+        (Identify the main topics discussed)
+        
+        ## Key Points
+        (Summarize the key points of each topic)
+        
+        ## Decisions
+        (List the decisions made)
+        
+        ## Actions
+        (List the assigned tasks and deadlines)
+        
+        ## Next Steps
+        (Indicate follow-ups and future planning)
+        """
+    else:  # 'es'
+        return """
+        Eres un asistente especializado en resumir reuniones.
+        Basado en la transcripción proporcionada, crea un resumen estructurado en formato Markdown con las siguientes secciones:
+        
+        # Resumen de Reunión
+        
+        ## Participantes
+        (Enumera los nombres mencionados; si la transcripción indica hablantes como "Hablante 1", asocia cada uno al nombre citado cuando sea posible)
+        
+        ## Agenda
+        (Identifica los principales temas discutidos)
+        
+        ## Puntos Clave
+        (Resume los puntos clave de cada tema)
+        
+        ## Decisiones
+        (Enumera las decisiones tomadas)
+        
+        ## Acciones
+        (Enumera las tareas asignadas y plazos)
+        
+        ## Próximos Pasos
+        (Indica seguimientos y planificación futura)
+        """
+
+def get_diary_prompt(text):
+    """Retorna o prompt para modo diário no idioma correto"""
     if LANGUAGE == 'pt':
         return """
         Você é um assistente especializado em organizar reflexões pessoais.
@@ -441,13 +3474,1248 @@ def get_diary_prompt(text):
         (Enumera planes o intenciones futuras mencionadas)
         """
 
-def save_transcript(transcript, timestamp):
+def get_chunk_prompt(mode):
+    """Retorna o prompt para resumir um trecho de uma transcrição longa"""
+    if LANGUAGE == 'pt':
+        focus = ("participantes, tópicos, pontos principais, decisões, ações com responsáveis e prazos, próximos passos"
+                 if mode == "meeting" else
+                 "atividades, desafios, conquistas, reflexões e planos")
+        return f"""
+        Você receberá um trecho de uma transcrição mais longa.
+        Extraia notas concisas em tópicos sobre: {focus}.
+        Preserve nomes, números e datas exatamente como mencionados. Não invente informações.
+        """
+    elif LANGUAGE == 'en':
+        focus = ("participants, topics, key points, decisions, actions with owners and deadlines, next steps"
+                 if mode == "meeting" else
+                 "activities, challenges, achievements, reflections and plans")
+        return f"""
+        You will receive an excerpt from a longer transcript.
+        Extract concise bullet-point notes about: {focus}.
+        Keep names, numbers and dates exactly as mentioned. Do not invent information.
+        """
+    else:  # 'es'
+        focus = ("participantes, temas, puntos clave, decisiones, acciones con responsables y plazos, próximos pasos"
+                 if mode == "meeting" else
+                 "actividades, desafíos, logros, reflexiones y planes")
+        return f"""
+        Recibirás un fragmento de una transcripción más larga.
+        Extrae notas concisas en viñetas sobre: {focus}.
+        Conserva nombres, números y fechas tal como se mencionan. No inventes información.
+        """
+
+# Campos do resumo estruturado, por modo
+SUMMARY_FIELDS = {
+    'meeting': ('participants', 'agenda', 'key_points', 'decisions', 'actions', 'next_steps'),
+    'diary': ('date', 'activities', 'challenges', 'achievements', 'reflections', 'plans'),
+}
+
+# Títulos e instruções de cada campo do resumo estruturado, por idioma
+SUMMARY_SECTIONS = {
+    'pt': {
+        'meeting': "Resumo de Reunião",
+        'diary': "Diário Pessoal",
+        'empty': "Nada registrado",
+        'owner': "responsável",
+        'due': "prazo",
+        'participants': ("Participantes", "nomes mencionados; se a transcrição indicar falantes como \"Falante 1\", associe cada um ao nome citado quando possível"),
+        'agenda': ("Pauta", "principais tópicos discutidos"),
+        'key_points': ("Pontos Principais", "pontos-chave de cada tópico"),
+        'decisions': ("Decisões", "decisões tomadas"),
+        'actions': ("Ações", "tarefas atribuídas, como objetos {\"task\": tarefa, \"owner\": responsável, \"due\": prazo}"),
+        'next_steps': ("Próximos Passos", "encaminhamentos e planejamento futuro"),
+        'date': ("Data", "data mencionada no áudio, ou texto vazio"),
+        'activities': ("Atividades", "principais atividades mencionadas"),
+        'challenges': ("Desafios", "problemas ou dificuldades mencionados"),
+        'achievements': ("Conquistas", "realizações e pontos positivos"),
+        'reflections': ("Reflexões", "pensamentos e reflexões pessoais"),
+        'plans': ("Planejamento", "planos ou intenções futuras"),
+    },
+    'en': {
+        'meeting': "Meeting Summary",
+        'diary': "Personal Journal",
+        'empty': "Nothing recorded",
+        'owner': "owner",
+        'due': "due",
+        'participants': ("Participants", "names mentioned; if the transcript labels speakers as \"Speaker 1\", match each one to a mentioned name when possible"),
+        'agenda': ("Agenda", "main topics discussed"),
+        'key_points': ("Key Points", "key points of each topic"),
+        'decisions': ("Decisions", "decisions made"),
+        'actions': ("Actions", "assigned tasks, as objects {\"task\": task, \"owner\": owner, \"due\": deadline}"),
+        'next_steps': ("Next Steps", "follow-ups and future planning"),
+        'date': ("Date", "date mentioned in the audio, or an empty string"),
+        'activities': ("Activities", "main activities mentioned"),
+        'challenges': ("Challenges", "problems or difficulties mentioned"),
+        'achievements': ("Achievements", "accomplishments and positive points"),
+        'reflections': ("Reflections", "thoughts and personal reflections"),
+        'plans': ("Planning", "future plans or intentions"),
+    },
+    'es': {
+        'meeting': "Resumen de Reunión",
+        'diary': "Diario Personal",
+        'empty': "Nada registrado",
+        'owner': "responsable",
+        'due': "plazo",
+        'participants': ("Participantes", "nombres mencionados; si la transcripción indica hablantes como \"Hablante 1\", asocia cada uno al nombre citado cuando sea posible"),
+        'agenda': ("Agenda", "principales temas discutidos"),
+        'key_points': ("Puntos Clave", "puntos clave de cada tema"),
+        'decisions': ("Decisiones", "decisiones tomadas"),
+        'actions': ("Acciones", "tareas asignadas, como objetos {\"task\": tarea, \"owner\": responsable, \"due\": plazo}"),
+        'next_steps': ("Próximos Pasos", "seguimientos y planificación futura"),
+        'date': ("Fecha", "fecha mencionada en el audio, o texto vacío"),
+        'activities': ("Actividades", "principales actividades mencionadas"),
+        'challenges': ("Desafíos", "problemas o dificultades mencionados"),
+        'achievements': ("Logros", "logros y puntos positivos"),
+        'reflections': ("Reflexiones", "pensamientos y reflexiones personales"),
+        'plans': ("Planificación", "planes o intenciones futuras"),
+    },
+}
+
+def get_summary_json_prompt(mode, chunk=False):
+    """
+    Retorna o prompt do resumo estruturado (JSON) no idioma correto.
+    
+    Args:
+        mode: Modo (reunião ou diário)
+        chunk: Prompt da etapa map, para um trecho de uma transcrição longa
+    
+    Returns:
+        Prompt com a lista de chaves esperadas
+    """
+    sections = SUMMARY_SECTIONS.get(LANGUAGE, SUMMARY_SECTIONS['en'])
+    fields = "\n".join(f"        - {field}: {sections[field][1]}" for field in SUMMARY_FIELDS[mode])
+    if LANGUAGE == 'pt':
+        if chunk:
+            intro = "Você receberá um trecho de uma transcrição mais longa. Extraia notas concisas do trecho."
+        else:
+            intro = ("Com base na transcrição fornecida, ou nas notas parciais em JSON de trechos consecutivos "
+                     "dela, crie o resumo completo, unindo as notas e removendo repetições.")
+        rules = ("Responda somente com um objeto JSON com as chaves abaixo, em que cada valor é uma lista de frases "
+                 "curtas em português (use [] quando não houver conteúdo):")
+        closing = "Preserve nomes, números e datas exatamente como mencionados. Não invente informações."
+    elif LANGUAGE == 'en':
+        if chunk:
+            intro = "You will receive an excerpt from a longer transcript. Extract concise notes from the excerpt."
+        else:
+            intro = ("Based on the provided transcript, or on partial JSON notes from consecutive excerpts of it, "
+                     "create the complete summary, merging the notes and removing repetitions.")
+        rules = ("Reply only with a JSON object with the keys below, where each value is a list of short sentences "
+                 "in English (use [] when there is no content):")
+        closing = "Keep names, numbers and dates exactly as mentioned. Do not invent information."
+    else:  # 'es'
+        if chunk:
+            intro = "Recibirás un fragmento de una transcripción más larga. Extrae notas concisas del fragmento."
+        else:
+            intro = ("Basado en la transcripción proporcionada, o en las notas parciales en JSON de fragmentos "
+                     "consecutivos de ella, crea el resumen completo, uniendo las notas y eliminando repeticiones.")
+        rules = ("Responde solo con un objeto JSON con las claves siguientes, donde cada valor es una lista de frases "
+                 "cortas en español (usa [] cuando no haya contenido):")
+        closing = "Conserva nombres, números y fechas tal como se mencionan. No inventes información."
+    return f"""
+        {intro}
+        {rules}
+{fields}
+        {closing}
+        """
+
+def parse_summary_json(reply, mode):
+    """
+    Valida a resposta JSON do modelo e normaliza os campos do resumo.
+    
+    Texto antes ou depois do objeto (como blocos ```json) é ignorado,
+    campos ausentes viram listas vazias, valores isolados viram listas e
+    chaves desconhecidas são descartadas.
+    
+    Args:
+        reply: Resposta do modelo
+        mode: Modo (reunião ou diário)
+    
+    Returns:
+        Dicionário com exatamente os campos de SUMMARY_FIELDS[mode]
+    
+    Raises:
+        Exception: Se a resposta não contiver um objeto JSON com os campos esperados
+    """
+    start, end = reply.find("{"), reply.rfind("}")
+    try:
+        data = json.loads(reply[start:end + 1]) if 0 <= start < end else None
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not any(field in data for field in SUMMARY_FIELDS[mode]):
+        raise Exception(f"Resposta do modelo não é um resumo JSON válido: {reply[:200]!r}")
+    
+    summary = {}
+    for field in SUMMARY_FIELDS[mode]:
+        value = data.get(field)
+        if field == 'date':
+            summary[field] = " ".join(map(str, value)) if isinstance(value, list) else str(value or "").strip()
+            continue
+        items = []
+        for item in value if isinstance(value, list) else [value] if value else []:
+            if field == 'actions':
+                if isinstance(item, dict):
+                    action = {key: str(item.get(key) or "").strip() for key in ('task', 'owner', 'due')}
+                else:
+                    action = {'task': str(item).strip(), 'owner': "", 'due': ""}
+                if action['task']:
+                    items.append(action)
+            else:
+                if isinstance(item, dict):
+                    item = "; ".join(str(v) for v in item.values() if v)
+                elif isinstance(item, list):
+                    item = "; ".join(str(v) for v in item if v)
+                item = str(item).strip()
+                if item:
+                    items.append(item)
+        summary[field] = items
+    return summary
+
+def render_summary(summary, mode):
+    """
+    Converte o resumo estruturado em Markdown, no formato dos prompts de cada modo.
+    
+    Args:
+        summary: Dicionário validado por parse_summary_json
+        mode: Modo (reunião ou diário)
+    
+    Returns:
+        Texto Markdown
+    """
+    sections = SUMMARY_SECTIONS.get(LANGUAGE, SUMMARY_SECTIONS['en'])
+    lines = [f"# {sections[mode]}", ""]
+    for field in SUMMARY_FIELDS[mode]:
+        lines += [f"## {sections[field][0]}", ""]
+        value = summary.get(field)
+        if field == 'date':
+            lines.append(value or datetime.now().strftime("%Y-%m-%d"))
+        elif not value:
+            lines.append(f"_{sections['empty']}_")
+        elif field == 'actions':
+            for action in value:
+                details = [f"{sections[key]}: {action[key]}" for key in ('owner', 'due') if action.get(key)]
+                lines.append(f"- {action['task']}" + (f" ({'; '.join(details)})" if details else ""))
+        else:
+            lines += [f"- {item}" for item in value]
+        lines.append("")
+    return "\n".join(lines)
+
+async def generate_json(llm, prompt, text, mode, on_token=None, attempts=2):
+    """
+    Pede um resumo em JSON ao backend, repetindo se a resposta for inválida.
+    
+    Args:
+        llm: Backend de IA
+        prompt: Prompt de get_summary_json_prompt
+        text: Transcrição ou notas parciais
+        mode: Modo (reunião ou diário)
+        on_token: Função opcional chamada com cada trecho da resposta
+        attempts: Número máximo de requisições
+    
+    Returns:
+        Dicionário validado por parse_summary_json
+    """
+    for attempt in range(attempts):
+        reply = await llm.generate(prompt, text, on_token, json_mode=True)
+        try:
+            return parse_summary_json(reply, mode)
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+
+def merge_notes(notes, mode, backend, max_tokens, on_token=None):
+    """
+    Combina as notas parciais em um único resumo (etapa reduce).
+    
+    Se as notas não couberem em uma requisição, são combinadas em grupos
+    consecutivos, recursivamente. Cada combinação fica no cache pelo seu
+    conteúdo, então só os grupos que contêm notas novas são refeitos.
+    
+    Args:
+        notes: Lista de dicionários de notas, na ordem dos trechos
+        mode: Modo (reunião ou diário)
+        backend: Backend de IA em uso
+        max_tokens: Limite de tokens por requisição
+        on_token: Função opcional chamada com cada trecho da resposta final
+    
+    Returns:
+        Dicionário com o resumo final
+    """
+    import asyncio
+    prompt = get_summary_json_prompt(mode)
+    llm = llm_runtime.backend(backend)
+    
+    async def merge(group, callback=None):
+        text = "\n".join(json.dumps(item, ensure_ascii=False) for item in group)
+        cache_key = result_cache.key('summary_merge', result_cache.key(text), prompt, MODEL, backend)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        merged = await generate_json(llm, prompt, text, mode, callback)
+        result_cache.put(cache_key, merged)
+        return merged
+    
+    while True:
+        sizes = [estimate_tokens(json.dumps(item, ensure_ascii=False)) for item in notes]
+        if sum(sizes) <= max_tokens or len(notes) == 1:
+            return llm_runtime.run(merge(notes, on_token))
+        
+        # Agrupar notas consecutivas até o limite (pelo menos duas por grupo)
+        groups, current, current_tokens = [], [], 0
+        for item, size in zip(notes, sizes):
+            if len(current) >= 2 and current_tokens + size > max_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(item)
+            current_tokens += size
+        groups.append(current)
+        
+        async def gather():
+            return await asyncio.gather(*(merge(group) for group in groups))
+        
+        notes = llm_runtime.run(gather())
+
+def generate_summary_document(text, mode, show_status=True, on_token=None, previous=None):
+    """
+    Gera o resumo estruturado e o documento JSON salvo ao lado do Markdown.
+    
+    Transcrições longas são divididas com split_text (cortes estáveis) e as
+    notas de cada trecho são guardadas no documento pelo hash do trecho.
+    Ao resumir de novo uma transcrição corrigida ou ampliada, os trechos
+    iguais aos do documento anterior (ou presentes no cache) não voltam ao
+    modelo: só os trechos alterados e a etapa final são refeitos.
+    
+    Args:
+        text: Texto transcrito
+        mode: Modo (reunião ou diário)
+        show_status: Exibir mensagens de progresso
+        on_token: Função opcional chamada com cada trecho da resposta final (JSON);
+            sem ela, com show_status e LLM_STREAM, o progresso da resposta é exibido
+        previous: Documento de um resumo anterior da mesma gravação (opcional)
+    
+    Returns:
+        Tupla (Markdown, documento); o documento é None se SUMMARY_STRUCTURED
+        estiver desativado
+    """
+    if not SUMMARY_STRUCTURED:
+        return generate_summary(text, mode, show_status, on_token), None
+    import asyncio
+    if show_status:
+        print(ui['summarizing'])
+    
+    # O JSON não é exibido token a token: uma linha de progresso mostra que a resposta está chegando
+    received = []
+    if on_token is None and show_status and LLM_STREAM:
+        def on_token(token):
+            received.append(token)
+            print("\r" + ui['summary_progress'].format(len(received)), end='', flush=True)
+    
+    backend = get_llm_backend()
+    text_hash = result_cache.key(text)
+    with metrics.span("summarize", mode=mode, backend=backend, model=MODEL, structured=True,
+                      input_tokens=estimate_tokens(text)) as span:
+        max_tokens = SUMMARY_CHUNK_TOKENS[backend]
+        document = {
+            'version': 1,
+            'mode': mode,
+            'language': LANGUAGE,
+            'backend': backend,
+            'model': MODEL,
+            'transcript_hash': text_hash,
+            'summary': None,
+            'chunks': [],
+        }
+        same_setup = previous is not None and all(previous.get(k) == document[k] for k in ('mode', 'language', 'backend', 'model'))
+        
+        # Mesma transcrição já resumida: nada a refazer
+        cache_key = result_cache.key('summary_json', text_hash, get_summary_json_prompt(mode), MODEL, backend)
+        cached = previous if same_setup and previous.get('transcript_hash') == text_hash else result_cache.get(cache_key)
+        span.set(cached=cached is not None)
+        if cached is not None:
+            document.update(summary=cached['summary'], chunks=cached['chunks'])
+            summary = render_summary(document['summary'], mode)
+            if show_status and LLM_STREAM:
+                print(summary)
+            return summary, document
+        
+        if estimate_tokens(text) <= max_tokens:
+            llm = llm_runtime.backend(backend)
+            document['summary'] = llm_runtime.run(generate_json(llm, get_summary_json_prompt(mode), text, mode, on_token))
+        else:
+            # Etapa map: notas de cada trecho, reaproveitando as que já existem
+            chunks = split_text(text, max_tokens)
+            known = {c['hash']: c['notes'] for c in previous['chunks']} if same_setup else {}
+            prompt = get_summary_json_prompt(mode, chunk=True)
+            llm = llm_runtime.backend(backend)
+            hashes = [result_cache.key(chunk) for chunk in chunks]
+            notes = {}
+            for chunk_hash in hashes:
+                found = known.get(chunk_hash) or result_cache.get(result_cache.key('summary_chunk', chunk_hash, prompt, MODEL, backend))
+                if found is not None:
+                    notes[chunk_hash] = found
+            missing = [(chunk_hash, chunk) for chunk_hash, chunk in zip(hashes, chunks) if chunk_hash not in notes]
+            if show_status:
+                print(ui['summarizing_chunks'].format(len(chunks)))
+                if len(missing) < len(chunks):
+                    print(ui['summary_chunks_reused'].format(len(chunks) - len(missing), len(chunks)))
+            
+            done = [len(chunks) - len(missing)]
+            
+            async def summarize_chunk(chunk):
+                result = await generate_json(llm, prompt, chunk, mode)
+                done[0] += 1
+                if show_status:
+                    print(ui['summary_chunk_done'].format(done[0], len(chunks)))
+                return result
+            
+            async def gather():
+                return await asyncio.gather(*(summarize_chunk(chunk) for _, chunk in missing))
+            
+            for (chunk_hash, _), result in zip(missing, llm_runtime.run(gather())):
+                notes[chunk_hash] = result
+                result_cache.put(result_cache.key('summary_chunk', chunk_hash, prompt, MODEL, backend), result)
+            document['chunks'] = [{'hash': chunk_hash, 'notes': notes[chunk_hash]} for chunk_hash in hashes]
+            span.set(chunks=len(chunks), chunks_reused=len(chunks) - len(missing))
+            
+            # Etapa reduce
+            document['summary'] = merge_notes([notes[chunk_hash] for chunk_hash in hashes], mode, backend,
+                                              max_tokens, on_token)
+        
+        result_cache.put(cache_key, {'summary': document['summary'], 'chunks': document['chunks']})
+        summary = render_summary(document['summary'], mode)
+        span.set(output_tokens=estimate_tokens(summary))
+        if received:
+            print()
+        if show_status and LLM_STREAM:
+            print(summary)
+        return summary, document
+
+def previous_summary_document(audio_file, mode):
+    """
+    Documento JSON do último resumo da gravação, se houver um no mesmo modo.
+    
+    Args:
+        audio_file: Caminho do arquivo de áudio
+        mode: Modo (reunião ou diário)
+    
+    Returns:
+        Documento salvo por save_summary, ou None
+    """
+    row = catalog.get(audio_file)
+    if row is None or not row.get('summary_path') or row.get('mode') != mode:
+        return None
+    try:
+        with open(os.path.splitext(row['summary_path'])[0] + ".json", 'r', encoding='utf-8') as f:
+            document = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return document if isinstance(document, dict) and document.get('mode') == mode else None
+
+class Catalog:
+    """
+    Catálogo SQLite das gravações, transcrições e resumos.
+    
+    Cada gravação tem uma linha com duração, modo, modelos usados, tempos
+    de processamento, hashes e caminhos dos arquivos gerados. O catálogo é
+    atualizado à medida que os arquivos são salvos, e a pasta de saída só é
+    reexaminada quando a data de modificação do diretório muda.
+    """
+    
+    COLUMNS = (
+        'audio_path', 'name', 'created_at', 'size', 'mtime', 'duration', 'audio_hash', 'mode',
+        'transcript_path', 'transcript_hash', 'transcribed_at', 'transcription_engine',
+        'whisper_model', 'transcribe_seconds', 'summary_path', 'summarized_at', 'llm_backend',
+        'llm_model', 'summary_seconds', 'dropped_seconds',
+    )
+    
+    # Filtros aceitos por page(): status
+    STATUS_FILTERS = {
+        'pending': "transcript_path IS NULL",
+        'transcribed': "transcript_path IS NOT NULL AND summary_path IS NULL",
+        'done': "summary_path IS NOT NULL",
+    }
+    
+    def __init__(self, path=None):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        """Abre o banco (criando as tabelas) no primeiro uso"""
+        if self._conn is None:
+            import sqlite3
+            path = self.path or CATALOG_PATH or os.path.join(OUTPUT_DIR, "catalog.db")
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            # WAL mantém o arquivo de log entre os commits: com o banco dentro da pasta de saída,
+            # um journal criado e apagado a cada commit alteraria a data da pasta que sync() compara
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS recordings (
+                    audio_path TEXT PRIMARY KEY, name TEXT, created_at TEXT, size INTEGER,
+                    mtime REAL, duration REAL, audio_hash TEXT, mode TEXT,
+                    transcript_path TEXT, transcript_hash TEXT, transcribed_at TEXT,
+                    transcription_engine TEXT, whisper_model TEXT, transcribe_seconds REAL,
+                    summary_path TEXT, summarized_at TEXT, llm_backend TEXT, llm_model TEXT,
+                    summary_seconds REAL, dropped_seconds REAL
+                );
+                CREATE INDEX IF NOT EXISTS recordings_created ON recordings (created_at);
+                CREATE INDEX IF NOT EXISTS recordings_mode ON recordings (mode, created_at);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+            # Catálogos criados antes do registro do áudio descartado na gravação
+            columns = [row['name'] for row in self._conn.execute("PRAGMA table_info(recordings)")]
+            if 'dropped_seconds' not in columns:
+                self._conn.execute("ALTER TABLE recordings ADD COLUMN dropped_seconds REAL")
+        return self._conn
+    
+    @staticmethod
+    def _created_at(name, mtime):
+        """Data da gravação, a partir do nome do arquivo ou da modificação"""
+        stem = Path(name).stem
+        try:
+            return datetime.strptime(stem[-19:], "%Y-%m-%d_%H-%M-%S").strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
+    
+    @staticmethod
+    def _duration(path):
+        """Duração do áudio lida do cabeçalho, sem decodificar o arquivo"""
+        info = audio_info(path)
+        return info[1] / info[0] if info else None
+    
+    def update(self, audio_path, **fields):
+        """
+        Insere ou atualiza a linha de uma gravação.
+        
+        Args:
+            audio_path: Caminho do arquivo de áudio
+            fields: Colunas a atualizar (ver COLUMNS)
+        """
+        audio_path = os.path.abspath(audio_path)
+        with self._lock:
+            conn = self._connect()
+            if conn.execute("SELECT 1 FROM recordings WHERE audio_path = ?", (audio_path,)).fetchone() is None:
+                stat = os.stat(audio_path) if os.path.exists(audio_path) else None
+                mtime = stat.st_mtime if stat else time.time()
+                conn.execute(
+                    "INSERT INTO recordings (audio_path, name, created_at, size, mtime, duration) VALUES (?, ?, ?, ?, ?, ?)",
+                    (audio_path, os.path.basename(audio_path), self._created_at(audio_path, mtime),
+                     stat.st_size if stat else None, mtime, self._duration(audio_path) if stat else None),
+                )
+            if fields:
+                columns = [c for c in fields if c in self.COLUMNS]
+                conn.execute(
+                    f"UPDATE recordings SET {', '.join(f'{c} = ?' for c in columns)} WHERE audio_path = ?",
+                    [fields[c] for c in columns] + [audio_path],
+                )
+            conn.commit()
+    
+    def get(self, audio_path):
+        """
+        Consulta a linha de uma gravação.
+        
+        Returns:
+            Dicionário com as colunas, ou None se a gravação não está no catálogo
+        """
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM recordings WHERE audio_path = ?",
+                                          (os.path.abspath(audio_path),)).fetchone()
+        return dict(row) if row is not None else None
+    
+    def sync(self, directory=None):
+        """
+        Sincroniza o catálogo com os arquivos de áudio da pasta.
+        
+        Só percorre a pasta se ela mudou desde a última sincronização;
+        arquivos novos são inseridos e arquivos removidos são descartados.
+        """
+        directory = os.path.abspath(directory or OUTPUT_DIR)
+        if not os.path.isdir(directory):
+            return
+        with self._lock:
+            conn = self._connect()
+            # Lida depois de abrir o banco, que pode criar arquivos na própria pasta
+            dir_mtime = str(os.stat(directory).st_mtime_ns)
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (f"mtime:{directory}",)).fetchone()
+            if row is not None and row['value'] == dir_mtime:
+                return
+            known = {r['audio_path'] for r in conn.execute(
+                "SELECT audio_path FROM recordings WHERE audio_path LIKE ?", (os.path.join(directory, '%'),))}
+            present = set()
+            for entry in os.scandir(directory):
+                if entry.name.endswith(AUDIO_EXTENSIONS) and entry.is_file():
+                    present.add(entry.path)
+                    if entry.path not in known:
+                        stat = entry.stat()
+                        conn.execute(
+                            "INSERT INTO recordings (audio_path, name, created_at, size, mtime, duration) VALUES (?, ?, ?, ?, ?, ?)",
+                            (entry.path, entry.name, self._created_at(entry.name, stat.st_mtime),
+                             stat.st_size, stat.st_mtime, self._duration(entry.path)),
+                        )
+            removed = [(path,) for path in known - present if os.path.dirname(path) == directory]
+            conn.executemany("DELETE FROM recordings WHERE audio_path = ?", removed)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (f"mtime:{directory}", dir_mtime))
+            conn.commit()
+    
+    def page(self, page=0, page_size=20, date=None, mode=None, status=None, directory=None):
+        """
+        Consulta uma página de gravações, das mais recentes para as mais antigas.
+        
+        Args:
+            page: Número da página (a partir de 0)
+            page_size: Gravações por página
+            date: Prefixo da data (AAAA, AAAA-MM ou AAAA-MM-DD)
+            mode: meeting ou diary
+            status: pending, transcribed ou done
+            directory: Restringe a uma pasta (padrão: OUTPUT_DIR)
+        
+        Returns:
+            Tupla (lista de linhas, total de gravações que atendem aos filtros)
+        """
+        directory = os.path.abspath(directory or OUTPUT_DIR)
+        where = ["audio_path LIKE ?"]
+        params = [os.path.join(directory, '%')]
+        if date:
+            where.append("created_at LIKE ?")
+            params.append(f"{date}%")
+        if mode:
+            where.append("mode = ?")
+            params.append(mode)
+        if status:
+            where.append(self.STATUS_FILTERS[status])
+        clause = " AND ".join(where)
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute(f"SELECT COUNT(*) FROM recordings WHERE {clause}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM recordings WHERE {clause} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                params + [page_size, page * page_size],
+            ).fetchall()
+        return [dict(row) for row in rows], total
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Catálogo de gravações (aberto no primeiro uso)
+catalog = Catalog()
+
+class JobQueue:
+    """
+    Fila persistente (SQLite) do processamento das gravações.
+    
+    Cada job percorre as etapas transcribe e summarize. Um worker reserva o
+    job por JOB_LEASE_SECONDS e renova a reserva enquanto trabalha; se o
+    processo morrer, a reserva expira e o job volta para a fila na mesma
+    etapa em que parou. Vários processos podem consumir a mesma fila.
+    """
+    
+    STAGES = ('transcribe', 'summarize')
+    
+    def __init__(self, path=None):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        """Abre o banco (criando a tabela) no primeiro uso"""
+        if self._conn is None:
+            import sqlite3
+            path = self.path or JOB_QUEUE_PATH or os.path.join(OUTPUT_DIR, "jobs.db")
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            # Transações explícitas: a reserva de um job precisa de BEGIN IMMEDIATE
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY, audio_path TEXT, timestamp TEXT, mode TEXT,
+                    stage TEXT, status TEXT, attempts INTEGER DEFAULT 0,
+                    transcript_path TEXT, summary_path TEXT, error TEXT,
+                    created_at REAL, updated_at REAL, leased_until REAL, worker TEXT
+                );
+                CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (stage, status, id);
+            """)
+        return self._conn
+    
+    def enqueue(self, audio_path, timestamp, mode, transcript_path=None):
+        """
+        Adiciona uma gravação à fila.
+        
+        Args:
+            audio_path: Caminho do arquivo de áudio
+            timestamp: Identificador dos arquivos de saída
+            mode: meeting ou diary
+            transcript_path: Transcrição já salva (o job começa pelo resumo)
+        
+        Returns:
+            Identificador do job
+        """
+        stage = 'summarize' if transcript_path else 'transcribe'
+        now = time.time()
+        with self._lock:
+            cursor = self._connect().execute(
+                "INSERT INTO jobs (audio_path, timestamp, mode, stage, status, transcript_path, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (os.path.abspath(audio_path), timestamp, mode, stage, transcript_path, now, now),
+            )
+        return cursor.lastrowid
+    
+    def claim(self, stage, worker):
+        """
+        Reserva o job mais antigo disponível em uma etapa.
+        
+        Jobs cuja reserva expirou (worker interrompido) são retomados; cada
+        reserva conta como uma tentativa, e um job que já derrubou o worker
+        JOB_MAX_ATTEMPTS vezes é marcado como erro em vez de voltar à fila.
+        
+        Args:
+            stage: transcribe ou summarize
+            worker: Identificador do worker
+        
+        Returns:
+            Dicionário com o job, ou None se não houver job disponível
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = 'error', error = ?, leased_until = NULL, updated_at = ? "
+                    "WHERE stage = ? AND status = 'running' AND leased_until < ? AND attempts >= ?",
+                    (f"reserva expirada após {JOB_MAX_ATTEMPTS} tentativas (worker interrompido)",
+                     now, stage, now, JOB_MAX_ATTEMPTS),
+                )
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE stage = ? AND "
+                    "(status = 'queued' OR (status = 'running' AND leased_until < ?)) ORDER BY id LIMIT 1",
+                    (stage, now),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, leased_until = ?, "
+                        "worker = ?, updated_at = ? WHERE id = ?",
+                        (now + JOB_LEASE_SECONDS, worker, now, row['id']),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = dict(row)
+        job['attempts'] += 1
+        return job
+    
+    def renew(self, job_ids, worker):
+        """Prolonga a reserva dos jobs em andamento de um worker"""
+        if not job_ids:
+            return
+        now = time.time()
+        with self._lock:
+            self._connect().executemany(
+                "UPDATE jobs SET leased_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                [(now + JOB_LEASE_SECONDS, job_id, worker) for job_id in job_ids],
+            )
+    
+    def complete(self, job, **fields):
+        """
+        Conclui a etapa atual do job e o encaminha para a próxima.
+        
+        Args:
+            job: Job reservado por claim()
+            fields: Caminhos gerados (transcript_path, summary_path)
+        """
+        index = self.STAGES.index(job['stage'])
+        if index + 1 < len(self.STAGES):
+            stage, status = self.STAGES[index + 1], 'queued'
+        else:
+            stage, status = job['stage'], 'done'
+        columns = {k: v for k, v in fields.items() if k in ('transcript_path', 'summary_path')}
+        assignments = "".join(f", {c} = ?" for c in columns)
+        with self._lock:
+            self._connect().execute(
+                f"UPDATE jobs SET stage = ?, status = ?, attempts = 0, error = NULL, leased_until = NULL, "
+                f"updated_at = ?{assignments} WHERE id = ?",
+                [stage, status, time.time()] + list(columns.values()) + [job['id']],
+            )
+    
+    def fail(self, job, error):
+        """
+        Registra uma falha; o job volta para a fila até JOB_MAX_ATTEMPTS tentativas.
+        
+        Returns:
+            True se o job foi descartado definitivamente
+        """
+        final = job['attempts'] >= JOB_MAX_ATTEMPTS
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, error = ?, leased_until = NULL, updated_at = ? WHERE id = ?",
+                ('error' if final else 'queued', error, time.time(), job['id']),
+            )
+        return final
+    
+    def get(self, job_id):
+        """
+        Consulta um job.
+        
+        Returns:
+            Dicionário com o job, ou None se não existir
+        """
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+    
+    def recent(self, limit=10):
+        """Lista os jobs mais recentes"""
+        with self._lock:
+            rows = self._connect().execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def pending(self):
+        """Número de jobs ainda não concluídos nem descartados"""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Fila de processamento (aberta no primeiro uso)
+job_queue = JobQueue()
+
+class JobWorker:
+    """
+    Consome a fila de processamento em segundo plano.
+    
+    Cada etapa tem seu próprio número de threads (JOB_TRANSCRIBE_WORKERS e
+    JOB_SUMMARY_WORKERS), de modo que o Whisper não disputa memória consigo
+    mesmo enquanto as chamadas de IA dos jobs anteriores seguem em paralelo.
+    Uma thread auxiliar renova a reserva dos jobs em andamento.
+    """
+    
+    def __init__(self, queue=None, transcribe_workers=None, summary_workers=None, echo=True):
+        import socket
+        self.queue = queue or job_queue
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.limits = {
+            'transcribe': transcribe_workers or JOB_TRANSCRIBE_WORKERS,
+            'summarize': summary_workers or JOB_SUMMARY_WORKERS,
+        }
+        self.echo = echo
+        self._active = set()
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+    
+    def start(self):
+        """Inicia as threads de cada etapa e a renovação das reservas"""
+        for stage, count in self.limits.items():
+            for _ in range(count):
+                self._threads.append(threading.Thread(target=self._loop, args=(stage,), daemon=True))
+        self._threads.append(threading.Thread(target=self._heartbeat, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+    
+    def wake(self):
+        """Avisa as threads de que há um job novo, sem esperar a próxima consulta"""
+        self._wake.set()
+    
+    def idle(self):
+        """True se nenhuma thread está processando e a fila está vazia"""
+        with self._lock:
+            busy = self._busy
+        return busy == 0 and self.queue.pending() == 0
+    
+    def stop(self):
+        """Interrompe as threads após os jobs em andamento"""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+    
+    def _heartbeat(self):
+        while not self._stop.wait(JOB_LEASE_SECONDS / 3):
+            with self._lock:
+                active = list(self._active)
+            self.queue.renew(active, self.name)
+    
+    def _loop(self, stage):
+        while not self._stop.is_set():
+            with self._lock:
+                self._busy += 1
+            job = self.queue.claim(stage, self.name)
+            if job is None:
+                with self._lock:
+                    self._busy -= 1
+                self._wake.wait(JOB_POLL_SECONDS)
+                self._wake.clear()
+                continue
+            with self._lock:
+                self._active.add(job['id'])
+            try:
+                fields = getattr(self, f"_{stage}")(job)
+                self.queue.complete(job, **fields)
+                self._wake.set()
+            except Exception as e:
+                final = self.queue.fail(job, str(e))
+                if self.echo:
+                    print(ui['job_failed'].format(job['id'], e, "" if final else ui['job_retry']))
+            finally:
+                with self._lock:
+                    self._active.discard(job['id'])
+                    self._busy -= 1
+    
+    def _transcribe(self, job):
+        # O modelo de IA carrega enquanto o Whisper transcreve
+        warm_up_llm()
+        started = time.perf_counter()
+        segments = transcribe_segments(job['audio_path'], show_status=False)
+        transcript_file = save_transcript(segments.dialogue(), job['timestamp'], segments,
+                                          job['audio_path'], time.perf_counter() - started)
+        return {'transcript_path': transcript_file}
+    
+    def _summarize(self, job):
+        with open(job['transcript_path'], 'r', encoding='utf-8') as f:
+            transcript = f.read()
+        started = time.perf_counter()
+        summary, document = generate_summary_document(transcript, job['mode'], show_status=False,
+                                                      previous=previous_summary_document(job['audio_path'], job['mode']))
+        output_file = save_summary(summary, job['mode'], job['timestamp'],
+                                   job['audio_path'], time.perf_counter() - started, document)
+        if self.echo:
+            print(ui['job_done'].format(job['id'], output_file))
+        return {'summary_path': output_file}
+
+def show_job_status(limit=10):
+    """Exibe os jobs mais recentes da fila de processamento"""
+    jobs = job_queue.recent(limit)
+    if not jobs:
+        print(ui['job_status_empty'])
+        return
+    print(ui['job_status_header'])
+    icons = {'queued': "⏳", 'running': "🔄", 'done': "✅", 'error': "❌"}
+    for job in jobs:
+        line = f"{icons.get(job['status'], '?')} #{job['id']} {os.path.basename(job['audio_path'])} - {job['stage']} ({job['status']})"
+        if job['status'] == 'done':
+            line += f" → {job['summary_path']}"
+        elif job['error']:
+            line += f" - {job['error']}"
+        print(line)
+
+def run_worker(args):
+    """
+    Executa o worker da fila de processamento em primeiro plano.
+    
+    Args:
+        args: Argumentos do subcomando worker
+    
+    Returns:
+        Código de saída
+    """
+    worker = JobWorker(transcribe_workers=args.transcribe_workers,
+                       summary_workers=args.summary_workers).start()
+    print(ui['worker_started'].format(worker.limits['transcribe'], worker.limits['summarize']))
+    try:
+        while True:
+            time.sleep(JOB_POLL_SECONDS)
+            if args.drain and worker.idle():
+                break
+    except KeyboardInterrupt:
+        pass
+    worker.stop()
+    return 0
+
+class SearchIndex:
+    """
+    Índice de busca sobre transcrições e resumos.
+    
+    O texto de cada segmento (ou parágrafo de resumo) vai para uma tabela
+    FTS5 do SQLite. Se um modelo de embedding estiver configurado, o vetor
+    normalizado de cada trecho é acrescentado a uma matriz float32 em disco,
+    lida via memória mapeada; a linha i da matriz corresponde ao rowid i+1
+    da tabela de trechos, e a similaridade de cosseno vira um produto
+    matricial em NumPy.
+    """
+    
+    def __init__(self, path=None):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+        self._vectors = None
+    
+    def _connect(self):
+        """Abre o banco (criando as tabelas) no primeiro uso"""
+        if self._conn is None:
+            import sqlite3
+            path = self.path or SEARCH_INDEX_PATH or os.path.join(OUTPUT_DIR, "search.db")
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.path = path
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    path TEXT PRIMARY KEY, kind TEXT, mtime REAL, embedding_model TEXT
+                );
+                CREATE TABLE IF NOT EXISTS passages (
+                    id INTEGER PRIMARY KEY, path TEXT, start REAL, end REAL
+                );
+                CREATE INDEX IF NOT EXISTS passages_path ON passages (path);
+                CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5 (text);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+            # Índices criados antes do registro do modelo de embedding
+            columns = [row['name'] for row in self._conn.execute("PRAGMA table_info(documents)")]
+            if 'embedding_model' not in columns:
+                self._conn.execute("ALTER TABLE documents ADD COLUMN embedding_model TEXT")
+        return self._conn
+    
+    @property
+    def vectors_path(self):
+        return os.path.splitext(self.path)[0] + ".f32"
+    
+    def _meta(self, key, value=None):
+        conn = self._connect()
+        if value is None:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return row['value'] if row else None
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+    
+    def is_indexed(self, path):
+        """
+        Indica se o arquivo já está indexado na versão atual.
+        
+        Com EMBEDDING_MODEL definido, documentos indexados sem vetores (ou
+        com outro modelo) contam como não indexados e são reprocessados.
+        """
+        with self._lock:
+            row = self._connect().execute("SELECT mtime, embedding_model FROM documents WHERE path = ?",
+                                          (os.path.abspath(path),)).fetchone()
+        if row is None or row['mtime'] != os.path.getmtime(path):
+            return False
+        return not EMBEDDING_MODEL or row['embedding_model'] == EMBEDDING_MODEL
+    
+    def add(self, path, kind, passages):
+        """
+        Indexa (ou reindexa) um documento.
+        
+        Args:
+            path: Caminho do arquivo de transcrição ou resumo
+            kind: transcript ou summary
+            passages: Lista de tuplas (início, fim, texto); tempos podem ser None
+        """
+        path = os.path.abspath(path)
+        passages = [(start, end, text.strip()) for start, end, text in passages if text.strip()]
+        vectors = self._embed([text for _, _, text in passages]) if passages else None
+        
+        with self._lock:
+            conn = self._connect()
+            # Trechos antigos saem do FTS; suas linhas na matriz ficam órfãs
+            old = [(row['id'],) for row in conn.execute("SELECT id FROM passages WHERE path = ?", (path,))]
+            conn.executemany("DELETE FROM passages_fts WHERE rowid = ?", old)
+            conn.execute("UPDATE passages SET path = NULL WHERE path = ?", (path,))
+            
+            first_id = (conn.execute("SELECT MAX(id) FROM passages").fetchone()[0] or 0) + 1
+            if vectors is not None:
+                self._append_vectors(first_id, vectors)
+            for i, (start, end, text) in enumerate(passages):
+                conn.execute("INSERT INTO passages (id, path, start, end) VALUES (?, ?, ?, ?)",
+                             (first_id + i, path, start, end))
+                conn.execute("INSERT INTO passages_fts (rowid, text) VALUES (?, ?)", (first_id + i, text))
+            conn.execute("INSERT OR REPLACE INTO documents (path, kind, mtime, embedding_model) VALUES (?, ?, ?, ?)",
+                         (path, kind, os.path.getmtime(path), EMBEDDING_MODEL if vectors is not None else None))
+            conn.commit()
+    
+    def _embed(self, texts, batch_size=64):
+        """Gera vetores normalizados para os textos, se houver modelo configurado"""
+        if not EMBEDDING_MODEL:
+            return None
+        backend = llm_runtime.backend(get_llm_backend())
+        vectors = []
+        for i in range(0, len(texts), batch_size):
+            vectors.extend(llm_runtime.run(backend.embed(texts[i:i + batch_size], EMBEDDING_MODEL)))
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+        return matrix
+    
+    def _append_vectors(self, first_id, vectors):
+        """Acrescenta vetores à matriz em disco, preenchendo lacunas com zeros"""
+        dim = int(self._meta('dim') or vectors.shape[1])
+        if dim != vectors.shape[1] and os.path.exists(self.vectors_path):
+            # Outro modelo de embedding: a matriz recomeça e os demais documentos são reprocessados
+            self._vectors = None
+            os.remove(self.vectors_path)
+            self._connect().execute("UPDATE documents SET embedding_model = NULL")
+        dim = vectors.shape[1]
+        self._meta('dim', dim)
+        rows = os.path.getsize(self.vectors_path) // (4 * dim) if os.path.exists(self.vectors_path) else 0
+        with open(self.vectors_path, 'ab') as f:
+            if first_id - 1 > rows:
+                f.write(np.zeros((first_id - 1 - rows, dim), dtype=np.float32).tobytes())
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self._vectors = None
+    
+    def _load_vectors(self):
+        """Mapeia a matriz de vetores em memória"""
+        if self._vectors is None and os.path.exists(self.vectors_path):
+            dim = int(self._meta('dim'))
+            rows = os.path.getsize(self.vectors_path) // (4 * dim)
+            if rows:
+                self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, dim))
+        return self._vectors
+    
+    def search(self, query, limit=10, semantic=False):
+        """
+        Busca trechos por texto completo (BM25) ou por similaridade semântica.
+        
+        Args:
+            query: Consulta
+            limit: Número máximo de resultados
+            semantic: Usar a busca por embeddings
+        
+        Returns:
+            Lista de dicionários com path, start, end, text e score
+        """
+        with self._lock:
+            conn = self._connect()
+            if semantic:
+                hits = self._semantic_hits(query, limit)
+                if not hits:
+                    return []
+                ids = [rowid for rowid, _ in hits]
+                rows = {row['id']: row for row in conn.execute(
+                    f"SELECT p.id, p.path, p.start, p.end, f.text FROM passages p "
+                    f"JOIN passages_fts f ON f.rowid = p.id WHERE p.id IN ({','.join('?' * len(ids))})", ids)}
+                return [dict(rows[rowid], score=score) for rowid, score in hits if rowid in rows]
+            
+            # Cada termo entre aspas para não interpretar a sintaxe do FTS5
+            terms = " ".join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+            rows = conn.execute(
+                "SELECT p.id, p.path, p.start, p.end, "
+                "snippet(passages_fts, 0, '[', ']', '…', 16) AS text, bm25(passages_fts) AS score "
+                "FROM passages_fts JOIN passages p ON p.id = passages_fts.rowid "
+                "WHERE passages_fts MATCH ? AND p.path IS NOT NULL ORDER BY score LIMIT ?",
+                (terms, limit),
+            ).fetchall()
+            return [dict(row) for row in rows]
+    
+    def _semantic_hits(self, query, limit):
+        """Ids e similaridades dos trechos mais próximos da consulta"""
+        vectors = self._load_vectors()
+        if vectors is None:
+            return []
+        query_vector = self._embed([query])[0]
+        scores = vectors @ query_vector
+        # Considerar candidatos extras para compensar trechos órfãos
+        count = min(len(scores), limit * 4)
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top])]
+        live = {row[0] for row in self._conn.execute(
+            f"SELECT id FROM passages WHERE path IS NOT NULL AND id IN ({','.join('?' * len(top))})",
+            [int(i) + 1 for i in top])}
+        return [(int(i) + 1, float(scores[i])) for i in top if int(i) + 1 in live][:limit]
+
+# Índice de busca (aberto no primeiro uso)
+search_index = SearchIndex()
+
+def index_document(path, kind, passages):
+    """
+    Indexa um arquivo recém-salvo sem interromper o processamento.
+    
+    Uma falha do índice ou do modelo de embedding é apenas informada: o
+    arquivo já foi gravado e será indexado de novo pelo próximo
+    index_output_dir().
+    """
+    try:
+        search_index.add(path, kind, passages)
+    except Exception as e:
+        print(ui['search_index_failed'].format(path, str(e)))
+
+def summary_passages(summary):
+    """Divide um resumo Markdown em parágrafos indexáveis (sem tempos)"""
+    return [(None, None, part) for part in summary.split("\n\n")]
+
+def index_output_dir():
+    """
+    Indexa transcrições e resumos da pasta de saída ainda não indexados.
+    
+    Returns:
+        Número de arquivos indexados
+    """
+    count = 0
+    for entry in sorted(os.scandir(OUTPUT_DIR), key=lambda e: e.name):
+        name = entry.name
+        if name.startswith("transcript_") and name.endswith(".txt"):
+            kind = "transcript"
+        elif name.startswith(("meeting_", "diary_")) and name.endswith(".md"):
+            kind = "summary"
+        else:
+            continue
+        if search_index.is_indexed(entry.path):
+            continue
+        jsonl = os.path.splitext(entry.path)[0] + ".jsonl"
+        if kind == "transcript" and os.path.exists(jsonl):
+            passages = [(seg['start'], seg['end'], seg['text']) for seg in iter_segments_jsonl(jsonl)]
+        else:
+            with open(entry.path, 'r', encoding='utf-8') as f:
+                passages = summary_passages(f.read())
+        search_index.add(entry.path, kind, passages)
+        count += 1
+    return count
+
+def run_search(args):
+    """
+    Busca nas transcrições e resumos.
+    
+    Args:
+        args: Argumentos do subcomando search
+    
+    Returns:
+        Código de saída
+    """
+    if args.output_dir:
+        global OUTPUT_DIR
+        OUTPUT_DIR = args.output_dir
+    indexed = index_output_dir()
+    if indexed:
+        print(ui['search_indexed'].format(indexed))
+    
+    started = time.perf_counter()
+    results = search_index.search(" ".join(args.query), limit=args.limit, semantic=args.semantic)
+    elapsed = time.perf_counter() - started
+    
+    if not results:
+        print(ui['search_no_results'])
+    for result in results:
+        position = f" @ {format_timestamp(result['start'], '.')}" if result['start'] is not None else ""
+        print(f"{result['path']}{position}\n    {result['text'].strip()}")
+    print(ui['search_time'].format(len(results), elapsed * 1000))
+    return 0
+
+def save_transcript(transcript, timestamp, segments=None, audio_file=None, elapsed=None):
     """
     Salva a transcrição em um arquivo texto.
     
+    Se os segmentos forem informados, também grava ao lado do .txt os
+    arquivos .jsonl (um segmento por linha), .srt e .vtt. Se o arquivo de
+    áudio for informado, a transcrição é registrada no catálogo.
+    
     Args:
         transcript: Texto transcrito
         timestamp: Timestamp para nomear o arquivo
+        segments: Segments com tempos da transcrição (opcional)
+        audio_file: Caminho do áudio de origem (opcional)
+        elapsed: Tempo gasto na transcrição, em segundos (opcional)
     
     Returns:
         Caminho para o arquivo salvo
@@ -455,22 +4723,55 @@ def save_transcript(transcript, timestamp):
     # Criar nome do arquivo baseado no timestamp
     filename = f"transcript_{timestamp}.txt"
     filepath = os.path.join(OUTPUT_DIR, filename)
+    ensure_output_dir()
     
-    # Salvar arquivo
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(transcript)
+    with metrics.span("save_transcript", segments=len(segments) if segments is not None else None):
+        # Salvar arquivo
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(transcript)
+        
+        if segments is not None:
+            base = os.path.splitext(filepath)[0]
+            write_segments_jsonl(segments, base + ".jsonl")
+            write_srt(segments, base + ".srt")
+            write_vtt(segments, base + ".vtt")
+        
+        # Indexar para busca
+        if SEARCH_INDEXING:
+            if segments is not None:
+                index_document(filepath, "transcript", [(start, end, text) for start, end, _, text in segments])
+            else:
+                index_document(filepath, "transcript", summary_passages(transcript))
+        
+        if audio_file is not None and isinstance(audio_file, (str, os.PathLike)):
+            catalog.update(
+                audio_file,
+                audio_hash=hash_audio(audio_file),
+                transcript_path=os.path.abspath(filepath),
+                transcript_hash=result_cache.key(transcript),
+                transcribed_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                transcription_engine=TRANSCRIPTION_ENGINE,
+                whisper_model=WHISPER_MODEL,
+                transcribe_seconds=elapsed,
+            )
     
     print(ui['transcript_saved'] + filepath)
     return filepath
 
-def save_summary(summary, mode, timestamp):
+def save_summary(summary, mode, timestamp, audio_file=None, elapsed=None, document=None):
     """
     Salva o resumo em um arquivo markdown.
     
+    Se o documento estruturado for informado, ele é gravado ao lado do .md
+    em um arquivo .json (resumo validado e notas de cada trecho).
+    
     Args:
         summary: Texto do resumo
         mode: Modo (reunião ou diário)
         timestamp: Timestamp para nomear o arquivo
+        audio_file: Caminho do áudio de origem, para registro no catálogo (opcional)
+        elapsed: Tempo gasto na sumarização, em segundos (opcional)
+        document: Documento de generate_summary_document (opcional)
     
     Returns:
         Caminho para o arquivo salvo
@@ -479,10 +4780,30 @@ def save_summary(summary, mode, timestamp):
     mode_name = "meeting" if mode == "meeting" else "diary"
     filename = f"{mode_name}_{timestamp}.md"
     filepath = os.path.join(OUTPUT_DIR, filename)
+    ensure_output_dir()
     
-    # Salvar arquivo
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(summary)
+    with metrics.span("save_summary", mode=mode_name):
+        # Salvar arquivo
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(summary)
+        if document is not None:
+            with open(os.path.splitext(filepath)[0] + ".json", 'w', encoding='utf-8') as f:
+                json.dump(document, f, ensure_ascii=False, indent=2)
+        
+        # Indexar para busca
+        if SEARCH_INDEXING:
+            index_document(filepath, "summary", summary_passages(summary))
+        
+        if audio_file is not None:
+            catalog.update(
+                audio_file,
+                mode=mode_name,
+                summary_path=os.path.abspath(filepath),
+                summarized_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                llm_backend=get_llm_backend(),
+                llm_model=MODEL,
+                summary_seconds=elapsed,
+            )
     
     return filepath
 
@@ -491,44 +4812,89 @@ def list_audio_files():
     Lista os arquivos de áudio disponíveis na pasta de saída.
     
     Returns:
-        lista de arquivos de áudio (.wav)
+        lista de arquivos de áudio (.wav, .flac, .opus)
     """
-    audio_files = []
-    if os.path.exists(OUTPUT_DIR):
-        for file in os.listdir(OUTPUT_DIR):
-            if file.endswith(".wav") and os.path.isfile(os.path.join(OUTPUT_DIR, file)):
-                audio_files.append(file)
-    return sorted(audio_files)
+    catalog.sync()
+    rows, total = catalog.page(page_size=-1)
+    return sorted(row['name'] for row in rows)
+
+def format_catalog_row(index, row):
+    """Formata uma linha do catálogo para o menu de revisão"""
+    if row['summary_path']:
+        status = "✅"
+    elif row['transcript_path']:
+        status = "📝"
+    else:
+        status = "⏳"
+    duration = f"{row['duration'] / 60:.1f} min" if row['duration'] else "?"
+    mode = f" [{row['mode']}]" if row['mode'] else ""
+    dropped = ui['catalog_dropped'].format(row['dropped_seconds']) if row.get('dropped_seconds') else ""
+    return f"{index}. {status} {row['name']} ({row['created_at']}, {duration}){mode}{dropped}"
 
-def select_audio_file():
+def select_audio_file(page_size=20):
     """
     Permite ao usuário selecionar um arquivo de áudio existente.
     
+    A lista vem do catálogo, paginada e com filtros por data, modo e
+    situação do processamento.
+    
     Returns:
         Caminho para o arquivo de áudio selecionado
     """
-    audio_files = list_audio_files()
-    
-    if not audio_files:
-        print(ui['audio_not_found'].format(OUTPUT_DIR))
-        return None
-    
-    print(ui['select_audio'].format(OUTPUT_DIR))
-    for i, file in enumerate(audio_files):
-        print(f"{i+1}. {file}")
+    catalog.sync()
+    page = 0
+    filters = {}
     
-    try:
-        selection = int(input("> "))
-        if selection < 1 or selection > len(audio_files):
-            print(ui['invalid_selection'])
+    while True:
+        rows, total = catalog.page(page, page_size, **filters)
+        if total == 0 and not filters:
+            print(ui['audio_not_found'].format(OUTPUT_DIR))
             return None
         
-        selected_file = audio_files[selection-1]
-        print(ui['selected_file'].format(selected_file))
-        return os.path.join(OUTPUT_DIR, selected_file)
-    except ValueError:
-        print(ui['invalid_selection'])
-        return None
+        pages = max(1, (total + page_size - 1) // page_size)
+        print(ui['select_audio'].format(OUTPUT_DIR))
+        for i, row in enumerate(rows):
+            print(format_catalog_row(page * page_size + i + 1, row))
+        print(ui['catalog_page'].format(page + 1, pages, total))
+        
+        choice = input(ui['catalog_help']).strip()
+        if choice == "":
+            return None
+        if choice.lower() == "n":
+            page = min(page + 1, pages - 1)
+            continue
+        if choice.lower() == "p":
+            page = max(page - 1, 0)
+            continue
+        if choice.lower().startswith("f"):
+            # Filtro: data (AAAA-MM-DD), modo (meeting, diary) ou situação (pending, transcribed, done)
+            filters = {}
+            for term in choice.split()[1:]:
+                if term in ("meeting", "diary"):
+                    filters['mode'] = term
+                elif term in Catalog.STATUS_FILTERS:
+                    filters['status'] = term
+                else:
+                    filters['date'] = term
+            page = 0
+            continue
+        
+        try:
+            selection = int(choice) - 1 - page * page_size
+            if selection < 0 or selection >= len(rows):
+                print(ui['invalid_selection'])
+                continue
+        except ValueError:
+            print(ui['invalid_selection'])
+            continue
+        
+        audio_file = rows[selection]['audio_path']
+        print(ui['selected_file'].format(rows[selection]['name']))
+        
+        # Recuperar gravações interrompidas antes de finalizar o cabeçalho
+        if audio_file.endswith(".wav"):
+            repair_wav_header(audio_file)
+        return audio_file
 
 def mask_api_key(api_key):
     """
@@ -544,7 +4910,8 @@ def mask_api_key(api_key):
         return "Não configurado"
     return f"{api_key[:4]}...{api_key[-4:]}"
 
-def save_config(openai_key=None, ollama_url=None, model=None, whisper_model=None, language=None):
+def save_config(openai_key=None, ollama_url=None, model=None, whisper_model=None, language=None,
+                transcription_engine=None):
     """
     Salva as configurações no arquivo .env.
     
@@ -554,6 +4921,7 @@ def save_config(openai_key=None, ollama_url=None, model=None, whisper_model=None
         model: Nome do modelo a ser usado
         whisper_model: Nome do modelo Whisper a ser usado
         language: Idioma da interface
+        transcription_engine: Motor de transcrição (whisper, faster-whisper)
     """
     # Ler as configurações atuais
     config = {}
@@ -575,6 +4943,8 @@ def save_config(openai_key=None, ollama_url=None, model=None, whisper_model=None
         config['WHISPER_MODEL'] = whisper_model.strip()
     if language is not None and language.strip():
         config['LANGUAGE'] = language.strip()
+    if transcription_engine is not None and transcription_engine.strip():
+        config['TRANSCRIPTION_ENGINE'] = transcription_engine.strip()
     
     # Salvar configurações
     with open(".env", "w", encoding='utf-8') as f:
@@ -585,7 +4955,7 @@ def show_config_menu():
     """
     Exibe o menu de configurações e permite ao usuário modificar as configurações.
     """
-    global OPENAI_API_KEY, MODEL, OLLAMA_URL, LANGUAGE, WHISPER_MODEL, ui
+    global OPENAI_API_KEY, MODEL, OLLAMA_URL, LANGUAGE, WHISPER_MODEL, TRANSCRIPTION_ENGINE, ui
     
     # Exibir configurações atuais
     print(ui['current_config'].format(
@@ -593,7 +4963,8 @@ def show_config_menu():
         WHISPER_MODEL,
         LANGUAGE,
         mask_api_key(OPENAI_API_KEY),
-        OLLAMA_URL
+        OLLAMA_URL,
+        TRANSCRIPTION_ENGINE
     ))
     
     while True:
@@ -624,6 +4995,8 @@ def show_config_menu():
                 if whisper_model.lower() in ['tiny', 'base', 'small', 'medium', 'large']:
                     WHISPER_MODEL = whisper_model.lower()
                     save_config(whisper_model=WHISPER_MODEL)
+                    # Carregar o novo modelo em segundo plano
+                    get_transcription_engine().preload()
                     print(ui['config_saved'])
                 else:
                     print(ui['invalid_whisper_model'])
@@ -639,9 +5012,940 @@ def show_config_menu():
                     print(ui['config_saved'])
                 else:
                     print(ui['invalid_language'])
+        elif choice == "5":
+            # Configurar motor de transcrição
+            engine = input(ui['enter_engine'])
+            if engine.strip():
+                if engine.lower() in TRANSCRIPTION_ENGINES:
+                    TRANSCRIPTION_ENGINE = engine.lower()
+                    save_config(transcription_engine=TRANSCRIPTION_ENGINE)
+                    # Carregar o modelo do novo motor em segundo plano
+                    get_transcription_engine().preload()
+                    print(ui['config_saved'])
+                else:
+                    print(ui['invalid_engine'])
+
+def find_audio_files(patterns):
+    """
+    Expande diretórios e padrões glob em uma lista de arquivos de áudio.
+    
+    Args:
+        patterns: Lista de diretórios, arquivos ou padrões glob
+    
+    Returns:
+        Lista ordenada de caminhos, sem repetições
+    """
+    import glob
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, f) for f in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        files.extend(f for f in candidates if f.endswith(AUDIO_EXTENSIONS) and os.path.isfile(f))
+    return sorted(set(files))
+
+def batch_timestamp(audio_file):
+    """
+    Deriva o identificador dos arquivos de saída a partir do nome do áudio.
+    
+    Gravações do próprio Secre-Tina já têm um carimbo de data único; para
+    os demais arquivos o nome recebe um hash do caminho, para que áudios de
+    mesmo nome em pastas diferentes não sobrescrevam as saídas uns dos outros.
+    """
+    import hashlib
+    stem = Path(audio_file).stem
+    if stem.startswith("recording_"):
+        return stem[len("recording_"):]
+    digest = hashlib.sha1(os.path.abspath(audio_file).encode('utf-8')).hexdigest()[:8]
+    return f"{stem}_{digest}"
+
+def run_batch(args):
+    """
+    Processa vários arquivos de áudio sem interação.
+    
+    Cada etapa tem seu próprio conjunto de threads: decodificação do áudio,
+    inferência do Whisper e sumarização com IA. Assim, a decodificação do
+    próximo arquivo e as chamadas de rede dos anteriores acontecem enquanto
+    o modelo transcreve o arquivo atual. Arquivos de até 30 s são agrupados
+    e decodificados juntos (transcribe_clips()). No máximo --max-pending
+    arquivos ficam decodificados na memória aguardando a transcrição.
+    
+    Args:
+        args: Argumentos do subcomando batch
+    
+    Returns:
+        Código de saída (0 se todos os arquivos foram processados)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    global OUTPUT_DIR
+    
+    audio_files = find_audio_files(args.inputs)
+    if not audio_files:
+        print(ui['audio_not_found'].format(", ".join(args.inputs)))
+        return 1
+    
+    if args.output_dir:
+        OUTPUT_DIR = args.output_dir
+        ensure_output_dir()
+    
+    print(ui['batch_start'].format(len(audio_files)))
+    if not args.no_summary:
+        warm_up_llm()
+    
+    results = {f: {'status': 'pending', 'duration': 0.0, 'started': time.time()} for f in audio_files}
+    lock = threading.Lock()
+    pending = threading.Semaphore(0)
+    
+    # Vagas para áudio decodificado: ocupadas antes da decodificação, liberadas após a transcrição
+    slots = threading.Semaphore(args.max_pending)
+    holding = set()
+    
+    def release(audio_file):
+        with lock:
+            if audio_file not in holding:
+                return
+            holding.discard(audio_file)
+        slots.release()
+    
+    decode_pool = ThreadPoolExecutor(max_workers=args.decode_workers)
+    whisper_pool = ThreadPoolExecutor(max_workers=args.whisper_workers)
+    summary_pool = ThreadPoolExecutor(max_workers=args.summary_workers)
+    
+    def finish(audio_file, status, **info):
+        with lock:
+            results[audio_file].update(info, status=status, elapsed=time.time() - results[audio_file]['started'])
+            print(f"[{status}] {audio_file}")
+        release(audio_file)
+        pending.release()
+    
+    def stage(func):
+        # Encaminha exceções de qualquer etapa para o relatório final
+        def wrapper(audio_file, *stage_args):
+            try:
+                func(audio_file, *stage_args)
+            except Exception as e:
+                finish(audio_file, 'error', error=str(e))
+        return wrapper
+    
+    # Clipes curtos (notas de voz, diário) são decodificados juntos; a diarização exige o caminho normal
+    clips = None if DIARIZATION else ClipBatcher(max_batch=args.max_pending, max_wait=0.25,
+                                                  max_pending=args.max_pending)
+    
+    @stage
+    def decode(audio_file):
+        audio = load_audio(audio_file)
+        results[audio_file]['duration'] = len(audio) / SAMPLE_RATE
+        if clips is not None and len(audio) <= 30 * SAMPLE_RATE:
+            started = time.perf_counter()
+            clips.submit(audio).add_done_callback(
+                lambda future: whisper_pool.submit(clip_transcribed, audio_file, future, started))
+        else:
+            whisper_pool.submit(transcribe, audio_file, audio)
+    
+    @stage
+    def transcribe(audio_file, audio):
+        started = time.perf_counter()
+        transcribed(audio_file, transcribe_segments(audio, show_status=False), started)
+    
+    @stage
+    def clip_transcribed(audio_file, future, started):
+        transcribed(audio_file, future.result(), started)
+    
+    def transcribed(audio_file, segments, started):
+        timestamp = batch_timestamp(audio_file)
+        transcript = segments.dialogue()
+        transcript_file = save_transcript(transcript, timestamp, segments,
+                                          audio_file, time.perf_counter() - started)
+        release(audio_file)
+        if args.no_summary:
+            finish(audio_file, 'ok', transcript=transcript_file)
+        else:
+            summary_pool.submit(summarize, audio_file, transcript, transcript_file)
+    
+    @stage
+    def summarize(audio_file, transcript, transcript_file):
+        started = time.perf_counter()
+        summary, document = generate_summary_document(transcript, args.mode, show_status=False,
+                                                      previous=previous_summary_document(audio_file, args.mode))
+        output_file = save_summary(summary, args.mode, batch_timestamp(audio_file),
+                                   audio_file, time.perf_counter() - started, document)
+        finish(audio_file, 'ok', transcript=transcript_file, summary=output_file)
+    
+    started = time.time()
+    for audio_file in audio_files:
+        slots.acquire()
+        with lock:
+            holding.add(audio_file)
+        decode_pool.submit(decode, audio_file)
+    for _ in audio_files:
+        pending.acquire()
+    elapsed = time.time() - started
+    
+    if clips is not None:
+        clips.close()
+    for pool in (decode_pool, whisper_pool, summary_pool):
+        pool.shutdown()
+    
+    # Relatório final
+    print(ui['batch_report'])
+    failures = 0
+    for audio_file, info in results.items():
+        line = f"- {audio_file}: {info['status']} ({info['duration']:.0f}s -> {info['elapsed']:.1f}s)"
+        if info['status'] != 'ok':
+            failures += 1
+            line += f" - {info.get('error', '')}"
+        print(line)
+    audio_total = sum(info['duration'] for info in results.values())
+    print(ui['batch_throughput'].format(
+        len(audio_files) - failures, len(audio_files), elapsed,
+        len(audio_files) / elapsed * 60 if elapsed else 0,
+        audio_total / elapsed if elapsed else 0,
+    ))
+    
+    return 1 if failures else 0
+
+def word_error_rate(reference, hypothesis):
+    """
+    Calcula a taxa de erro de palavras (WER) entre dois textos.
+    
+    Args:
+        reference: Texto de referência
+        hypothesis: Texto a ser avaliado
+    
+    Returns:
+        Distância de edição em palavras dividida pelo tamanho da referência
+    """
+    import re
+    normalize = lambda text: re.findall(r"\w+", text.lower())
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    if not ref:
+        return float(bool(hyp))
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref)
+
+def run_bench_engines(args):
+    """
+    Compara velocidade e precisão dos motores de transcrição.
+    
+    Para cada arquivo, mede o fator de tempo real (tempo de processamento
+    dividido pela duração do áudio) de cada motor e a WER em relação a um
+    arquivo .txt de mesmo nome, se existir, ou à saída do primeiro motor.
+    
+    Args:
+        args: Argumentos do subcomando bench-engines
+    
+    Returns:
+        Código de saída
+    """
+    audio_files = find_audio_files(args.inputs)
+    if not audio_files:
+        print(ui['audio_not_found'].format(", ".join(args.inputs)))
+        return 1
+    
+    report = []
+    for audio_file in audio_files:
+        audio = load_audio(audio_file)
+        duration = len(audio) / SAMPLE_RATE
+        reference_file = os.path.splitext(audio_file)[0] + ".txt"
+        reference = None
+        if os.path.exists(reference_file):
+            with open(reference_file, 'r', encoding='utf-8') as f:
+                reference = f.read()
+        
+        for engine_name in args.engines:
+            engine = get_transcription_engine(engine_name)
+            # Primeira execução apenas para carregar o modelo
+            engine.transcribe(audio[:SAMPLE_RATE])
+            started = time.perf_counter()
+            text = engine.transcribe(audio)["text"]
+            elapsed = time.perf_counter() - started
+            if reference is None:
+                reference = text
+            report.append({
+                'file': audio_file,
+                'engine': engine_name,
+                'model': WHISPER_MODEL,
+                'duration': round(duration, 2),
+                'seconds': round(elapsed, 2),
+                'rtf': round(elapsed / duration, 3) if duration else None,
+                'wer': round(word_error_rate(reference, text), 4),
+            })
+            print(f"{engine_name:>15} {audio_file}: RTF {report[-1]['rtf']} WER {report[-1]['wer']}")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+def run_bench_parallel(args):
+    """
+    Mede o tempo de transcrição paralela para diferentes números de processos.
+    
+    Args:
+        args: Argumentos do subcomando bench-parallel
+    
+    Returns:
+        Código de saída
+    """
+    global PARALLEL_CHUNK_SECONDS
+    audio = load_audio(args.audio)
+    duration = len(audio) / SAMPLE_RATE
+    if args.chunk_seconds:
+        PARALLEL_CHUNK_SECONDS = args.chunk_seconds
+    chunk_count = len(plan_chunks(audio))
+    
+    report = []
+    for workers in args.workers:
+        started = time.perf_counter()
+        if workers <= 1:
+            run_engine(get_transcription_engine(), audio)
+        else:
+            transcribe_parallel(audio, workers=workers)
+        elapsed = time.perf_counter() - started
+        report.append({
+            'workers': workers,
+            'chunks': chunk_count if workers > 1 else 1,
+            'duration': round(duration, 2),
+            'seconds': round(elapsed, 2),
+            'speedup': round(report[0]['seconds'] / elapsed, 2) if report else 1.0,
+        })
+        print(f"{workers:>3} processos, {report[-1]['chunks']} trechos: {elapsed:.1f}s (x{report[-1]['speedup']})")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+def compare_bench_reports(report, baseline_file):
+    """
+    Exibe a variação das métricas de cada cenário em relação a um relatório anterior.
+    
+    Args:
+        report: Relatório atual
+        baseline_file: Arquivo JSON gerado por uma execução anterior
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(s['backend'], s['duration'], s['silence_ratio']): s for s in baseline.get('scenarios', [])}
+    metrics = ('rtf', 'ttft', 'summary_seconds', 'end_to_end_seconds', 'peak_rss_mb')
+    
+    def change(before, after):
+        if before is None or after is None or before == 0:
+            return "   n/a"
+        return f"{(after - before) / before * 100:+6.1f}%"
+    
+    print(f"import: {change(baseline['import']['best_ms'], report['import']['best_ms'])}")
+    for scenario in report['scenarios']:
+        key = (scenario['backend'], scenario['duration'], scenario['silence_ratio'])
+        if key not in previous:
+            continue
+        deltas = " ".join(f"{m} {change(previous[key].get(m), scenario.get(m))}" for m in metrics)
+        print(f"{key[0]:>7} {key[1]:>6.0f}s silêncio {key[2]:.0%}: {deltas}")
+
+def run_bench(args):
+    """
+    Mede o pipeline completo com áudio sintético e um servidor de IA simulado.
+    
+    Para cada backend, duração e fração de silêncio, gera um áudio
+    determinístico, transcreve-o e resume uma transcrição sintética do mesmo
+    tamanho (cerca de 150 palavras por minuto de fala) usando o servidor
+    simulado. O relatório JSON inclui fator de tempo real, pico de memória,
+    tempo até o primeiro token, latência de ponta a ponta e o tempo de
+    importação do módulo, para comparação entre versões.
+    
+    Args:
+        args: Argumentos do subcomando bench
+    
+    Returns:
+        Código de saída (1 se a importação exceder o orçamento ou carregar módulos pesados)
+    """
+    import tempfile
+    import platform
+    import subprocess
+    from bench.fixtures import StubLLMServer, synthetic_audio, synthetic_transcript, measure_import_time
+    global OPENAI_API_KEY, OPENAI_BASE_URL, OLLAMA_URL
+    
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'transcription_engine': TRANSCRIPTION_ENGINE, 'whisper_model': WHISPER_MODEL, 'vad_mode': VAD_MODE,
+            'parallel_workers': PARALLEL_WORKERS, 'latency': args.latency, 'token_rate': args.token_rate,
+            'response_tokens': args.response_tokens, 'seed': args.seed,
+        },
+    }
+    try:
+        report['commit'] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                          cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        report['commit'] = None
+    
+    report['import'] = measure_import_time()
+    report['import']['budget_ms'] = args.import_budget_ms
+    print(f"import: {report['import']['best_ms']} ms (orçamento {args.import_budget_ms} ms), "
+          f"módulos pesados: {report['import']['heavy_modules'] or '-'}")
+    
+    saved = OPENAI_API_KEY, OPENAI_BASE_URL, OLLAMA_URL, result_cache.directory, result_cache.refresh
+    server = StubLLMServer(latency=args.latency, token_rate=args.token_rate,
+                           response_tokens=args.response_tokens).start()
+    workdir = tempfile.mkdtemp(prefix="secretina-bench-")
+    result_cache.directory = os.path.join(workdir, "cache")
+    result_cache.refresh = True
+    report['scenarios'] = []
+    try:
+        for seconds in args.durations:
+            for silence_ratio in args.silence:
+                audio = synthetic_audio(seconds, silence_ratio, seed=args.seed)
+                audio_file = os.path.join(workdir, f"bench_{seconds:g}s_{silence_ratio:g}.wav")
+                writer = open_audio_writer(audio_file, SAMPLE_RATE, 1)
+                writer.write(audio.reshape(-1, 1))
+                writer.close()
+                words = int(seconds * (1 - silence_ratio) / 60 * 150)
+                transcript = synthetic_transcript(words, seed=args.seed)
+                
+                for backend in args.backends:
+                    OPENAI_API_KEY = "stub" if backend == "openai" else ""
+                    OPENAI_BASE_URL = f"{server.url}/v1"
+                    OLLAMA_URL = server.url
+                    requests_before = server.requests
+                    peak_rss_mb(reset=True)
+                    
+                    started = time.perf_counter()
+                    transcribe_seconds = None
+                    if not args.no_transcription:
+                        transcribe_segments(audio_file, show_status=False)
+                        transcribe_seconds = time.perf_counter() - started
+                    
+                    summary_started = time.perf_counter()
+                    first_token = []
+                    
+                    def on_token(token):
+                        if not first_token:
+                            first_token.append(time.perf_counter())
+                    
+                    generate_summary(transcript, "meeting", show_status=False, on_token=on_token)
+                    finished = time.perf_counter()
+                    
+                    scenario = {
+                        'backend': backend,
+                        'duration': seconds,
+                        'silence_ratio': silence_ratio,
+                        'transcript_words': words,
+                        'transcribe_seconds': round(transcribe_seconds, 3) if transcribe_seconds is not None else None,
+                        'rtf': round(transcribe_seconds / seconds, 4) if transcribe_seconds is not None else None,
+                        'summary_seconds': round(finished - summary_started, 3),
+                        'ttft': round(first_token[0] - summary_started, 3) if first_token else None,
+                        'llm_requests': server.requests - requests_before,
+                        'end_to_end_seconds': round(finished - started, 3),
+                        'peak_rss_mb': round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None,
+                    }
+                    report['scenarios'].append(scenario)
+                    print(f"{backend:>7} {seconds:>6.0f}s silêncio {silence_ratio:.0%}: RTF {scenario['rtf']} "
+                          f"TTFT {scenario['ttft']}s total {scenario['end_to_end_seconds']}s "
+                          f"({scenario['llm_requests']} requisições, pico {scenario['peak_rss_mb']} MB)")
+    finally:
+        server.stop()
+        OPENAI_API_KEY, OPENAI_BASE_URL, OLLAMA_URL, result_cache.directory, result_cache.refresh = saved
+        import shutil
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.compare:
+        compare_bench_reports(report, args.compare)
+    
+    over_budget = report['import']['best_ms'] > args.import_budget_ms or report['import']['heavy_modules']
+    return 1 if over_budget else 0
+
+def run_stub_llm(args):
+    """
+    Executa o servidor de IA simulado em primeiro plano.
+    
+    Args:
+        args: Argumentos do subcomando stub-llm
+    
+    Returns:
+        Código de saída
+    """
+    from bench.fixtures import StubLLMServer
+    server = StubLLMServer(port=args.port, latency=args.latency, token_rate=args.token_rate,
+                           response_tokens=args.response_tokens).start()
+    print(f"OPENAI_BASE_URL={server.url}/v1  OLLAMA_URL={server.url}  (Ctrl+C para parar)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+    return 0
+
+class ClipBatcher:
+    """
+    Agrupa clipes curtos recebidos ao mesmo tempo em uma chamada do motor.
+    
+    Uma thread espera o primeiro clipe da fila e, por até
+    SERVER_BATCH_WAIT_MS, junta os que chegarem depois (no máximo
+    SERVER_BATCH_SIZE) antes de chamar transcribe_clips(). A fila tem
+    tamanho limitado: quando está cheia, submit() falha imediatamente em vez
+    de acumular áudio na memória.
+    """
+    
+    def __init__(self, engine=None, max_batch=None, max_wait=None, max_pending=None):
+        import queue
+        self.engine = engine
+        self.max_batch = max_batch or SERVER_BATCH_SIZE
+        self.max_wait = SERVER_BATCH_WAIT_MS / 1000 if max_wait is None else max_wait
+        self.batches = 0
+        self.clips = 0
+        self._queue = queue.Queue(maxsize=max_pending or SERVER_QUEUE_DEPTH)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def submit(self, audio):
+        """
+        Coloca um clipe na fila.
+        
+        Args:
+            audio: Amostras float32 (16 kHz)
+        
+        Returns:
+            concurrent.futures.Future com os Segments do clipe
+        
+        Raises:
+            queue.Full: Se a fila atingiu o limite
+        """
+        from concurrent.futures import Future
+        future = Future()
+        self._queue.put_nowait((audio, future))
+        return future
+    
+    @property
+    def depth(self):
+        """Clipes aguardando na fila"""
+        return self._queue.qsize()
+    
+    def close(self):
+        """Encerra a thread após os clipes já recebidos"""
+        self._queue.put(None)
+        self._thread.join()
+    
+    def _run(self):
+        import queue
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._process(batch)
+    
+    def _process(self, batch):
+        """Transcreve um lote com transcribe_clips()"""
+        try:
+            results = transcribe_clips([audio for audio, _ in batch], show_status=False, engine=self.engine)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.clips += len(batch)
+        for (_, future), segments in zip(batch, results):
+            future.set_result(segments)
+
+class ApiServer:
+    """
+    Servidor HTTP (aiohttp) que expõe o pipeline para outras ferramentas.
+    
+    Gravações longas enviadas para /v1/jobs vão para a fila persistente e
+    são processadas pelo worker embutido; clipes curtos enviados para
+    /v1/transcribe são transcritos na hora, em lotes (ClipBatcher). O
+    modelo Whisper e as sessões HTTP dos backends de IA ficam carregados
+    entre as requisições. Quando a fila atinge SERVER_QUEUE_DEPTH, novas
+    requisições recebem 503 com Retry-After, e os uploads são gravados no
+    disco em blocos, sem ficar inteiros na memória.
+    
+    Rotas:
+        GET  /health                      Estado do servidor e das filas
+        POST /v1/transcribe               Clipe de áudio no corpo; retorna os segmentos
+        POST /v1/jobs?mode=&filename=     Gravação no corpo; retorna o job (202)
+        GET  /v1/jobs/{id}                Estado do job
+        GET  /v1/jobs/{id}/transcript     Transcrição (?format=text, json, srt ou vtt)
+        GET  /v1/jobs/{id}/summary        Resumo (?format=markdown ou json)
+        GET  /v1/search?q=&limit=&semantic=  Busca nas transcrições e resumos
+    """
+    
+    def __init__(self, host=None, port=None, worker=None, batcher=None):
+        self.host = host or SERVER_HOST
+        self.port = SERVER_PORT if port is None else port
+        self.worker = worker
+        self.batcher = batcher or ClipBatcher()
+        self.max_upload = int(SERVER_MAX_UPLOAD_MB * 1024 * 1024)
+        self._uploads = 0
+        self._loop = None
+        self._runner = None
+    
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+    
+    def start(self):
+        """Inicia o servidor em uma thread própria e aguarda a porta ser aberta"""
+        import asyncio
+        self._loop = asyncio.new_event_loop()
+        
+        async def serve():
+            from aiohttp import web
+            app = web.Application(client_max_size=self.max_upload)
+            app.router.add_get("/health", self._health)
+            app.router.add_post("/v1/transcribe", self._transcribe)
+            app.router.add_post("/v1/jobs", self._create_job)
+            app.router.add_get("/v1/jobs/{id}", self._job)
+            app.router.add_get("/v1/jobs/{id}/transcript", self._transcript)
+            app.router.add_get("/v1/jobs/{id}/summary", self._summary)
+            app.router.add_get("/v1/search", self._search)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.host, self.port).start()
+            self.port = self._runner.addresses[0][1]
+        
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(serve(), self._loop).result()
+        return self
+    
+    def stop(self):
+        """Encerra o servidor e a fila de clipes"""
+        import asyncio
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        self.batcher.close()
+    
+    @staticmethod
+    def _error(status, message, **headers):
+        from aiohttp import web
+        return web.json_response({"error": message}, status=status, headers=headers or None)
+    
+    def _busy(self):
+        """Resposta 503 quando a fila está cheia"""
+        return self._error(503, "fila cheia, tente novamente", **{"Retry-After": str(max(1, int(JOB_POLL_SECONDS)))})
+    
+    @staticmethod
+    async def _run(function, *args):
+        """Executa uma função bloqueante no pool de threads do laço"""
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+    
+    async def _save_upload(self, request, path):
+        """
+        Grava o corpo da requisição em disco, em blocos.
+        
+        Returns:
+            Número de bytes gravados, ou None se o limite de tamanho foi excedido
+        """
+        size = 0
+        with open(path, 'wb') as f:
+            async for chunk in request.content.iter_chunked(1 << 16):
+                size += len(chunk)
+                if size > self.max_upload:
+                    break
+                f.write(chunk)
+        if size > self.max_upload or size == 0:
+            os.remove(path)
+            return None
+        return size
+    
+    @staticmethod
+    def _extension(request):
+        """Extensão do arquivo enviado, a partir do nome ou do tipo de conteúdo"""
+        name = request.query.get("filename", "")
+        extension = os.path.splitext(name)[1].lower()
+        if extension:
+            return extension
+        return {"audio/flac": ".flac", "audio/ogg": ".ogg", "audio/opus": ".opus",
+                "audio/mpeg": ".mp3", "audio/mp4": ".m4a"}.get(request.content_type, ".wav")
+    
+    async def _health(self, request):
+        from aiohttp import web
+        pending = await self._run(job_queue.pending)
+        return web.json_response({
+            "status": "ok",
+            "jobs_pending": pending,
+            "clips_waiting": self.batcher.depth,
+            "batches": self.batcher.batches,
+            "clips": self.batcher.clips,
+            "engine": TRANSCRIPTION_ENGINE,
+            "llm_backend": get_llm_backend(),
+        })
+    
+    async def _transcribe(self, request):
+        import asyncio
+        import queue
+        import tempfile
+        from aiohttp import web
+        if self.batcher.depth >= SERVER_QUEUE_DEPTH:
+            return self._busy()
+        
+        # O clipe é decodificado pelo mesmo pré-processamento dos arquivos
+        handle, path = tempfile.mkstemp(suffix=self._extension(request))
+        os.close(handle)
+        try:
+            if await self._save_upload(request, path) is None:
+                return self._error(413, "áudio vazio ou maior que o limite")
+            audio = await self._run(load_audio, path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        
+        if len(audio) > SERVER_CLIP_SECONDS * SAMPLE_RATE:
+            segments = await self._run(transcribe_segments, audio, False)
+        else:
+            try:
+                future = self.batcher.submit(audio)
+            except queue.Full:
+                return self._busy()
+            segments = await asyncio.wrap_future(future)
+        return web.json_response({
+            "text": segments.text,
+            "duration": len(audio) / SAMPLE_RATE,
+            "segments": [{"start": round(start, 3), "end": round(end, 3), "confidence": round(confidence, 4),
+                          "text": text.strip()} for start, end, confidence, text in segments],
+        })
+    
+    async def _create_job(self, request):
+        import uuid
+        from aiohttp import web
+        mode = request.query.get("mode", "meeting")
+        if mode not in ("meeting", "diary"):
+            return self._error(400, "mode deve ser meeting ou diary")
+        if await self._run(job_queue.pending) + self._uploads >= SERVER_QUEUE_DEPTH:
+            return self._busy()
+        
+        # A gravação fica na pasta de saída, como as gravadas pelo menu
+        timestamp = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{uuid.uuid4().hex[:6]}"
+        ensure_output_dir()
+        path = os.path.join(OUTPUT_DIR, f"recording_{timestamp}{self._extension(request)}")
+        self._uploads += 1
+        try:
+            if await self._save_upload(request, path) is None:
+                return self._error(413, "áudio vazio ou maior que o limite")
+            job_id = await self._run(job_queue.enqueue, path, timestamp, mode)
+        finally:
+            self._uploads -= 1
+        if self.worker is not None:
+            self.worker.wake()
+        return web.json_response({"id": job_id, "stage": "transcribe", "status": "queued"}, status=202,
+                                 headers={"Location": f"/v1/jobs/{job_id}"})
+    
+    async def _get_job(self, request):
+        try:
+            job_id = int(request.match_info["id"])
+        except ValueError:
+            return None
+        return await self._run(job_queue.get, job_id)
+    
+    async def _job(self, request):
+        from aiohttp import web
+        job = await self._get_job(request)
+        if job is None:
+            return self._error(404, "job não encontrado")
+        fields = ('id', 'stage', 'status', 'attempts', 'mode', 'error', 'created_at', 'updated_at')
+        return web.json_response({field: job[field] for field in fields})
+    
+    async def _transcript(self, request):
+        from aiohttp import web
+        job = await self._get_job(request)
+        if job is None:
+            return self._error(404, "job não encontrado")
+        if not job['transcript_path']:
+            return self._error(409, "transcrição ainda não disponível")
+        base = os.path.splitext(job['transcript_path'])[0]
+        kind = request.query.get("format", "text")
+        if kind == "json":
+            segments = await self._run(lambda: list(iter_segments_jsonl(base + ".jsonl")))
+            return web.json_response({"segments": segments})
+        extension = {"text": ".txt", "srt": ".srt", "vtt": ".vtt"}.get(kind)
+        if extension is None:
+            return self._error(400, "format deve ser text, json, srt ou vtt")
+        return web.FileResponse(base + extension, headers={"Content-Type": "text/plain; charset=utf-8"})
+    
+    async def _summary(self, request):
+        from aiohttp import web
+        job = await self._get_job(request)
+        if job is None:
+            return self._error(404, "job não encontrado")
+        if not job['summary_path']:
+            return self._error(409, "resumo ainda não disponível")
+        kind = request.query.get("format", "markdown")
+        if kind == "json":
+            path = os.path.splitext(job['summary_path'])[0] + ".json"
+            if not os.path.exists(path):
+                return self._error(404, "resumo estruturado não disponível")
+            return web.FileResponse(path, headers={"Content-Type": "application/json"})
+        if kind != "markdown":
+            return self._error(400, "format deve ser markdown ou json")
+        return web.FileResponse(job['summary_path'], headers={"Content-Type": "text/markdown; charset=utf-8"})
+    
+    async def _search(self, request):
+        from aiohttp import web
+        query = request.query.get("q", "").strip()
+        if not query:
+            return self._error(400, "informe a consulta em q")
+        try:
+            limit = min(int(request.query.get("limit", "10")), 100)
+        except ValueError:
+            return self._error(400, "limit deve ser um número")
+        semantic = request.query.get("semantic", "").lower() in ('1', 'true', 'yes')
+        results = await self._run(search_index.search, query, limit, semantic)
+        return web.json_response({"results": results})
+
+def run_server(args):
+    """
+    Executa o servidor HTTP em primeiro plano, com o worker da fila embutido.
+    
+    Args:
+        args: Argumentos do subcomando serve
+    
+    Returns:
+        Código de saída
+    """
+    # Modelos carregados antes da primeira requisição
+    get_transcription_engine().preload()
+    warm_up_llm()
+    
+    worker = JobWorker(transcribe_workers=args.transcribe_workers,
+                       summary_workers=args.summary_workers).start()
+    server = ApiServer(args.host, args.port, worker).start()
+    print(ui['server_started'].format(server.url))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+    worker.stop()
+    return 0
+
+def parse_args(argv=None):
+    """
+    Interpreta os argumentos de linha de comando.
+    
+    Sem subcomando, a Secre-Tina inicia o menu interativo.
+    """
+    parser = argparse.ArgumentParser(description="Secre-Tina: Assistente Virtual para Reuniões e Diários")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignora o cache e refaz transcrições e resumos")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    batch = subparsers.add_parser("batch", help="Transcreve e resume vários arquivos de áudio sem interação")
+    batch.add_argument("inputs", nargs="+", help="Diretórios, arquivos ou padrões glob de áudio")
+    batch.add_argument("--mode", choices=["meeting", "diary"], default="meeting", help="Modo do resumo")
+    batch.add_argument("--output-dir", help="Pasta para transcrições e resumos (padrão: OUTPUT_DIR)")
+    batch.add_argument("--no-summary", action="store_true", help="Apenas transcrever")
+    batch.add_argument("--decode-workers", type=int, default=2, help="Threads de decodificação de áudio")
+    batch.add_argument("--whisper-workers", type=int, default=1, help="Threads de inferência do Whisper")
+    batch.add_argument("--summary-workers", type=int, default=4, help="Requisições simultâneas de resumo")
+    batch.add_argument("--max-pending", type=int, default=8,
+                       help="Arquivos decodificados na memória aguardando transcrição")
+    
+    search = subparsers.add_parser("search", help="Busca nas transcrições e resumos")
+    search.add_argument("query", nargs="+", help="Termos da busca")
+    search.add_argument("--semantic", action="store_true", help="Busca por similaridade (requer EMBEDDING_MODEL)")
+    search.add_argument("--limit", type=int, default=10, help="Número máximo de resultados")
+    search.add_argument("--output-dir", help="Pasta com transcrições e resumos (padrão: OUTPUT_DIR)")
+    
+    bench = subparsers.add_parser("bench-engines", help="Compara velocidade e precisão dos motores de transcrição")
+    bench.add_argument("inputs", nargs="+", help="Diretórios, arquivos ou padrões glob de áudio")
+    bench.add_argument("--engines", nargs="+", choices=list(TRANSCRIPTION_ENGINES),
+                       default=list(TRANSCRIPTION_ENGINES), help="Motores a comparar")
+    bench.add_argument("--json", help="Arquivo para salvar o relatório em JSON")
+    
+    bench = subparsers.add_parser("bench-parallel", help="Mede a escala da transcrição paralela por número de processos")
+    bench.add_argument("audio", help="Arquivo de áudio longo")
+    bench.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8], help="Números de processos a testar")
+    bench.add_argument("--chunk-seconds", type=float, help="Duração aproximada dos trechos")
+    bench.add_argument("--json", help="Arquivo para salvar o relatório em JSON")
+    
+    bench = subparsers.add_parser("bench", help="Mede o pipeline completo com áudio sintético e IA simulada")
+    bench.add_argument("--durations", nargs="+", type=float, default=[30, 120, 600], help="Durações dos áudios (s)")
+    bench.add_argument("--silence", nargs="+", type=float, default=[0.2, 0.6], help="Frações de silêncio")
+    bench.add_argument("--backends", nargs="+", choices=list(LLM_BACKENDS), default=list(LLM_BACKENDS),
+                       help="APIs de IA simuladas")
+    bench.add_argument("--latency", type=float, default=0.2, help="Latência de cada resposta simulada (s)")
+    bench.add_argument("--token-rate", type=float, default=100.0, help="Tokens por segundo das respostas simuladas")
+    bench.add_argument("--response-tokens", type=int, default=120, help="Tokens por resposta simulada")
+    bench.add_argument("--seed", type=int, default=0, help="Semente dos dados sintéticos")
+    bench.add_argument("--no-transcription", action="store_true", help="Medir apenas a sumarização")
+    bench.add_argument("--import-budget-ms", type=float, default=250.0, help="Tempo máximo de importação do módulo")
+    bench.add_argument("--json", help="Arquivo para salvar o relatório em JSON (padrão: saída padrão)")
+    bench.add_argument("--compare", help="Relatório JSON anterior para comparação")
+    
+    stub = subparsers.add_parser("stub-llm", help="Servidor local que simula as APIs da OpenAI e do Ollama")
+    stub.add_argument("--port", type=int, default=11435, help="Porta do servidor")
+    stub.add_argument("--latency", type=float, default=0.2, help="Latência de cada resposta (s)")
+    stub.add_argument("--token-rate", type=float, default=100.0, help="Tokens por segundo")
+    stub.add_argument("--response-tokens", type=int, default=120, help="Tokens por resposta")
+    
+    worker = subparsers.add_parser("worker", help="Processa a fila de gravações em segundo plano")
+    worker.add_argument("--transcribe-workers", type=int, help="Transcrições simultâneas (padrão: JOB_TRANSCRIBE_WORKERS)")
+    worker.add_argument("--summary-workers", type=int, help="Resumos simultâneos (padrão: JOB_SUMMARY_WORKERS)")
+    worker.add_argument("--drain", action="store_true", help="Encerra quando a fila estiver vazia")
+    
+    serve = subparsers.add_parser("serve", help="Servidor HTTP com upload, jobs, transcrições, resumos e busca")
+    serve.add_argument("--host", help="Endereço (padrão: SERVER_HOST)")
+    serve.add_argument("--port", type=int, help="Porta (padrão: SERVER_PORT)")
+    serve.add_argument("--transcribe-workers", type=int, help="Transcrições simultâneas (padrão: JOB_TRANSCRIBE_WORKERS)")
+    serve.add_argument("--summary-workers", type=int, help="Resumos simultâneos (padrão: JOB_SUMMARY_WORKERS)")
+    
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
     """Função principal do programa"""
+    args = parse_args(argv)
+    result_cache.refresh = args.refresh or os.getenv('CACHE_REFRESH', '').lower() in ('1', 'true', 'yes')
+    if args.command == "batch":
+        return run_batch(args)
+    if args.command == "search":
+        return run_search(args)
+    if args.command == "bench-engines":
+        return run_bench_engines(args)
+    if args.command == "bench-parallel":
+        return run_bench_parallel(args)
+    if args.command == "bench":
+        return run_bench(args)
+    if args.command == "stub-llm":
+        return run_stub_llm(args)
+    if args.command == "worker":
+        return run_worker(args)
+    if args.command == "serve":
+        return run_server(args)
+    
+    # Worker embutido: processa a fila (inclusive jobs interrompidos) enquanto o menu segue livre
+    worker = None
+    if BACKGROUND_JOBS and JOB_EMBEDDED_WORKER:
+        worker = JobWorker().start()
+    
     try:
         # Loop principal do programa
         while True:
@@ -653,6 +5957,8 @@ def main():
             
             # Sair da aplicação
             if action_choice == "0":
+                if BACKGROUND_JOBS and job_queue.pending():
+                    print(ui['jobs_pending'].format(job_queue.pending()))
                 print(ui['exiting'])
                 return 0
             
@@ -673,20 +5979,57 @@ def main():
                     mode = "diary"
                     print(ui['diary_mode'])
                 
-                # Gravar novo áudio
-                audio_file = record_audio(timestamp)
+                # Carregar o modelo de IA enquanto o áudio é capturado
+                warm_up_llm()
                 
-                # Transcrever áudio
-                transcript = transcribe_audio(audio_file)
+                if LIVE_TRANSCRIPTION:
+                    # Gravar e transcrever simultaneamente; a gravação nunca espera pelo motor
+                    live = LiveTranscriber(block=False)
+                    audio_file = record_audio(timestamp, on_audio=live.feed)
+                    print(ui['transcribing'])
+                    started = time.perf_counter()
+                    segments = live.finish()
+                    if live.dropped_seconds:
+                        # Trechos descartados pela fila cheia: a transcrição ao vivo tem lacunas
+                        print(ui['live_incomplete'])
+                        segments = transcribe_segments(audio_file, show_status=False)
+                elif BACKGROUND_JOBS:
+                    # Gravar e deixar transcrição e resumo para o worker
+                    audio_file = record_audio(timestamp)
+                    job_id = job_queue.enqueue(audio_file, timestamp, mode)
+                    print(ui['job_queued'].format(job_id))
+                    if worker is not None:
+                        worker.wake()
+                    continue
+                else:
+                    # Gravar novo áudio
+                    audio_file = record_audio(timestamp)
+                    
+                    # Transcrever áudio
+                    started = time.perf_counter()
+                    segments = transcribe_segments(audio_file)
+                transcript = segments.dialogue()
                 
                 # Salvar transcrição
-                transcript_file = save_transcript(transcript, timestamp)
+                transcript_file = save_transcript(transcript, timestamp, segments,
+                                                  audio_file, time.perf_counter() - started)
+                
+                if BACKGROUND_JOBS:
+                    # O resumo fica para o worker
+                    job_id = job_queue.enqueue(audio_file, timestamp, mode, transcript_file)
+                    print(ui['job_queued'].format(job_id))
+                    if worker is not None:
+                        worker.wake()
+                    continue
                 
                 # Gerar resumo
-                summary = generate_summary(transcript, mode)
+                started = time.perf_counter()
+                summary, document = generate_summary_document(transcript, mode,
+                                                              previous=previous_summary_document(audio_file, mode))
                 
                 # Salvar resumo
-                output_file = save_summary(summary, mode, timestamp)
+                output_file = save_summary(summary, mode, timestamp, audio_file, time.perf_counter() - started,
+                                           document)
                 
                 # Exibir mensagem de conclusão
                 print(ui['complete'] + output_file)
@@ -709,25 +6052,99 @@ def main():
                     mode = "diary"
                     print(ui['diary_mode'])
                 
-                # Transcrever áudio
-                transcript = transcribe_audio(audio_file)
+                if BACKGROUND_JOBS:
+                    job_id = job_queue.enqueue(audio_file, timestamp, mode)
+                    print(ui['job_queued'].format(job_id))
+                    if worker is not None:
+                        worker.wake()
+                    continue
+                
+                # Transcrever áudio (o modelo de IA carrega em paralelo)
+                warm_up_llm()
+                started = time.perf_counter()
+                segments = transcribe_segments(audio_file)
+                transcript = segments.dialogue()
                 
                 # Salvar transcrição
-                transcript_file = save_transcript(transcript, timestamp)
+                transcript_file = save_transcript(transcript, timestamp, segments,
+                                                  audio_file, time.perf_counter() - started)
                 
                 # Gerar resumo
-                summary = generate_summary(transcript, mode)
+                started = time.perf_counter()
+                summary, document = generate_summary_document(transcript, mode,
+                                                              previous=previous_summary_document(audio_file, mode))
                 
                 # Salvar resumo
-                output_file = save_summary(summary, mode, timestamp)
+                output_file = save_summary(summary, mode, timestamp, audio_file, time.perf_counter() - started,
+                                           document)
                 
                 # Exibir mensagem de conclusão
                 print(ui['complete'] + output_file)
                 
+            elif action_choice == "5":
+                # Continuar uma gravação anterior no mesmo arquivo
+                print(ui['continue_recording'])
+                audio_file = select_audio_file()
+                if audio_file is None:
+                    continue
+                
+                # Manter o modo e os nomes de arquivo da sessão original
+                row = catalog.get(audio_file) or {}
+                mode = row.get('mode')
+                if mode is None:
+                    mode_choice = input(ui['mode_select'])
+                    mode = "meeting" if mode_choice == "1" else "diary"
+                print(ui['meeting_mode'] if mode == "meeting" else ui['diary_mode'])
+                timestamp = batch_timestamp(audio_file)
+                offset = Catalog._duration(audio_file) or 0.0
+                print(ui['continue_from'].format(format_timestamp(offset).split(",")[0]))
+                
+                # Só o trecho novo é transcrito quando já existe uma transcrição
+                jsonl = os.path.splitext(row['transcript_path'])[0] + ".jsonl" if row.get('transcript_path') else None
+                previous = Segments.from_jsonl(jsonl) if jsonl and os.path.exists(jsonl) else None
+                
+                warm_up_llm()
+                live = LiveTranscriber(block=False) if LIVE_TRANSCRIPTION and previous is not None else None
+                record_audio(timestamp, on_audio=live.feed if live else None, append_to=audio_file)
+                stat = os.stat(audio_file)
+                catalog.update(audio_file, size=stat.st_size, mtime=stat.st_mtime, duration=Catalog._duration(audio_file))
+                
+                started = time.perf_counter()
+                if previous is None:
+                    segments = transcribe_segments(audio_file)
+                else:
+                    tail = live.finish() if live else None
+                    if live and live.dropped_seconds:
+                        # Com lacunas na transcrição ao vivo, o trecho novo é transcrito de novo
+                        print(ui['live_incomplete'])
+                        tail = None
+                    segments = transcribe_appended(audio_file, offset, previous, tail)
+                transcript = segments.dialogue()
+                transcript_file = save_transcript(transcript, timestamp, segments,
+                                                  audio_file, time.perf_counter() - started)
+                
+                if BACKGROUND_JOBS:
+                    job_id = job_queue.enqueue(audio_file, timestamp, mode, transcript_file)
+                    print(ui['job_queued'].format(job_id))
+                    if worker is not None:
+                        worker.wake()
+                    continue
+                
+                # O resumo reaproveita as notas dos trechos que não mudaram
+                started = time.perf_counter()
+                summary, document = generate_summary_document(transcript, mode,
+                                                              previous=previous_summary_document(audio_file, mode))
+                output_file = save_summary(summary, mode, timestamp, audio_file, time.perf_counter() - started,
+                                           document)
+                print(ui['complete'] + output_file)
+                
             elif action_choice == "3":
                 # Menu de configurações
                 print(ui['config_selected'])
                 show_config_menu()
+            elif action_choice == "4":
+                # Estado da fila de processamento
+                show_job_status()
             else:
                 print(ui['invalid_selection'])
         
@@ -738,4 +6155,6 @@ def main():
     return 0
 
 if __name__ == "__main__":
+    # Os módulos de bench/ importam secre_tina; reaproveitam este em vez de carregar uma segunda cópia
+    sys.modules.setdefault('secre_tina', sys.modules[__name__])
     sys.exit(main())
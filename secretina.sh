@@ -23,7 +23,7 @@ source venv/bin/activate
 # Garantir que todas as dependências estejam instaladas
 echo -e "${YELLOW}Instalando/atualizando dependências...${NC}"
 pip install --upgrade pip
-pip install numpy sounddevice soundfile openai requests python-dotenv
+pip install numpy sounddevice soundfile aiohttp python-dotenv
 pip install git+https://github.com/openai/whisper.git
 
 # Verificar se .env existe
@@ -0,0 +1,52 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import secre_tina
+
+
+def write_recordings(directory, names):
+    for name in names:
+        sf.write(os.path.join(directory, name), np.zeros(1600, dtype=np.float32), 16000)
+
+
+def count_scandir(monkeypatch):
+    calls = []
+    scandir = os.scandir
+
+    def counting(path):
+        calls.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(secre_tina.os, "scandir", counting)
+    return calls
+
+
+def test_sync_skips_unchanged_folder(tmp_path, monkeypatch):
+    write_recordings(tmp_path, ["recording_2024-01-01_10-00-00.wav", "recording_2024-01-02_10-00-00.wav"])
+    # Banco dentro da pasta sincronizada, como no padrão (OUTPUT_DIR/catalog.db)
+    catalog = secre_tina.Catalog(str(tmp_path / "catalog.db"))
+    catalog.sync(str(tmp_path))
+
+    calls = count_scandir(monkeypatch)
+    catalog.sync(str(tmp_path))
+    catalog.sync(str(tmp_path))
+    assert calls == []
+    assert catalog.page(directory=str(tmp_path))[1] == 2
+
+
+def test_sync_rescans_after_a_new_recording(tmp_path, monkeypatch):
+    write_recordings(tmp_path, ["recording_2024-01-01_10-00-00.wav"])
+    catalog = secre_tina.Catalog(str(tmp_path / "catalog.db"))
+    catalog.sync(str(tmp_path))
+
+    write_recordings(tmp_path, ["recording_2024-01-03_10-00-00.wav"])
+    calls = count_scandir(monkeypatch)
+    catalog.sync(str(tmp_path))
+    assert len(calls) == 1
+    assert catalog.get(str(tmp_path / "recording_2024-01-03_10-00-00.wav")) is not None
@@ -0,0 +1,31 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Mesmo orçamento padrão do subcomando bench (--import-budget-ms)
+IMPORT_BUDGET_MS = 250.0
+HEAVY_MODULES = ("whisper", "torch", "numpy", "sounddevice", "aiohttp")
+
+PROBE = (
+    "import sys, time, json; t = time.perf_counter(); import secre_tina; "
+    "elapsed = time.perf_counter() - t; "
+    f"print(json.dumps({{'ms': elapsed * 1000, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))"
+)
+
+
+def import_in_fresh_process():
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def test_import_does_not_load_heavy_modules():
+    assert import_in_fresh_process()["loaded"] == []
+
+
+def test_import_fits_the_time_budget():
+    # Melhor de três execuções, para não depender de um disco ou CPU ocupados
+    best = min(import_in_fresh_process()["ms"] for _ in range(3))
+    assert best < IMPORT_BUDGET_MS
@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import secre_tina
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(secre_tina, "JOB_MAX_ATTEMPTS", 3)
+    job_queue = secre_tina.JobQueue(str(tmp_path / "jobs.db"))
+    yield job_queue
+    job_queue.close()
+
+
+def expire_leases(queue):
+    queue._connect().execute("UPDATE jobs SET leased_until = 0 WHERE status = 'running'")
+
+
+def test_claim_reserves_the_oldest_job_once(queue):
+    first = queue.enqueue("a.wav", "t1", "meeting")
+    second = queue.enqueue("b.wav", "t2", "diary")
+
+    job = queue.claim("transcribe", "w1")
+    assert job['id'] == first
+    assert job['attempts'] == 1
+    assert queue.get(first)['status'] == 'running'
+    assert queue.claim("transcribe", "w2")['id'] == second
+    assert queue.claim("transcribe", "w2") is None
+    assert queue.claim("summarize", "w2") is None
+
+
+def test_expired_lease_is_claimed_again_by_another_worker(queue):
+    job_id = queue.enqueue("a.wav", "t", "meeting")
+    queue.claim("transcribe", "w1")
+    assert queue.claim("transcribe", "w2") is None
+
+    expire_leases(queue)
+    job = queue.claim("transcribe", "w2")
+    assert job['id'] == job_id
+    assert job['attempts'] == 2
+    assert queue.get(job_id)['worker'] == "w2"
+
+
+def test_renew_keeps_the_lease(queue, monkeypatch):
+    job_id = queue.enqueue("a.wav", "t", "meeting")
+    monkeypatch.setattr(secre_tina, "JOB_LEASE_SECONDS", -1)
+    queue.claim("transcribe", "w1")
+    monkeypatch.setattr(secre_tina, "JOB_LEASE_SECONDS", 60)
+    queue.renew([job_id], "w1")
+    assert queue.claim("transcribe", "w2") is None
+
+
+def test_job_that_keeps_killing_its_worker_stops_at_max_attempts(queue):
+    job_id = queue.enqueue("a.wav", "t", "meeting")
+    for attempt in range(1, 4):
+        assert queue.claim("transcribe", "w")['attempts'] == attempt
+        expire_leases(queue)
+
+    assert queue.claim("transcribe", "w") is None
+    job = queue.get(job_id)
+    assert job['status'] == 'error'
+    assert job['error']
+    assert queue.pending() == 0
+
+
+def test_fail_requeues_until_max_attempts(queue):
+    job_id = queue.enqueue("a.wav", "t", "meeting")
+    for attempt in range(1, 4):
+        job = queue.claim("transcribe", "w")
+        assert queue.fail(job, "erro") == (attempt == 3)
+    assert queue.get(job_id)['status'] == 'error'
+
+
+def test_complete_moves_to_the_next_stage_and_resets_attempts(queue):
+    job_id = queue.enqueue("a.wav", "t", "meeting")
+    queue.complete(queue.claim("transcribe", "w"), transcript_path="t.txt")
+    job = queue.claim("summarize", "w")
+    assert job['transcript_path'] == "t.txt"
+    assert job['attempts'] == 1
+    queue.complete(job, summary_path="s.md")
+    assert queue.get(job_id)['status'] == 'done'
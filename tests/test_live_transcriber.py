@@ -0,0 +1,79 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import secre_tina
+
+
+def fake_engine(engine, audio, fs=16000, initial_prompt=None):
+    """Um segmento por trecho, cobrindo o trecho inteiro"""
+    return {"text": " trecho", "segments": [{"start": 0.0, "end": len(audio) / fs, "text": " trecho"}]}
+
+
+def test_feed_splits_blocks_larger_than_the_chunk(monkeypatch):
+    monkeypatch.setattr(secre_tina, "run_engine", fake_engine)
+    transcriber = secre_tina.LiveTranscriber(chunk_seconds=2.0, overlap_seconds=0.5, echo=False)
+    rng = np.random.default_rng(0)
+    for _ in range(12):
+        transcriber.feed(rng.normal(0, 0.1, 5 * 16000).astype(np.float32))
+        # O acúmulo não pode crescer: cada feed() corta todas as janelas completas
+        assert transcriber._pending_size < transcriber.chunk_size
+
+    segments = transcriber.finish()
+    assert len(segments) > 12
+    assert segments.ends[-1] == 60.0
+
+
+def test_finish_raises_when_a_chunk_fails(monkeypatch):
+    calls = []
+
+    def failing_engine(engine, audio, fs=16000, initial_prompt=None):
+        calls.append(len(audio))
+        if len(calls) == 2:
+            raise RuntimeError("falha no motor")
+        return fake_engine(engine, audio, fs, initial_prompt)
+
+    monkeypatch.setattr(secre_tina, "run_engine", failing_engine)
+    transcriber = secre_tina.LiveTranscriber(chunk_seconds=2.0, overlap_seconds=0.5, echo=False)
+    transcriber.feed(np.random.default_rng(0).normal(0, 0.1, 30 * 16000).astype(np.float32))
+    with pytest.raises(RuntimeError):
+        transcriber.finish()
+
+
+def test_finish_raises_when_the_engine_cannot_be_loaded(monkeypatch):
+    def missing_engine(name=None):
+        raise RuntimeError("motor indisponível")
+
+    monkeypatch.setattr(secre_tina, "get_transcription_engine", missing_engine)
+    monkeypatch.setattr(secre_tina, "LIVE_MAX_PENDING", 1)
+    transcriber = secre_tina.LiveTranscriber(chunk_seconds=2.0, overlap_seconds=0.5, echo=False)
+    # Com a fila limitada, feed() só termina se a thread continuar esvaziando a fila após a falha
+    transcriber.feed(np.random.default_rng(0).normal(0, 0.1, 30 * 16000).astype(np.float32))
+    with pytest.raises(RuntimeError, match="motor indisponível"):
+        transcriber.finish()
+
+
+def test_recording_drops_chunks_when_the_engine_falls_behind(monkeypatch):
+    release = threading.Event()
+
+    def slow_engine(engine, audio, fs=16000, initial_prompt=None):
+        release.wait()
+        return fake_engine(engine, audio, fs, initial_prompt)
+
+    monkeypatch.setattr(secre_tina, "run_engine", slow_engine)
+    monkeypatch.setattr(secre_tina, "LIVE_MAX_PENDING", 2)
+    transcriber = secre_tina.LiveTranscriber(chunk_seconds=2.0, overlap_seconds=0.5, echo=False, block=False)
+    for _ in range(10):
+        transcriber.feed(np.random.default_rng(0).normal(0, 0.1, 2 * 16000).astype(np.float32))
+    # Um trecho no motor e dois na fila; os demais são descartados sem bloquear a gravação
+    assert transcriber._chunks.qsize() <= 2
+    assert transcriber.dropped_seconds > 0
+
+    release.set()
+    segments = transcriber.finish()
+    assert segments.ends[-1] == 20.0
@@ -0,0 +1,76 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import secre_tina
+
+FS = 16000
+
+
+class FakeSoundDevice:
+    """Microfone simulado: start() entrega de uma vez os blocos informados ao callback"""
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.blocksize = None
+
+    def InputStream(self, samplerate, channels, blocksize, callback):
+        self.blocksize = blocksize
+        device = self
+
+        class Stream:
+            def start(self):
+                for _ in range(device.blocks):
+                    block = np.full((blocksize, channels), 0.1, dtype=np.float32)
+                    callback(block, blocksize, None, None)
+
+            def stop(self):
+                pass
+
+            def close(self):
+                pass
+
+        return Stream()
+
+
+def record(tmp_path, monkeypatch, blocks, on_audio=None, before_enter=None):
+    monkeypatch.setattr(secre_tina, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(secre_tina, "catalog", secre_tina.Catalog(str(tmp_path / "catalog.db")))
+    device = FakeSoundDevice(blocks)
+    monkeypatch.setattr(secre_tina, "sd", device)
+
+    def enter(prompt=""):
+        if before_enter is not None:
+            before_enter()
+        return ""
+
+    monkeypatch.setattr("builtins.input", enter)
+    return secre_tina.record_audio("2024-01-01_10-00-00", fs=FS, on_audio=on_audio), device
+
+
+def test_buffer_is_sized_in_seconds(tmp_path, monkeypatch):
+    monkeypatch.setattr(secre_tina, "RECORDER_BUFFER_SECONDS", 2)
+    audio_file, device = record(tmp_path, monkeypatch, blocks=15)
+    assert device.blocksize == FS // 10
+    # 1,5 s cabem no buffer de 2 s mesmo sem a thread de escrita acompanhar
+    assert sf.info(audio_file).frames == 15 * FS // 10
+    assert not (secre_tina.catalog.get(audio_file) or {}).get('dropped_seconds')
+
+
+def test_dropped_blocks_are_reported_and_cataloged(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(secre_tina, "RECORDER_BUFFER_SECONDS", 1)
+    release = threading.Event()
+    # A thread de escrita fica presa no primeiro bloco até o Enter: o buffer de 10 blocos enche
+    audio_file, _ = record(tmp_path, monkeypatch, blocks=30, on_audio=lambda block: release.wait(),
+                           before_enter=release.set)
+
+    written = sf.info(audio_file).frames
+    dropped = 30 * FS // 10 - written
+    assert dropped > 0
+    assert secre_tina.catalog.get(audio_file)['dropped_seconds'] == dropped / FS
+    assert secre_tina.ui['recording_dropped'].format(dropped / FS, dropped // (FS // 10)) in capsys.readouterr().out
@@ -0,0 +1,89 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import secre_tina
+
+
+def sample(speakers=None):
+    return secre_tina.Segments([0.0, 1.25, 62.5], [1.25, 3.5, 3661.75], [0.9, 0.5, 1.0],
+                               [" Olá.", " Tudo bem?", " Até logo, ação."], speakers)
+
+
+def assert_same(a, b):
+    assert np.array_equal(a.starts, b.starts)
+    assert np.array_equal(a.ends, b.ends)
+    assert np.array_equal(a.confidence, b.confidence)
+    assert np.array_equal(a.speakers, b.speakers)
+    assert a.texts() == b.texts()
+
+
+@pytest.mark.parametrize("speakers", [None, [0, 1, -1]])
+def test_dict_round_trip_through_json(speakers):
+    segments = sample(speakers)
+    data = json.loads(json.dumps(segments.to_dict()))
+    assert ('speakers' in data) == (speakers is not None)
+    assert_same(secre_tina.Segments.from_dict(data), segments)
+
+
+def test_empty_segments_round_trip():
+    restored = secre_tina.Segments.from_dict(secre_tina.Segments().to_dict())
+    assert len(restored) == 0
+    assert restored.text == ""
+
+
+def test_jsonl_round_trip(tmp_path):
+    segments = sample([1, 0, -1])
+    path = tmp_path / "t.jsonl"
+    secre_tina.write_segments_jsonl(segments, path)
+
+    records = list(secre_tina.iter_segments_jsonl(path))
+    assert [r['id'] for r in records] == [0, 1, 2]
+    assert records[2] == {'id': 2, 'start': 62.5, 'end': 3661.75, 'confidence': 1.0, 'text': "Até logo, ação."}
+    assert 'speaker' not in records[2]
+    assert_same(secre_tina.Segments.from_jsonl(path), segments)
+
+
+def test_iter_segments_jsonl_pages(tmp_path):
+    path = tmp_path / "t.jsonl"
+    secre_tina.write_segments_jsonl(sample(), path)
+    assert [r['id'] for r in secre_tina.iter_segments_jsonl(path, offset=1)] == [1, 2]
+    assert [r['id'] for r in secre_tina.iter_segments_jsonl(path, offset=1, limit=1)] == [1]
+    assert list(secre_tina.iter_segments_jsonl(path, offset=5)) == []
+
+
+@pytest.mark.parametrize("seconds, srt, vtt", [
+    (0, "00:00:00,000", "00:00:00.000"),
+    (1.25, "00:00:01,250", "00:00:01.250"),
+    (3661.75, "01:01:01,750", "01:01:01.750"),
+    # O arredondamento dos milissegundos passa para o minuto seguinte
+    (59.9996, "00:01:00,000", "00:01:00.000"),
+    (np.float32(62.5), "00:01:02,500", "00:01:02.500"),
+])
+def test_format_timestamp(seconds, srt, vtt):
+    assert secre_tina.format_timestamp(seconds) == srt
+    assert secre_tina.format_timestamp(seconds, ".") == vtt
+
+
+def test_write_srt_and_vtt(tmp_path):
+    segments = sample([0, -1, -1])
+    label = secre_tina.ui['speaker_label']
+    secre_tina.write_srt(segments, tmp_path / "t.srt")
+    secre_tina.write_vtt(segments, tmp_path / "t.vtt")
+
+    assert (tmp_path / "t.srt").read_text(encoding='utf-8') == (
+        f"1\n00:00:00,000 --> 00:00:01,250\n[{label} 1] Olá.\n\n"
+        "2\n00:00:01,250 --> 00:00:03,500\nTudo bem?\n\n"
+        "3\n00:01:02,500 --> 01:01:01,750\nAté logo, ação.\n\n"
+    )
+    assert (tmp_path / "t.vtt").read_text(encoding='utf-8') == (
+        "WEBVTT\n\n"
+        f"00:00:00.000 --> 00:00:01.250\n<v {label} 1>Olá.\n\n"
+        "00:00:01.250 --> 00:00:03.500\nTudo bem?\n\n"
+        "00:01:02.500 --> 01:01:01.750\nAté logo, ação.\n\n"
+    )
@@ -0,0 +1,152 @@
+import asyncio
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import secre_tina
+from bench.fixtures import StubLLMServer
+
+FS = 16000
+
+
+class StubTranscriptionEngine(secre_tina.TranscriptionEngine):
+    """
+    Motor simulado, sem modelo: um segmento por clipe.
+
+    Cada chamada custa uma latência fixa, imitando o custo de um lançamento
+    do decodificador, para que o agrupamento em lotes faça diferença.
+    """
+
+    name = "stub"
+
+    def __init__(self, call_latency=0.05):
+        self.call_latency = call_latency
+        self.calls = 0
+
+    def preload(self):
+        return None
+
+    def transcribe(self, audio, initial_prompt=None):
+        return self.transcribe_batch([audio])[0]
+
+    def transcribe_batch(self, audios):
+        self.calls += 1
+        time.sleep(self.call_latency)
+        return [{"text": " trecho", "segments": [{"start": 0.0, "end": len(audio) / FS, "text": " trecho"}]}
+                for audio in audios]
+
+
+def wav_bytes(seconds, seed=0):
+    buffer = io.BytesIO()
+    audio = np.random.default_rng(seed).normal(0, 0.1, int(seconds * FS)).astype(np.float32)
+    sf.write(buffer, audio, FS, format="WAV")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    """Pasta de saída, bancos, cache e motor isolados no diretório temporário"""
+    monkeypatch.setattr(secre_tina, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(secre_tina, "job_queue", secre_tina.JobQueue(str(tmp_path / "jobs.db")))
+    monkeypatch.setattr(secre_tina, "catalog", secre_tina.Catalog(str(tmp_path / "catalog.db")))
+    monkeypatch.setattr(secre_tina, "search_index", secre_tina.SearchIndex(str(tmp_path / "search.db")))
+    monkeypatch.setattr(secre_tina.result_cache, "directory", str(tmp_path / "cache"))
+    monkeypatch.setitem(secre_tina.TRANSCRIPTION_ENGINES, "stub", StubTranscriptionEngine())
+    monkeypatch.setattr(secre_tina, "TRANSCRIPTION_ENGINE", "stub")
+    yield tmp_path
+    secre_tina.job_queue.close()
+
+
+def start_server(worker=None, max_wait=0.0):
+    batcher = secre_tina.ClipBatcher(max_wait=max_wait)
+    return secre_tina.ApiServer("127.0.0.1", 0, worker, batcher).start()
+
+
+async def post(url, data):
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, data=data) as response:
+            return response.status, dict(response.headers), await response.json()
+
+
+async def get(url):
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as response:
+            return response.status, await response.json()
+
+
+def test_uploaded_job_is_accepted_and_processed(isolated, monkeypatch):
+    llm = StubLLMServer(latency=0.0, token_rate=10000.0, response_tokens=20).start()
+    monkeypatch.setattr(secre_tina, "OPENAI_API_KEY", "")
+    monkeypatch.setattr(secre_tina, "OLLAMA_URL", llm.url)
+    worker = secre_tina.JobWorker(echo=False).start()
+    server = start_server(worker)
+    try:
+        status, headers, body = asyncio.run(post(f"{server.url}/v1/jobs?mode=meeting&filename=a.wav", wav_bytes(2)))
+        assert status == 202
+        assert headers["Location"] == f"/v1/jobs/{body['id']}"
+
+        deadline = time.monotonic() + 20
+        while True:
+            status, job = asyncio.run(get(f"{server.url}/v1/jobs/{body['id']}"))
+            assert status == 200
+            if job["status"] in ("done", "error") or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        assert (job["stage"], job["status"], job["error"]) == ("summarize", "done", None)
+    finally:
+        server.stop()
+        worker.stop()
+        llm.stop()
+
+
+def test_full_queue_answers_503_with_retry_after(isolated, monkeypatch):
+    monkeypatch.setattr(secre_tina, "SERVER_QUEUE_DEPTH", 1)
+    secre_tina.job_queue.enqueue(str(isolated / "a.wav"), "t", "meeting")
+    server = start_server()
+    try:
+        status, headers, body = asyncio.run(post(f"{server.url}/v1/jobs?mode=meeting", wav_bytes(1)))
+    finally:
+        server.stop()
+    assert status == 503
+    assert int(headers["Retry-After"]) >= 1
+    assert secre_tina.job_queue.pending() == 1
+
+
+def test_oversize_upload_answers_413(isolated, monkeypatch):
+    monkeypatch.setattr(secre_tina, "SERVER_MAX_UPLOAD_MB", 0.01)
+    server = start_server()
+    try:
+        status, _, _ = asyncio.run(post(f"{server.url}/v1/jobs?mode=meeting", wav_bytes(2)))
+        clip_status, _, _ = asyncio.run(post(f"{server.url}/v1/transcribe", wav_bytes(2)))
+    finally:
+        server.stop()
+    assert (status, clip_status) == (413, 413)
+    assert secre_tina.job_queue.pending() == 0
+    assert not list(isolated.glob("recording_*"))
+
+
+def test_concurrent_clips_share_engine_calls(isolated):
+    clips = 6
+    server = start_server(max_wait=0.2)
+
+    async def send_all():
+        return await asyncio.gather(*(post(f"{server.url}/v1/transcribe", wav_bytes(1, seed=i))
+                                      for i in range(clips)))
+
+    try:
+        responses = asyncio.run(send_all())
+    finally:
+        server.stop()
+    assert [status for status, _, _ in responses] == [200] * clips
+    assert all(body["text"].strip() == "trecho" for _, _, body in responses)
+    assert server.batcher.clips == clips
+    assert server.batcher.batches < clips
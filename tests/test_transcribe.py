@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import secre_tina
+
+FS = 16000
+
+
+class FakeEngine(secre_tina.TranscriptionEngine):
+    """Dois segmentos fixos, sem modelo"""
+
+    name = "fake"
+
+    def transcribe(self, audio, initial_prompt=None):
+        end = len(audio) / FS
+        return {"text": " um dois", "segments": [{"start": 0.0, "end": end / 2, "text": " um"},
+                                                 {"start": end / 2, "end": end, "text": " dois"}]}
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """Transcrição com motor falso e cache isolado no diretório temporário"""
+    monkeypatch.setitem(secre_tina.TRANSCRIPTION_ENGINES, "fake", FakeEngine())
+    monkeypatch.setattr(secre_tina, "TRANSCRIPTION_ENGINE", "fake")
+    monkeypatch.setattr(secre_tina, "VAD_MODE", "off")
+    monkeypatch.setattr(secre_tina, "PARALLEL_WORKERS", 1)
+    monkeypatch.setattr(secre_tina.result_cache, "directory", str(tmp_path / "cache"))
+    monkeypatch.setattr(secre_tina.result_cache, "refresh", False)
+    return np.random.default_rng(0).normal(0, 0.1, 4 * FS).astype(np.float32)
+
+
+def test_failed_diarization_is_reported_and_not_cached(pipeline, monkeypatch, capsys):
+    calls = []
+
+    def diarize(audio, fs=16000):
+        calls.append(len(audio))
+        if len(calls) == 1:
+            raise RuntimeError("sem memória")
+        return np.array([0.0, 2.0]), np.array([2.0, 4.0]), np.array([0, 1])
+
+    monkeypatch.setattr(secre_tina, "DIARIZATION", True)
+    monkeypatch.setattr(secre_tina, "diarize", diarize)
+
+    segments = secre_tina.transcribe_segments(pipeline, show_status=False)
+    assert segments.text.split() == ["um", "dois"]
+    assert "sem memória" in capsys.readouterr().out
+
+    # A falha não foi para o cache: a próxima chamada diariza de novo e guarda os falantes
+    segments = secre_tina.transcribe_segments(pipeline, show_status=False)
+    assert list(segments.speakers) == [0, 1]
+    assert list(secre_tina.transcribe_segments(pipeline, show_status=False).speakers) == [0, 1]
+    assert len(calls) == 2
+
+
+class CountingWhisper(secre_tina.FasterWhisperEngine):
+    """Opções de decodificação do faster-whisper, sem modelo; conta as chamadas"""
+
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, initial_prompt=None):
+        self.calls += 1
+        return FakeEngine().transcribe(audio, initial_prompt)
+
+
+@pytest.mark.parametrize("setting, value", [
+    ("WHISPER_BEAM_SIZE", 5),
+    ("WHISPER_COMPUTE_TYPE", "float32"),
+    ("WHISPER_DEVICE", "cuda"),
+    ("LANGUAGE", "en"),
+])
+def test_decode_settings_are_part_of_the_cache_key(pipeline, monkeypatch, setting, value):
+    engine = CountingWhisper()
+    monkeypatch.setitem(secre_tina.TRANSCRIPTION_ENGINES, "counting", engine)
+    monkeypatch.setattr(secre_tina, "TRANSCRIPTION_ENGINE", "counting")
+    secre_tina.transcribe_segments(pipeline, show_status=False)
+    secre_tina.transcribe_segments(pipeline, show_status=False)
+    assert engine.calls == 1
+
+    monkeypatch.setattr(secre_tina, setting, value)
+    secre_tina.transcribe_segments(pipeline, show_status=False)
+    assert engine.calls == 2
+
+
+def test_vad_settings_are_part_of_the_cache_key(pipeline, monkeypatch):
+    engine = CountingWhisper()
+    monkeypatch.setitem(secre_tina.TRANSCRIPTION_ENGINES, "counting", engine)
+    monkeypatch.setattr(secre_tina, "TRANSCRIPTION_ENGINE", "counting")
+    monkeypatch.setattr(secre_tina, "VAD_MODE", "energy")
+    secre_tina.transcribe_segments(pipeline, show_status=False)
+    monkeypatch.setattr(secre_tina, "VAD_PADDING", 0.5)
+    secre_tina.transcribe_segments(pipeline, show_status=False)
+    assert engine.calls == 2
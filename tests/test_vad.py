@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import secre_tina
+
+FS = 16000
+
+
+def synthetic(duration, spans, level=0.3, noise=0.001, seed=0):
+    """Ruído de fundo baixo com tons nos intervalos (início, fim) informados"""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, noise, int(duration * FS)).astype(np.float32)
+    t = np.arange(len(audio)) / FS
+    for start, end in spans:
+        mask = (t >= start) & (t < end)
+        audio[mask] += level * np.sin(2 * np.pi * 220 * t[mask]).astype(np.float32)
+    return audio
+
+
+def test_detects_known_speech_spans():
+    spans = [(1.0, 3.0), (5.0, 6.5), (8.0, 9.0)]
+    detected = secre_tina.detect_speech_energy(synthetic(10.0, spans))
+    assert len(detected) == len(spans)
+    for (start, end), (expected_start, expected_end) in zip(detected, spans):
+        # Margem de VAD_PADDING para cada lado, mais um quadro de análise
+        assert start == pytest.approx(expected_start - secre_tina.VAD_PADDING, abs=0.05)
+        assert end == pytest.approx(expected_end + secre_tina.VAD_PADDING, abs=0.05)
+
+
+def test_keeps_quiet_speech_when_there_is_no_silence():
+    # Fala contínua alternando entre dois níveis 8 dB distantes, sem pausas
+    t = np.arange(10 * FS) / FS
+    level = np.where((t // 1) % 2 == 0, 0.3, 0.3 * 10 ** (-8 / 20))
+    audio = (level * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    assert secre_tina.detect_speech_energy(audio) == [(0.0, 10.0)]
+
+
+def test_silence_below_the_absolute_floor_has_no_speech():
+    # Ruído por volta de -70 dBFS, abaixo do piso de -60 dBFS
+    assert secre_tina.detect_speech_energy(synthetic(5.0, [], noise=0.0003)) == []
+
+
+def test_transcribe_speech_maps_times_back_to_the_original_audio(monkeypatch):
+    monkeypatch.setattr(secre_tina, "VAD_MODE", "energy")
+    spans = [(2.0, 4.0), (10.0, 11.0)]
+    audio = synthetic(15.0, spans)
+
+    class ToneEngine:
+        """Um segmento por trecho com som no áudio compactado que recebe"""
+        name = "tone"
+
+        def transcribe(self, packed, initial_prompt=None):
+            frames = packed[:len(packed) // 160 * 160].reshape(-1, 160)
+            loud = np.abs(frames).max(axis=1) > 0.1
+            edges = np.diff(np.concatenate(([0], loud.astype(np.int8), [0])))
+            starts, ends = np.flatnonzero(edges == 1) / 100, np.flatnonzero(edges == -1) / 100
+            return {"text": "", "segments": [{"start": float(s), "end": float(e), "text": " tom"}
+                                             for s, e in zip(starts, ends)]}
+
+    result = secre_tina.transcribe_speech(ToneEngine(), audio)
+    times = [(segment["start"], segment["end"]) for segment in result["segments"]]
+    assert times == [pytest.approx(span, abs=0.02) for span in spans]
+    assert result["speech_ratio"] < 0.5